@@ -0,0 +1,153 @@
+import re
+
+# Group-by / filter keys -> SQL expression over cases
+DIMENSIONS = {
+    column: column for column in [
+        "case_status", "marketplace", "workstream", "specialist_id", "priority", "last_sub_status",
+        "seller_type", "case_source", "complexity", "issue_type", "api_supported", "feedback_received",
+    ]
+}
+DIMENSIONS.update({
+    "created_day": "DATE(created_at)",
+    "created_month": "strftime('%Y-%m', created_at)",
+    "listing_month": "strftime('%Y-%m', listing_start_date)",
+})
+
+# Aggregate fields -> numeric SQL expression; durations are in days
+MEASURES = {
+    "csat_score": "csat_score",
+    "listing_days": "julianday(listing_completion_date) - julianday(listing_start_date)",
+    "completion_days": "julianday(listing_completion_date) - julianday(created_at)",
+    "days_since_update": "julianday('now') - julianday(updated_at)",
+}
+
+# Aggregates computed by SQLite itself; median and pNN are ranked with window functions
+SQL_FUNCTIONS = {"sum": "SUM", "avg": "AVG", "min": "MIN", "max": "MAX"}
+PERCENTILE_PATTERN = re.compile(r"p(\d{1,2})$")
+
+MAX_GROUP_KEYS = 3
+MAX_AGGREGATES = 6
+
+
+class PlanError(ValueError):
+    """Analysis params that cannot be turned into a safe query"""
+
+
+def parse_aggregate(spec):
+    """(fn, field) from "count", "avg:csat_score" or {"fn": "p90", "field": "listing_days"}"""
+    if isinstance(spec, dict):
+        fn, field = spec.get("fn"), spec.get("field")
+    elif isinstance(spec, str):
+        fn, _, field = spec.partition(":")
+    else:
+        raise PlanError(f"Invalid aggregate {spec!r}")
+    fn = str(fn or "").strip().lower()
+    field = str(field or "").strip() or None
+
+    if fn == "count":
+        if field:
+            raise PlanError("count takes no field")
+        return fn, None
+    if fn == "median":
+        fn = "p50"
+    match = PERCENTILE_PATTERN.match(fn)
+    if fn not in SQL_FUNCTIONS and not (match and 0 < int(match.group(1)) < 100):
+        raise PlanError(f"Unknown aggregate {fn!r}; use count, {', '.join(SQL_FUNCTIONS)}, median or p1-p99")
+    if field not in MEASURES:
+        raise PlanError(f"Cannot aggregate {field!r}; use one of {', '.join(MEASURES)}")
+    return fn, field
+
+
+def aggregate_label(fn, field):
+    return f"{'median' if fn == 'p50' else fn} {field}"
+
+
+def plan_analysis(params):
+    """Build one SQL query for analysis params.
+
+    params: {"filters": {dimension: [values]}, "group_by": dimension or
+    [dimensions], "aggregates": [specs for parse_aggregate]}. Every name is
+    checked against DIMENSIONS/MEASURES and every value is bound, so model
+    output never reaches the SQL text. The first result column after the
+    group keys is always the case count.
+
+    Returns (sql, values, group_keys, labels) where labels names the
+    aggregate columns (starting with "cases").
+    """
+    group_by = params.get("group_by") or []
+    group_keys = [group_by] if isinstance(group_by, str) else list(group_by)
+    if len(group_keys) > MAX_GROUP_KEYS:
+        raise PlanError(f"At most {MAX_GROUP_KEYS} group-by keys are supported")
+    for key in group_keys:
+        if key not in DIMENSIONS:
+            raise PlanError(f"Cannot group by {key!r}; use one of {', '.join(DIMENSIONS)}")
+    if len(set(group_keys)) != len(group_keys):
+        raise PlanError("Duplicate group-by key")
+
+    aggregates = []
+    for spec in params.get("aggregates") or []:
+        aggregate = parse_aggregate(spec)
+        if aggregate[0] != "count" and aggregate not in aggregates:
+            aggregates.append(aggregate)
+    if len(aggregates) > MAX_AGGREGATES:
+        raise PlanError(f"At most {MAX_AGGREGATES} aggregates are supported")
+
+    where_conditions = []
+    filter_values = []
+    for field, field_values in (params.get("filters") or {}).items():
+        if not field_values:
+            continue
+        if field not in DIMENSIONS:
+            raise PlanError(f"Cannot filter by {field!r}; use one of {', '.join(DIMENSIONS)}")
+        field_values = field_values if isinstance(field_values, list) else [field_values]
+        where_conditions.append(f"{DIMENSIONS[field]} IN ({', '.join('?' for _ in field_values)})")
+        filter_values.extend(field_values)
+    where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+
+    keys = [f"{DIMENSIONS[key]} AS g{i}" for i, key in enumerate(group_keys)]
+    key_names = [f"g{i}" for i in range(len(group_keys))]
+    group_clause = f"GROUP BY {', '.join(key_names)}" if key_names else ""
+
+    # Plain aggregates share one GROUP BY pass over the filtered cases
+    columns = ["COUNT(*) AS a0"]
+    percentiles = []
+    for i, (fn, field) in enumerate(aggregates, start=1):
+        if fn in SQL_FUNCTIONS:
+            columns.append(f"{SQL_FUNCTIONS[fn]}({MEASURES[field]}) AS a{i}")
+        else:
+            percentiles.append((i, int(fn[1:]) / 100, field))
+
+    ctes = [
+        f"base AS (SELECT {', '.join(keys + columns)} FROM cases WHERE {where_clause} {group_clause})"
+    ]
+    # Nearest-rank percentile per group: smallest value whose rank reaches p * n
+    partition = f"PARTITION BY {', '.join(key_names)}" if key_names else ""
+    joins = []
+    for i, fraction, field in percentiles:
+        ctes.append(f"""p{i} AS (
+            SELECT {', '.join(key_names + [f'MIN(CASE WHEN rn >= {fraction!r} * n THEN v END) AS a{i}'])}
+            FROM (
+                SELECT {', '.join(key_names + ['v', f'ROW_NUMBER() OVER ({partition} ORDER BY v) AS rn', f'COUNT(*) OVER ({partition}) AS n'])}
+                FROM (SELECT {', '.join(keys + [f'{MEASURES[field]} AS v'])} FROM cases WHERE {where_clause})
+                WHERE v IS NOT NULL
+            )
+            {group_clause}
+        )""")
+        on = " AND ".join(f"base.{name} IS p{i}.{name}" for name in key_names) or "1"
+        joins.append(f"LEFT JOIN p{i} ON {on}")
+
+    selected = [f"base.{name}" for name in key_names] + [
+        f"{'base' if i == 0 or aggregates[i - 1][0] in SQL_FUNCTIONS else f'p{i}'}.a{i}"
+        for i in range(len(aggregates) + 1)
+    ]
+    order = ", ".join(["base.a0 DESC"] + [f"base.{name}" for name in key_names])
+    sql = f"""
+        WITH {', '.join(ctes)}
+        SELECT {', '.join(selected)}
+        FROM base {' '.join(joins)}
+        ORDER BY {order}
+    """
+    # Each CTE repeats the filters, so the filter values are bound once per CTE
+    values = filter_values * len(ctes)
+    labels = ["cases"] + [aggregate_label(fn, field) for fn, field in aggregates]
+    return sql, values, group_keys, labels
@@ -0,0 +1,103 @@
+import math
+import threading
+from collections import OrderedDict
+
+
+def _jaccard(a, b):
+    """Token-set similarity; two empty sets are identical"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class SemanticAnalyticsCache:
+    """Reuses resolved analysis params for paraphrased analytics questions.
+
+    Queries are normalized against the case vocabularies; only queries with the
+    same filter entities, the same group-by keys and the same leftover
+    dimension words are compared, and a stored result is reused when the
+    other leftover words are similar enough. An optional embed
+    callable (text -> vector) adds a cosine check over the same candidates.
+    """
+
+    def __init__(self, normalizer, max_entries=1000, min_similarity=0.6, embed=None, min_embedding_similarity=0.9):
+        self.normalizer = normalizer
+        self.max_entries = max_entries
+        self.min_similarity = min_similarity
+        self.embed = embed
+        self.min_embedding_similarity = min_embedding_similarity
+        self.hits = 0
+        self.misses = 0
+
+        # (entities, group_by keys, dimension words) -> OrderedDict{residual tokens: (vector, params)}
+        self._buckets = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _key(self, query):
+        """(bucket key, residual tokens) for query"""
+        entities, group_by, residual = self.normalizer.normalize(query)
+        # A dimension word outside the "by" phrase may be a group key the phrase missed
+        dimensions = residual & self.normalizer.dimension_tokens
+        return (entities, group_by, dimensions), residual
+
+    def lookup(self, query):
+        """Return (params, confidence) for a matching earlier query, else (None, 0.0)"""
+        key, residual = self._key(query)
+        vector = None
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            best_params, best_score = None, 0.0
+
+            for tokens, (stored_vector, params) in (bucket or {}).items():
+                score = _jaccard(residual, tokens)
+                if score < self.min_similarity and self.embed and stored_vector is not None:
+                    if vector is None:
+                        vector = self.embed(query)
+                    cosine = _cosine(vector, stored_vector)
+                    if cosine >= self.min_embedding_similarity:
+                        score = max(score, cosine)
+                if score > best_score:
+                    best_params, best_score = params, score
+
+            if best_params is not None and best_score >= self.min_similarity:
+                self._buckets.move_to_end(key)
+                self.hits += 1
+                return dict(best_params), best_score
+
+            self.misses += 1
+            return None, 0.0
+
+    def store(self, query, params):
+        """Remember the params resolved for query"""
+        key, residual = self._key(query)
+        vector = self.embed(query) if self.embed else None
+
+        with self._lock:
+            bucket = self._buckets.setdefault(key, OrderedDict())
+            self._buckets.move_to_end(key)
+            if residual not in bucket:
+                self._size += 1
+            bucket[residual] = (vector, dict(params))
+
+            # Evict least recently used buckets
+            while self._size > self.max_entries and self._buckets:
+                _, evicted = self._buckets.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": self._size,
+        }
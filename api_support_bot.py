@@ -1,9 +1,28 @@
-import sqlite3
 import json
+import re
 from openai import OpenAI
 from datetime import datetime, timedelta
 import pandas as pd
 import random
+import time
+import threading
+import contextvars
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+
+from database import (
+    ConnectionPool, migrate, allocate_ids, advance_sequence, format_case_id,
+    distinct_values, encode_cursor, decode_cursor, ROLLUP_DIMENSIONS, HOT_QUERIES,
+)
+from llm_cache import LLMCache
+from query_normalizer import QueryNormalizer
+from analytics_cache import SemanticAnalyticsCache
+from rule_parser import RuleParser, search_phrase, search_terms
+from partial_json import PartialJSONObject
+from resilience import ResilientCaller, CircuitOpenError
+from model_router import ModelRouter
+from case_export import export_query, EXPORT_CHUNK_SIZE
+from analysis_planner import plan_analysis, parse_aggregate, PlanError, DIMENSIONS as ANALYSIS_DIMENSIONS, MEASURES as ANALYSIS_MEASURES
 
 # OpenRouter Configuration
 OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
@@ -65,6 +84,111 @@ SUB_STATUSES = [
     "HANDOVER",
 ]
 
+# Case status implied by a new sub-status (anything else means WIP)
+SUB_STATUS_CASE_STATUS = {
+    'Case_Created': 'SUBMITTED',
+    'INT_START': 'WIP',
+    'INT_WIP': 'WIP',
+    'ON_HOLD': 'ON-HOLD',
+    'CANCELLED': 'CANCELLED',
+    'HANDOVER': 'COMPLETED',
+    'SUPPORT': 'WIP',
+    'Note': 'WIP'
+}
+
+# Case statuses counted as active in the sidebar metrics
+ACTIVE_STATUSES = ["SUBMITTED", "WIP", "AWAITING INFORMATION"]
+
+# Seconds get_case_counts() may serve a cached result
+CASE_COUNTS_TTL = 5.0
+
+# Columns returned by list_cases, the columns it filters on and the keys it sorts by
+LIST_COLUMNS = [
+    "case_id", "seller_name", "marketplace", "case_status", "priority", "issue_type",
+    "last_sub_status", "workstream", "specialist_id", "created_at", "updated_at",
+]
+LIST_FILTER_COLUMNS = ["case_status", "marketplace", "priority", "last_sub_status", "workstream", "specialist_id"]
+LIST_SORTS = ["updated_at", "created_at"]
+
+# Seconds get_facet_values() may serve cached values
+FACET_TTL = 300.0
+
+# Filterable fields for analytics queries, in phrase-matching priority order
+ANALYTICS_VOCABULARIES = {
+    "case_status": CASE_STATUSES,
+    "marketplace": MARKETPLACES,
+    "workstream": WORKSTREAMS,
+    "priority": PRIORITIES,
+    "last_sub_status": SUB_STATUSES,
+}
+
+# Enumerations the rule-based parser reads from new-case and update messages
+CASE_VOCABULARIES = {
+    "marketplace": MARKETPLACES,
+    "case_source": CASE_SOURCES,
+    "workstream": WORKSTREAMS,
+    "sub_status": SUB_STATUSES,
+}
+
+# Payload fields for each intent in the combined intent-and-extraction prompt
+COMBINED_PAYLOAD_FIELDS = {
+    "create": [
+        "seller_name", "amazon_case_id", "marketplace", "case_source", "workstream", "issue_type",
+        "complexity", "priority", "seller_type", "api_supported", "listing_start_date", "notes",
+    ],
+    "update": ["case_id", "note", "sub_status", "listing_completion_date", "csat_score", "feedback_received"],
+    "query": ["case_id"],
+    "analytics": ["filters", "group_by", "aggregates", "description"],
+    "search": ["query"],
+}
+
+# Enumerated payload fields; values outside these lists are dropped
+COMBINED_ENUMS = {
+    "marketplace": MARKETPLACES,
+    "case_source": CASE_SOURCES,
+    "workstream": WORKSTREAMS,
+    "complexity": COMPLEXITIES,
+    "priority": PRIORITIES,
+    "seller_type": SELLER_TYPES,
+    "sub_status": SUB_STATUSES,
+    "feedback_received": ["Yes", "No"],
+}
+
+# Analytics filter columns (None = free-form values) and allowed group-by columns
+ANALYTICS_FILTER_FIELDS = dict(ANALYTICS_VOCABULARIES, specialist_id=None)
+ANALYTICS_GROUP_BY_FIELDS = list(ANALYSIS_DIMENSIONS)
+# Lower-cased value -> stored form for the enumerated analytics filters
+_ANALYTICS_CANONICAL = {
+    field: {str(value).lower(): value for value in values}
+    for field, values in ANALYTICS_FILTER_FIELDS.items() if values is not None
+}
+
+# Groups listed individually in analysis results; the rest are summed into "Other"
+ANALYSIS_TOP_N = 20
+
+# Typical chat analyses, checked for index use by QuickSupportBot.hot_queries
+HOT_ANALYSES = {
+    "by_status": {"filters": {"case_status": ["WIP"]}},
+    "status_marketplace": {"filters": {"case_status": ["WIP"], "marketplace": ["EU"]}},
+    "by_marketplace": {"filters": {"marketplace": ["EU", "NA"]}},
+    "by_workstream": {"filters": {"workstream": ["DSR"]}},
+    "by_priority": {"filters": {"priority": ["High"]}},
+    "by_sub_status": {"filters": {"last_sub_status": ["PMA"]}},
+    "by_specialist": {"filters": {"specialist_id": ["SPEC001"]}},
+    "group_by_status": {"group_by": "case_status"},
+    "wip_group_by_marketplace": {"filters": {"case_status": ["WIP"]}, "group_by": "marketplace"},
+    "eu_by_marketplace_priority": {"filters": {"marketplace": ["EU"]}, "group_by": ["marketplace", "priority"]},
+    "specialist_csat": {"group_by": "specialist_id", "aggregates": ["avg:csat_score"]},
+    "completed_median_by_workstream": {
+        "filters": {"case_status": ["COMPLETED"]}, "group_by": "workstream", "aggregates": ["median:completion_days"],
+    },
+    "total": {},
+}
+
+# Extracted case fields needed before a streamed create can stop reading the model;
+# "notes" is generated last and falls back to the original message
+CASE_STREAM_FIELDS = [field for field in COMBINED_PAYLOAD_FIELDS["create"] if field != "notes"]
+
 # AI Models
 MODELS = {
     "fast": "anthropic/claude-3-haiku",
@@ -73,91 +197,192 @@ MODELS = {
     "premium": "openai/gpt-4-turbo"
 }
 
-class QuickSupportBot:
-    def __init__(self, model_tier="balanced", api_key=None):
-        # Store client as instance variable instead of global
+# Approximate USD per million (input, output) tokens for each tier
+MODEL_PRICES = {
+    "fast": (0.25, 1.25),
+    "balanced": (0.5, 1.5),
+    "smart": (3.0, 15.0),
+    "premium": (10.0, 30.0)
+}
+
+# Intents a classification reply may name
+INTENTS = ["create", "update", "query", "analytics", "search"]
+
+# Fields an extraction must fill before it is trusted
+REQUIRED_FIELDS = {
+    "create": ["seller_name", "issue_type"],
+    "update": ["case_id", "note"],
+}
+
+# Tier that duplicate (hedged) requests go to when the current tier runs slow
+HEDGE_TIERS = {
+    "fast": "balanced",
+    "balanced": "fast",
+    "smart": "balanced",
+    "premium": "smart"
+}
+
+# Worker threads for speculative model calls, shared by all bots in the process
+SPECULATION_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="speculate")
+# Set once a speculative call's extraction has lost to another intent; checked before and during its model calls
+_speculation_cancel = contextvars.ContextVar("speculation_cancel", default=None)
+# Threads sending hedged backup requests; kept apart from SPECULATION_POOL, whose
+# tasks make hedged calls themselves
+HEDGE_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hedge")
+
+# Result of a model call abandoned because its speculative extraction lost
+SPECULATION_CANCELLED = {"error": "Speculative call cancelled", "cancelled": True}
+
+# Reply to create/update messages the rules cannot read while the model is unavailable
+MODEL_UNAVAILABLE_RESPONSE = (
+    "The model service is unavailable right now and I couldn't read that message reliably. "
+    "Please try again in a minute, or use the 'Create Case' tab (or 'Update CASE-0001: ..., mark PMA')."
+)
+
+# Reply when a message matches no known intent
+UNKNOWN_INTENT_RESPONSE = """❓ I'm not sure what you want to do. Try:
+- 'New case for [seller] on [marketplace]'
+- 'Update CASE-0001: [description]'  
+- 'Show case CASE-0001'
+- 'How many WIP cases in EU marketplace?'
+- 'Find cases mentioning token expiry'"""
+
+# Cases returned for a chat search, and best-ranked note matches per index
+# considered before grouping by case when no filters are given
+SEARCH_LIMIT = 10
+SEARCH_CANDIDATES = 2000
+
+def _format_value(value):
+    if value is None:
+        return "n/a"
+    return f"{value:.2f}".rstrip("0").rstrip(".") if isinstance(value, float) else str(value)
+
+
+def format_analysis(result):
+    """Markdown for a run_analysis result"""
+    keys = len(result["group_by"])
+    extras = result["columns"][keys + 1:]
+    lines = [f"📊 **{result['description']}**", ""]
+    if keys:
+        for row in result["rows"]:
+            line = f"• **{' / '.join(_format_value(value) for value in row[:keys])}**: {row[keys]} cases"
+            lines.append(line + "".join(f" · {label} {_format_value(value)}" for label, value in zip(extras, row[keys + 1:])))
+        if result["other"]:
+            lines.append(f"• **Other ({result['other']['groups']} more)**: {result['other']['count']} cases")
+        lines.append("")
+    lines.append(f"**Total**: {result['total']} cases")
+    if not keys and result["rows"]:
+        lines.extend(f"• {label}: {_format_value(value)}" for label, value in zip(extras, result["rows"][0][1:]))
+    return "\n".join(lines)
+
+
+class BotResources:
+    """Expensive, thread-safe pieces behind a QuickSupportBot.
+    
+    One instance can back many bots (e.g. one per Streamlit session, shared
+    through st.cache_resource): the HTTP client, connection pool, caches,
+    rule parser, resilience policy and router are built once, and database
+    setup runs only for the first bot created on it.
+    """
+    
+    def __init__(self, api_key=None, db_path='support_demo.db', cache=None, analytics_cache=None, use_rules=True, base_url=None, resilience=None, router=None, cache_path='llm_cache.db'):
+        self.api_key = api_key
+        self.base_url = base_url or OPENROUTER_BASE_URL
         self.client = None
         if api_key:
             self.client = OpenAI(
                 api_key=api_key,
-                base_url=OPENROUTER_BASE_URL,
+                base_url=self.base_url,
+                max_retries=0,  # retries are handled by self.resilience
             )
         
-        self.db_path = 'support_demo.db'
+        self.db_path = db_path
+        self.db = ConnectionPool(self.db_path)
+        
+        # Per-call tier selection with escalation and request budgets; router=False pins the bot's model
+        self.router = ModelRouter(list(MODELS), MODEL_PRICES) if router is None else (router or None)
+        
+        # Timeouts, retries, circuit breaker and hedging for model calls; resilience=False disables
+        self.resilience = (
+            ResilientCaller(
+                hedge_models={MODELS[tier]: MODELS[hedge] for tier, hedge in HEDGE_TIERS.items()},
+                executor=HEDGE_POOL
+            )
+            if resilience is None else (resilience or None)
+        )
+        
+        # Response cache for model calls, stored in cache_path; pass cache=False to disable
+        self.cache = LLMCache(cache_path) if cache is None else (cache or None)
+        # Paraphrase-aware cache of resolved analytics params; analytics_cache=False disables
+        self.analytics_cache = (
+            SemanticAnalyticsCache(QueryNormalizer(ANALYTICS_VOCABULARIES))
+            if analytics_cache is None else (analytics_cache or None)
+        )
+        # Local parser tried before the model for routine, fully parseable messages
+        self.rule_parser = (
+            RuleParser(CASE_VOCABULARIES, QueryNormalizer(ANALYTICS_VOCABULARIES))
+            if use_rules else None
+        )
+        
+        # (expires_at, counts) shared by every bot so any write invalidates it
+        self.case_counts = None
+        # column -> (expires_at, sorted distinct values) for the Cases tab filters
+        self.facets = {}
+        
+        self.initialized = False
+        self._init_lock = threading.Lock()
+    
+    def ensure_initialized(self, setup):
+        """Run setup() once for the lifetime of these resources"""
+        with self._init_lock:
+            if not self.initialized:
+                setup()
+                self.initialized = True
+
+
+class QuickSupportBot:
+    def __init__(self, model_tier="balanced", api_key=None, db_path='support_demo.db', cache=None, analytics_cache=None, use_rules=True, speculative=False, combined=False, base_url=None, resilience=None, router=None, resources=None, cache_path='llm_cache.db'):
+        # Shared client, pool, caches and policies; built here unless passed in (the other
+        # resource arguments are ignored then)
+        if resources is None:
+            resources = BotResources(api_key, db_path, cache, analytics_cache, use_rules, base_url, resilience, router, cache_path)
+        self.resources = resources
+        self.client = resources.client
+        self.base_url = resources.base_url
+        self.api_key = resources.api_key  # Store for potential re-initialization
+        self.db_path = resources.db_path
+        self.db = resources.db
+        self.router = resources.router
+        self.resilience = resources.resilience
+        self.cache = resources.cache
+        self.analytics_cache = resources.analytics_cache
+        self.rule_parser = resources.rule_parser
+        
+        # Per-bot (per-session) state below is cheap to create
+        self.model_tier = model_tier
         self.model = MODELS[model_tier]
-        self.api_key = api_key  # Store for potential re-initialization
+        # Call sites ("extract_case", "extract_update", "intent", "analytics") that bypass the cache
+        self.cache_opt_out = set()
+        # Run intent classification and likely extractions in parallel for ambiguous messages
+        self.speculative = speculative
+        # Classify intent and extract its payload in a single model call
+        self.combined = combined
+        # Token usage across all model calls made by this bot
+        self.usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        resources.ensure_initialized(self._prepare_database)
+    
+    def _prepare_database(self):
         self.setup_database()
         self.populate_test_data()
     
     def setup_database(self):
-        """Create database and tables with complete schema"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Check if we need to update the schema
-        cursor.execute("PRAGMA table_info(cases)")
-        columns = [column[1] for column in cursor.fetchall()]
-        
-        if 'amazon_case_id' not in columns or 'feedback_received' not in columns:
-            # Drop and recreate table with complete schema
-            cursor.execute("DROP TABLE IF EXISTS cases")
-            cursor.execute("DROP TABLE IF EXISTS updates")
-        
-        # Complete cases table schema
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS cases (
-                case_id TEXT PRIMARY KEY,
-                amazon_case_id TEXT,
-                seller_id INTEGER NOT NULL,
-                seller_name TEXT NOT NULL,
-                specialist_id TEXT NOT NULL,
-                specialist_name TEXT NOT NULL,
-                marketplace TEXT NOT NULL,
-                case_source TEXT NOT NULL,
-                case_status TEXT NOT NULL,
-                workstream TEXT NOT NULL,
-                listing_start_date TEXT,
-                listing_completion_date TEXT,
-                issue_type TEXT NOT NULL,
-                complexity TEXT NOT NULL,
-                priority TEXT NOT NULL,
-                api_supported TEXT NOT NULL,
-                integration_type TEXT NOT NULL,
-                seller_type TEXT NOT NULL,
-                feedback_received TEXT DEFAULT 'No',
-                csat_score REAL,
-                notes TEXT,
-                last_sub_status TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Updates table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS updates (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                case_id TEXT NOT NULL,
-                note TEXT NOT NULL,
-                updated_by TEXT NOT NULL,
-                timestamp TEXT NOT NULL,
-                sub_status TEXT NOT NULL,
-                FOREIGN KEY (case_id) REFERENCES cases(case_id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        """Create or upgrade the schema in place (no-op when already current)"""
+        migrate(self.db)
     
     def populate_test_data(self):
         """Add sample data for testing"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Check if data already exists
-        cursor.execute("SELECT COUNT(*) FROM cases")
-        if cursor.fetchone()[0] > 0:
-            conn.close()
+        if self.db.fetchone("SELECT 1 FROM cases LIMIT 1"):
             return
         
         # Sample test data with complete schema
@@ -268,12 +493,6 @@ class QuickSupportBot:
             }
         ]
         
-        # Insert test cases
-        for case in test_cases:
-            columns = ', '.join(case.keys())
-            placeholders = ', '.join(['?' for _ in case])
-            cursor.execute(f"INSERT INTO cases ({columns}) VALUES ({placeholders})", list(case.values()))
-        
         # Add some test updates
         test_updates = [
             ('CASE-0001', 'Seller provided API credentials for testing', 'Alice Johnson', 'INT_WIP'),
@@ -283,37 +502,217 @@ class QuickSupportBot:
             ('CASE-0004', 'Case put on hold pending brand registry', 'Carol Wilson', 'ON_HOLD'),
         ]
         
-        for case_id, note, updated_by, sub_status in test_updates:
-            cursor.execute('''
+        with self.db.transaction("IMMEDIATE") as conn:
+            cursor = conn.cursor()
+            
+            # Another process may have seeded while we waited for the lock
+            if cursor.execute("SELECT 1 FROM cases LIMIT 1").fetchone():
+                return
+            
+            # Insert test cases
+            for case in test_cases:
+                columns = ', '.join(case.keys())
+                placeholders = ', '.join(['?' for _ in case])
+                cursor.execute(f"INSERT INTO cases ({columns}) VALUES ({placeholders})", list(case.values()))
+            
+            cursor.executemany('''
                 INSERT INTO updates (case_id, note, updated_by, timestamp, sub_status)
                 VALUES (?, ?, ?, ?, ?)
-            ''', (case_id, note, updated_by, datetime.now().isoformat(), sub_status))
-        
-        conn.commit()
-        conn.close()
+            ''', [
+                (case_id, note, updated_by, datetime.now().isoformat(), sub_status)
+                for case_id, note, updated_by, sub_status in test_updates
+            ])
+            
+            advance_sequence(conn, 'case_id', len(test_cases))
+    
+    def _completion_kwargs(self, messages, temperature, max_tokens, model=None):
+        """Request arguments shared by every chat completion call"""
+        return {
+            "model": model or self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "extra_headers": {
+                "HTTP-Referer": "http://localhost:3000",
+                "X-Title": "API Support Bot"
+            }
+        }
+    
+    def _cache_lookup(self, messages, temperature, max_tokens, call_site, model=None):
+        """Return (cache_key, cached_result); cache_key is None when caching is off"""
+        if self.cache is None or call_site in self.cache_opt_out:
+            return None, None
+        
+        cache_key = LLMCache.make_key(model or self.model, messages, temperature, max_tokens)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cache_key, {"success": True, "content": cached, "cached": True}
+        return cache_key, None
+    
+    def _cache_store(self, cache_key, content, model=None):
+        if cache_key is not None:
+            self.cache.set(cache_key, model or self.model, content)
     
-    def _make_api_call(self, messages, temperature=0.1, max_tokens=400):
+    def _make_api_call(self, messages, temperature=0.1, max_tokens=400, call_site=None, model=None):
         """Centralized API call method with proper error handling"""
         if not self.client:
             return {"error": "API client not initialized. Please check your API key."}
         
+        cancel = _speculation_cancel.get()
+        if cancel is not None:
+            return self._cancellable_call(cancel, messages, temperature, max_tokens, call_site, model)
+        
+        cache_key, cached = self._cache_lookup(messages, temperature, max_tokens, call_site, model)
+        if cached:
+            return cached
+        
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                extra_headers={
-                    "HTTP-Referer": "http://localhost:3000",
-                    "X-Title": "API Support Bot"
-                }
-            )
-            return {"success": True, "content": response.choices[0].message.content.strip()}
+            response = self._create_completion(self._completion_kwargs(messages, temperature, max_tokens, model), call_site)
+            content = response.choices[0].message.content.strip()
+        except CircuitOpenError as e:
+            return {"error": str(e), "circuit_open": True}
         except Exception as e:
             return {"error": str(e)}
+        
+        self._cache_store(cache_key, content, model)
+        return {"success": True, "content": content, "usage": self._record_usage(response)}
     
-    def extract_case_info(self, text):
-        """Extract case information from text"""
+    def _cancellable_call(self, cancel, messages, temperature, max_tokens, call_site, model):
+        """_make_api_call for a speculative extraction: skipped once cancel is set, else
+        streamed so the HTTP response can be closed as soon as it is"""
+        if cancel.is_set():
+            return dict(SPECULATION_CANCELLED)
+        stream = self.stream_api_call(messages, temperature, max_tokens, call_site, model)
+        try:
+            for event in stream:
+                if "delta" not in event:
+                    return event
+                if cancel.is_set():
+                    return dict(SPECULATION_CANCELLED)
+        finally:
+            stream.close()
+        return {"error": "Stream ended without a result"}
+    
+    def _routed_call(self, messages, call_site, validate, max_tokens=400):
+        """Make a model call on the router's tier, escalating while validate(result) is low.
+        
+        validate maps an API result to a confidence in [0, 1]. Returns the
+        last result (the accepted one, or the best effort when the budget or
+        the tiers ran out). Without a router this is a plain _make_api_call.
+        """
+        if not self.router:
+            return self._make_api_call(messages, max_tokens=max_tokens, call_site=call_site)
+        
+        result = None
+        for tier in self.router.route(call_site, self.model_tier, messages, max_tokens):
+            started = time.perf_counter()
+            result = self._make_api_call(messages, max_tokens=max_tokens, call_site=call_site, model=MODELS[tier])
+            if result.get("cancelled"):
+                # Abandoned early: neither a latency sample nor a charge against the budget
+                break
+            self.router.record(call_site, tier, self.model_tier, time.perf_counter() - started,
+                               result.get("usage"), result.get("cached"))
+            if "error" in result or validate(result) >= self.router.min_confidence:
+                break
+        return result
+    
+    def _intent_confidence(self, result):
+        return 1.0 if result.get("content", "").lower().strip(" .\"'") in INTENTS else 0.0
+    
+    def _payload_confidence(self, intent, data):
+        """Confidence in an extracted payload: required fields present x enum values valid"""
+        if "error" in self._validate_combined({"intent": intent, "payload": data}):
+            return 0.0
+        if intent not in REQUIRED_FIELDS:
+            return 1.0
+        required = REQUIRED_FIELDS[intent]
+        present = sum(1 for field in required if data.get(field)) / len(required)
+        enums = [field for field in COMBINED_PAYLOAD_FIELDS[intent] if field in COMBINED_ENUMS and data.get(field) is not None]
+        valid = sum(1 for field in enums if data[field] in COMBINED_ENUMS[field]) / len(enums) if enums else 1.0
+        return present * valid
+    
+    def _create_completion(self, kwargs, call_site=None):
+        """Run a chat completion through the resilience policy when one is set"""
+        if self.resilience:
+            return self.resilience.call(self.client.chat.completions.create, kwargs, call_site)
+        return self.client.chat.completions.create(**kwargs)
+    
+    def stream_api_call(self, messages, temperature=0.1, max_tokens=400, call_site=None, model=None):
+        """Streaming counterpart of _make_api_call.
+        
+        Yields {"delta": text} as tokens arrive, then one final dict shaped like
+        the _make_api_call result. Closing the generator early closes the HTTP
+        stream; only complete responses are cached.
+        """
+        if not self.client:
+            yield {"error": "API client not initialized. Please check your API key."}
+            return
+        
+        cache_key, cached = self._cache_lookup(messages, temperature, max_tokens, call_site, model)
+        if cached:
+            yield {"delta": cached["content"]}
+            yield cached
+            return
+        
+        parts = []
+        usage = None
+        response = None
+        try:
+            response = self._create_completion(dict(
+                self._completion_kwargs(messages, temperature, max_tokens, model),
+                stream=True,
+                stream_options={"include_usage": True},
+            ), call_site)
+            for chunk in response:
+                if getattr(chunk, "usage", None):
+                    usage = chunk
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield {"delta": parts[-1]}
+        except CircuitOpenError as e:
+            yield {"error": str(e), "circuit_open": True}
+            return
+        except Exception as e:
+            yield {"error": str(e)}
+            return
+        finally:
+            if response is not None:
+                response.close()
+        
+        content = "".join(parts).strip()
+        self._cache_store(cache_key, content, model)
+        yield {"success": True, "content": content, "usage": self._record_usage(usage)}
+    
+    def _record_usage(self, response):
+        """Add a completion's token counts to self.usage and return them"""
+        usage = getattr(response, "usage", None)
+        counts = {
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        }
+        self.usage["calls"] += 1
+        self.usage["prompt_tokens"] += counts["prompt_tokens"]
+        self.usage["completion_tokens"] += counts["completion_tokens"]
+        return counts
+    
+    def _parse_json_result(self, result):
+        """Turn an API call result into parsed JSON or an {"error": ...} dict"""
+        if "error" in result:
+            return {"error": result["error"]}
+        
+        try:
+            content = result["content"]
+            # Clean JSON response
+            if content.startswith('```json'):
+                content = content[7:-3]
+            elif content.startswith('```'):
+                content = content[3:-3]
+            
+            return json.loads(content)
+        except Exception as e:
+            return {"error": str(e)}
+    
+    def _case_info_messages(self, text):
         prompt = f"""
         Extract case information from this text: "{text}"
         
@@ -336,32 +735,31 @@ class QuickSupportBot:
         Return JSON only:
         """
         
-        messages = [
+        return [
             {
                 "role": "system", 
                 "content": "You are an expert at extracting structured data from API integration support conversations."
             },
             {"role": "user", "content": prompt}
         ]
-        
-        result = self._make_api_call(messages)
-        if "error" in result:
-            return {"error": result["error"]}
-        
-        try:
-            content = result["content"]
-            # Clean JSON response
-            if content.startswith('```json'):
-                content = content[7:-3]
-            elif content.startswith('```'):
-                content = content[3:-3]
-            
-            return json.loads(content)
-        except Exception as e:
-            return {"error": str(e)}
     
-    def extract_update_info(self, text):
-        """Extract update information from text"""
+    def extract_case_info(self, text):
+        """Extract case information from text"""
+        if self.rule_parser:
+            parsed = self.rule_parser.parse_case(text)
+            if parsed:
+                return parsed
+        
+        result = self._routed_call(
+            self._case_info_messages(text), "extract_case",
+            lambda result: self._payload_confidence("create", self._parse_json_result(result))
+        )
+        if result.get("circuit_open"):
+            # The strict rule parse above already failed; don't guess at fields
+            return {"error": MODEL_UNAVAILABLE_RESPONSE, "circuit_open": True}
+        return self._parse_json_result(result)
+    
+    def _update_info_messages(self, text):
         prompt = f"""
         Extract update information from: "{text}"
         
@@ -378,31 +776,93 @@ class QuickSupportBot:
         Return JSON only:
         """
         
-        messages = [
+        return [
             {
                 "role": "system", 
                 "content": "You are an expert at extracting case update information."
             },
             {"role": "user", "content": prompt}
         ]
+    
+    def extract_update_info(self, text):
+        """Extract update information from text"""
+        if self.rule_parser:
+            parsed = self.rule_parser.parse_update(text)
+            if parsed:
+                return parsed
+        
+        result = self._routed_call(
+            self._update_info_messages(text), "extract_update",
+            lambda result: self._payload_confidence("update", self._parse_json_result(result)), max_tokens=300
+        )
+        if result.get("circuit_open"):
+            # The strict rule parse above already failed; don't guess at fields
+            return {"error": MODEL_UNAVAILABLE_RESPONSE, "circuit_open": True}
+        return self._parse_json_result(result)
+    
+    def stream_json_fields(self, messages, max_tokens=400, call_site=None, stop_after=None):
+        """Yield (field, value) pairs from a streamed JSON reply as each completes.
         
-        result = self._make_api_call(messages, max_tokens=300)
-        if "error" in result:
-            return {"error": result["error"]}
-        
+        Stops reading (and closes the stream) once every field in stop_after
+        has arrived. Failures are yielded as ("error", message) so collecting
+        the pairs into a dict gives the usual {"error": ...} shape.
+        """
+        parser = PartialJSONObject()
+        pending = set(stop_after or ())
+        # Streams act on fields as they arrive, so they use the starting tier without escalation
+        model = MODELS[self.router.start_tier(call_site, self.model_tier)] if self.router else None
+        stream = self.stream_api_call(messages, max_tokens=max_tokens, call_site=call_site, model=model)
         try:
-            content = result["content"]
-            if content.startswith('```json'):
-                content = content[7:-3]
-            elif content.startswith('```'):
-                content = content[3:-3]
-            
-            return json.loads(content)
-        except Exception as e:
-            return {"error": str(e)}
+            for event in stream:
+                if "error" in event:
+                    yield "error", event["error"]
+                    return
+                if "delta" in event:
+                    for field, value in parser.feed(event["delta"]).items():
+                        yield field, value
+                        pending.discard(field)
+                    if stop_after and not pending:
+                        return
+                elif not parser.complete:
+                    # Not an object we could follow field by field; parse the whole reply
+                    data = self._parse_json_result(event)
+                    for field, value in data.items():
+                        if field not in parser.fields:
+                            yield field, value
+        finally:
+            stream.close()
     
-    def determine_intent(self, text):
-        """Determine user intent - improved analytics detection"""
+    def stream_case_info(self, text):
+        """Streaming extract_case_info: yields (field, value) pairs as they arrive"""
+        if self.rule_parser:
+            parsed = self.rule_parser.parse_case(text)
+            if parsed:
+                yield from parsed.items()
+                return
+        
+        fields = set()
+        for field, value in self.stream_json_fields(
+            self._case_info_messages(text), call_site="extract_case", stop_after=CASE_STREAM_FIELDS
+        ):
+            fields.add(field)
+            yield field, value
+        if "error" not in fields and "notes" not in fields:
+            yield "notes", text.strip()
+    
+    def stream_update_info(self, text):
+        """Streaming extract_update_info: yields (field, value) pairs as they arrive"""
+        if self.rule_parser:
+            parsed = self.rule_parser.parse_update(text)
+            if parsed:
+                yield from parsed.items()
+                return
+        
+        yield from self.stream_json_fields(
+            self._update_info_messages(text), max_tokens=300, call_site="extract_update"
+        )
+    
+    def _intent_shortcut(self, text):
+        """Resolve intent without the model when the wording is unambiguous"""
         # Keywords that strongly indicate analytics queries
         analytics_keywords = [
             'how many', 'count', 'total', 'number of', 'show me', 'list', 'breakdown',
@@ -410,6 +870,12 @@ class QuickSupportBot:
             'cases by', 'cases in', 'cases with', 'distribution', 'overview'
         ]
         
+        # Unambiguous create/update commands
+        if self.rule_parser:
+            intent = self.rule_parser.parse_intent(text)
+            if intent:
+                return intent
+        
         # Check for analytics keywords first
         text_lower = text.lower()
         if any(keyword in text_lower for keyword in analytics_keywords):
@@ -419,36 +885,63 @@ class QuickSupportBot:
         if 'CASE-' in text.upper():
             return "query"
         
-        # Use AI for ambiguous cases
+        return None
+    
+    def _intent_messages(self, text):
         prompt = f"""
         Analyze this text and determine the intent:
         
         Text: "{text}"
         
-        Return exactly one of these words: create, update, query, analytics
+        Return exactly one of these words: create, update, query, analytics, search
         
         - "create" if this is about a new issue or case
         - "update" if this is about updating an existing case
         - "query" if this is asking for information about a specific case (contains CASE-ID)
         - "analytics" if this is asking for statistics, counts, or analysis across multiple cases
+        - "search" if this is looking for cases whose notes or updates mention something
         
         Examples:
         - "How many WIP cases?" = analytics
         - "Show case CASE-0001" = query
         - "Update CASE-0001: resolved" = update
         - "New case for seller" = create
+        - "Find cases mentioning token expiry" = search
         """
         
-        messages = [{"role": "user", "content": prompt}]
-        result = self._make_api_call(messages, max_tokens=50)
+        return [{"role": "user", "content": prompt}]
+    
+    def determine_intent(self, text):
+        """Determine user intent - improved analytics detection"""
+        intent = self._intent_shortcut(text)
+        if intent:
+            return intent
+        
+        # Use AI for ambiguous cases
+        result = self._routed_call(self._intent_messages(text), "intent", self._intent_confidence, max_tokens=50)
         
         if "error" in result:
             return "error"
         
         return result["content"].lower()
     
-    def analyze_cases(self, query):
-        """Perform analytics on cases based on natural language query"""
+    def _analytics_shortcut(self, query):
+        """Analysis params resolved without the model, or None"""
+        # Questions made entirely of known vocabulary need no model call
+        if self.rule_parser:
+            params = self.rule_parser.parse_analytics(query)
+            if params:
+                return params
+        
+        # Paraphrases of an earlier question reuse its resolved params
+        if self.analytics_cache:
+            cached_params, _ = self.analytics_cache.lookup(query)
+            if cached_params:
+                return cached_params
+        
+        return None
+    
+    def _analytics_messages(self, query):
         prompt = f"""
         Convert this natural language query into SQL filter conditions for case analysis:
         
@@ -463,7 +956,7 @@ class QuickSupportBot:
         - seller_type: {', '.join(SELLER_TYPES)}
         - specialist_id: SPEC001, SPEC002, SPEC003
         
-        Return JSON with filters and grouping:
+        Return JSON with filters, grouping and aggregates:
         {{
             "filters": {{
                 "case_status": ["WIP"] or null,
@@ -473,182 +966,333 @@ class QuickSupportBot:
                 "last_sub_status": ["INT_WIP"] or null,
                 "specialist_id": ["SPEC001"] or null
             }},
-            "group_by": "case_status" or "marketplace" or "workstream" or "specialist_id" or null,
+            "group_by": ["marketplace", "case_status"] (up to 3 of: {', '.join(ANALYTICS_GROUP_BY_FIELDS)}) or null,
+            "aggregates": ["avg:csat_score", "median:listing_days"] or null,
             "description": "human readable description of what is being analyzed"
         }}
         
+        Cases are always counted. Aggregates are "fn:field" with fn one of sum, avg, min, max,
+        median, p90 (any p1-p99) and field one of: {', '.join(ANALYSIS_MEASURES)}
+        (listing_days = listing start to completion, completion_days = created to listing completion).
+        
         Return JSON only:
         """
         
-        messages = [
+        return [
             {
                 "role": "system", 
                 "content": "You are an expert at converting natural language to database queries for case analytics."
             },
             {"role": "user", "content": prompt}
         ]
+    
+    def _resolve_analytics_params(self, query):
+        """Ask the model for analysis params (or an {"error": ...} dict)"""
+        result = self._routed_call(
+            self._analytics_messages(query), "analytics",
+            lambda result: self._payload_confidence("analytics", self._parse_json_result(result)), max_tokens=300
+        )
+        if result.get("circuit_open"):
+            return self._degraded_analytics_params(query) or self._parse_json_result(result)
+        return self._parse_json_result(result)
+    
+    def _degraded_analytics_params(self, query):
+        """Best-effort vocabulary match for when the model is unavailable, or None"""
+        if not self.rule_parser:
+            return None
+        normalizer = self.rule_parser.analytics_normalizer
+        entities, group_by, _ = normalizer.normalize(query)
+        if not (entities or group_by):
+            return None
+        return dict(normalizer.to_params(query), degraded=True)
+    
+    def _analyze_params(self, query, analysis_params):
+        """Remember model-resolved analysis params and run the analysis"""
+        if "error" in analysis_params:
+            return f"❌ Error analyzing query: {analysis_params['error']}"
+        
+        # Drop columns and aggregates outside the planner's whitelist
+        degraded = analysis_params.get("degraded")
+        validated = self._validate_combined({"intent": "analytics", "payload": analysis_params})
+        if "error" in validated:
+            return f"❌ Error analyzing query: {validated['error']}"
+        analysis_params = validated["payload"]
+        
+        # Best-effort params from an outage are not worth remembering
+        if self.analytics_cache and not degraded:
+            self.analytics_cache.store(query, analysis_params)
+        
+        # Execute the analysis
+        return self.execute_analysis(analysis_params)
+    
+    def _analytics_params(self, query):
+        """Analysis params from a local shortcut, else from the model"""
+        return self._analytics_shortcut(query) or self._resolve_analytics_params(query)
+    
+    def analyze_cases(self, query):
+        """Perform analytics on cases based on natural language query"""
+        params = self._analytics_shortcut(query)
+        if params:
+            return self.execute_analysis(params)
         
-        result = self._make_api_call(messages, max_tokens=300)
-        if "error" in result:
-            return f"❌ Error analyzing query: {result['error']}"
+        return self._analyze_params(query, self._resolve_analytics_params(query))
+    
+    def _combined_messages(self, text):
+        """Single prompt asking for the intent and its payload together"""
+        prompt = f"""
+        Classify this support message and extract its data in one step.
+        
+        Message: "{text}"
+        
+        Return ONLY a JSON object {{"intent": ..., "payload": ...}} where intent is one of
+        create, update, query, analytics, search and payload depends on it:
+        
+        - create: {{"seller_name", "amazon_case_id", "marketplace", "case_source", "workstream",
+          "issue_type", "complexity", "priority", "seller_type", "api_supported",
+          "listing_start_date", "notes"}}
+        - update: {{"case_id", "note", "sub_status", "listing_completion_date", "csat_score",
+          "feedback_received"}}
+        - query: {{"case_id"}}
+        - analytics: {{"filters": {{field: [values] or null}}, "group_by": [fields] or null,
+          "aggregates": ["fn:field"] or null, "description": "what is being analyzed"}};
+          filter fields: case_status, marketplace, workstream, priority, last_sub_status,
+          specialist_id; group_by up to 3 of {', '.join(ANALYTICS_GROUP_BY_FIELDS)};
+          aggregates fn sum, avg, min, max, median or p1-p99 over {', '.join(ANALYSIS_MEASURES)}
+          (cases are always counted)
+        - search (find cases whose notes or updates mention something): {{"query": "the words to look for"}}
+        
+        Allowed values:
+        - marketplace: {', '.join(MARKETPLACES)}
+        - case_source: {', '.join(CASE_SOURCES)}
+        - case_status: {', '.join(CASE_STATUSES)}
+        - workstream: {', '.join(WORKSTREAMS)}
+        - complexity: {', '.join(COMPLEXITIES)}
+        - priority: {', '.join(PRIORITIES)}
+        - seller_type: {', '.join(SELLER_TYPES)}
+        - sub_status / last_sub_status: {', '.join(SUB_STATUSES)}
+        - api_supported: Product API, Inventory API, Orders API, Payment API, General API
+        - specialist_id: SPEC001, SPEC002, SPEC003
+        Dates are YYYY-MM-DD, case IDs look like CASE-0001, Amazon IDs like AMZ-12345678,
+        csat_score is a number 1-5, feedback_received is Yes/No. Use null for anything not mentioned.
         
-        try:
-            content = result["content"]
-            if content.startswith('```json'):
-                content = content[7:-3]
-            elif content.startswith('```'):
-                content = content[3:-3]
-            
-            analysis_params = json.loads(content)
-            
-            # Execute the analysis
-            return self.execute_analysis(analysis_params)
-                
-        except Exception as e:
-            return f"❌ Error analyzing query: {str(e)}"
+        Return JSON only:
+        """
+        return [
+            {
+                "role": "system",
+                "content": "You are an expert at routing and extracting structured data from API integration support messages."
+            },
+            {"role": "user", "content": prompt}
+        ]
     
-    def execute_analysis(self, params):
-        """Execute case analysis based on parameters"""
-        conn = sqlite3.connect(self.db_path)
+    def _validate_combined(self, data):
+        """Check a combined response against the payload schema.
         
-        # Build SQL query
-        where_conditions = []
-        values = []
+        Returns {"intent", "payload"} with out-of-vocabulary enum values set to
+        None, or {"error": ...} when the structure is unusable. Analytics
+        filter values are matched case-insensitively; a filter left with no
+        valid values is an error rather than no filter.
+        """
+        if "error" in data:
+            return data
+        intent = str(data.get("intent") or "").lower().strip()
+        payload = data.get("payload")
+        if intent not in COMBINED_PAYLOAD_FIELDS or not isinstance(payload, dict):
+            return {"error": f"Invalid combined response: intent={intent!r}"}
+        
+        if intent == "analytics":
+            filters = payload.get("filters") or {}
+            if not isinstance(filters, dict):
+                return {"error": "Invalid combined response: filters must be an object"}
+            clean_filters = {}
+            for field, values in filters.items():
+                if field not in ANALYTICS_FILTER_FIELDS:
+                    return {"error": f"Invalid combined response: unknown filter {field!r}"}
+                if values:
+                    values = values if isinstance(values, list) else [values]
+                    canonical = _ANALYTICS_CANONICAL.get(field)
+                    if canonical is not None:
+                        values = [canonical[str(v).lower()] for v in values if str(v).lower() in canonical]
+                    if not values:
+                        return {"error": f"No valid {field} values in {filters[field]!r}"}
+                    clean_filters[field] = list(dict.fromkeys(values))
+            group_by = payload.get("group_by") or []
+            group_by = [group_by] if isinstance(group_by, str) else group_by
+            if not isinstance(group_by, list):
+                return {"error": "Invalid combined response: group_by must be a field or a list"}
+            group_by = list(dict.fromkeys(key for key in group_by if key in ANALYTICS_GROUP_BY_FIELDS))[:3]
+            aggregates = payload.get("aggregates") or []
+            if not isinstance(aggregates, list):
+                return {"error": "Invalid combined response: aggregates must be a list"}
+            clean_aggregates = []
+            for spec in aggregates:
+                try:
+                    fn, field = parse_aggregate(spec)
+                except PlanError:
+                    continue
+                if field:
+                    clean_aggregates.append(f"{fn}:{field}")
+            return {"intent": intent, "payload": {
+                "filters": clean_filters,
+                "group_by": group_by[0] if len(group_by) == 1 else group_by or None,
+                "aggregates": clean_aggregates,
+                "description": payload.get("description") or "Case analysis",
+            }}
+        
+        clean = {}
+        for field in COMBINED_PAYLOAD_FIELDS[intent]:
+            value = payload.get(field)
+            allowed = COMBINED_ENUMS.get(field)
+            if allowed is not None and value not in allowed:
+                value = None
+            clean[field] = value
+        
+        if intent == "search":
+            query = clean.get("query")
+            if not isinstance(query, str) or not query.strip():
+                return {"error": "Invalid combined response: missing search query"}
+            clean["query"] = query.strip()
+        
+        if intent in ("update", "query"):
+            case_id = str(clean.get("case_id") or "").upper()
+            if not case_id.startswith("CASE-"):
+                return {"error": "Invalid combined response: missing case_id"}
+            clean["case_id"] = case_id
+        return {"intent": intent, "payload": clean}
+    
+    def classify_and_extract(self, text):
+        """Resolve intent and its payload with one model call.
         
-        filters = params.get('filters', {})
-        for field, field_values in filters.items():
-            if field_values:
-                placeholders = ', '.join(['?' for _ in field_values])
-                where_conditions.append(f"{field} IN ({placeholders})")
-                values.extend(field_values)
+        Returns {"intent", "payload"} validated against the payload schema,
+        or {"error": ...} so callers can fall back to the two-step flow.
+        """
+        result = self._routed_call(
+            self._combined_messages(text), "combined",
+            lambda result: 0.0 if "error" in self._validate_combined(self._parse_json_result(result)) else 1.0,
+            max_tokens=500
+        )
+        return self._validate_combined(self._parse_json_result(result))
+    
+    def run_analysis(self, params, top_n=ANALYSIS_TOP_N):
+        """Run a case analysis and return its structured result.
+        
+        params may group by several keys and ask for aggregates beyond the
+        case count (see analysis_planner.plan_analysis). Returns
+        {"description", "group_by": [keys], "columns", "rows", "other",
+        "groups", "total", "text"} or {"error": ...}; each row holds the group
+        values, the case count and then the other aggregates, as named by
+        columns. Grouped results keep the top_n largest groups in rows; the
+        rest are summed into other ({"groups", "count"}, or None when nothing
+        was folded).
+        """
+        try:
+            query, values, group_keys, labels = plan_analysis(params)
+            # Plain cursor rows; group-by results are small next to the table
+            rows = self.db.fetchall(query, values)
+        except Exception as e:
+            return {"error": str(e)}
         
-        where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
-        group_by = params.get('group_by')
-        
-        if group_by:
-            query = f"""
-                SELECT {group_by}, COUNT(*) as count
-                FROM cases 
-                WHERE {where_clause}
-                GROUP BY {group_by}
-                ORDER BY count DESC
-            """
+        result = {
+            "description": params.get('description') or 'Case analysis',
+            "group_by": group_keys,
+            "columns": group_keys + labels,
+            "rows": [],
+            "other": None,
+        }
+        cases = len(group_keys)  # position of the case count in each row
+        if group_keys:
+            shown = rows[:top_n] if top_n else rows
+            result["rows"] = shown
+            result["groups"] = len(rows)
+            result["total"] = sum(row[cases] for row in rows)
+            if len(rows) > len(shown):
+                result["other"] = {
+                    "groups": len(rows) - len(shown),
+                    "count": result["total"] - sum(row[cases] for row in shown),
+                }
         else:
-            query = f"""
-                SELECT COUNT(*) as total_count
-                FROM cases 
-                WHERE {where_clause}
-            """
+            result["rows"] = rows
+            result["groups"] = 0
+            result["total"] = rows[0][0] if rows else 0
         
-        try:
-            df = pd.read_sql_query(query, conn, params=values)
-            conn.close()
-            
-            # Format results
-            description = params.get('description', 'Case analysis')
-            
-            if group_by:
-                result = f"📊 **{description}**\n\n"
-                for _, row in df.iterrows():
-                    result += f"• **{row[group_by]}**: {row['count']} cases\n"
-                result += f"\n**Total**: {df['count'].sum()} cases"
-            else:
-                total = df.iloc[0]['total_count'] if len(df) > 0 else 0
-                result = f"📊 **{description}**\n\n**Total**: {total} cases"
-            
-            return result
-            
-        except Exception as e:
-            conn.close()
-            return f"❌ Error executing analysis: {str(e)}"
+        result["text"] = format_analysis(result)
+        return result
+    
+    def execute_analysis(self, params):
+        """Execute case analysis based on parameters and return it as markdown"""
+        result = self.run_analysis(params)
+        if "error" in result:
+            return f"❌ Error executing analysis: {result['error']}"
+        return result["text"]
     
     def create_case_from_data(self, case_data):
         """Create case in database from provided data"""
-        # Generate case ID
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM cases")
-        count = cursor.fetchone()[0]
-        case_id = f"CASE-{count + 1:04d}"
-        
         # Prepare case data with defaults
         final_case_data = {
-            'case_id': case_id,
-            'amazon_case_id': case_data.get('amazon_case_id', ''),
+            'case_id': None,
+            'amazon_case_id': case_data.get('amazon_case_id') or '',
             'seller_id': random.randint(10000, 99999),
-            'seller_name': case_data.get('seller_name', 'Unknown Seller'),
+            'seller_name': case_data.get('seller_name') or 'Unknown Seller',
             'specialist_id': 'SPEC001',
             'specialist_name': 'Demo Specialist',
-            'marketplace': case_data.get('marketplace', 'EU'),
-            'case_source': case_data.get('case_source', 'ASTRO'),
+            'marketplace': case_data.get('marketplace') or 'EU',
+            'case_source': case_data.get('case_source') or 'ASTRO',
             'case_status': 'SUBMITTED',
-            'workstream': case_data.get('workstream', 'DSR'),
-            'listing_start_date': case_data.get('listing_start_date', ''),
-            'listing_completion_date': case_data.get('listing_completion_date', ''),
-            'issue_type': case_data.get('issue_type', 'General Issue'),
-            'complexity': case_data.get('complexity', 'Medium'),
-            'priority': case_data.get('priority', 'Medium'),
-            'api_supported': case_data.get('api_supported', 'General API'),
+            'workstream': case_data.get('workstream') or 'DSR',
+            'listing_start_date': case_data.get('listing_start_date') or '',
+            'listing_completion_date': case_data.get('listing_completion_date') or '',
+            'issue_type': case_data.get('issue_type') or 'General Issue',
+            'complexity': case_data.get('complexity') or 'Medium',
+            'priority': case_data.get('priority') or 'Medium',
+            'api_supported': case_data.get('api_supported') or 'General API',
             'integration_type': 'REST API',
-            'seller_type': case_data.get('seller_type', 'EXISTING'),
-            'feedback_received': case_data.get('feedback_received', 'No'),
+            'seller_type': case_data.get('seller_type') or 'EXISTING',
+            'feedback_received': case_data.get('feedback_received') or 'No',
             'csat_score': case_data.get('csat_score', None),
-            'notes': case_data.get('notes', ''),
+            'notes': case_data.get('notes') or '',
             'last_sub_status': 'Case_Created',
             'created_at': datetime.now().isoformat(),
             'updated_at': datetime.now().isoformat()
         }
         
         try:
-            columns = ', '.join(final_case_data.keys())
-            placeholders = ', '.join(['?' for _ in final_case_data])
-            cursor.execute(f"INSERT INTO cases ({columns}) VALUES ({placeholders})", list(final_case_data.values()))
-            
-            # Add initial update
-            cursor.execute('''
-                INSERT INTO updates (case_id, note, updated_by, timestamp, sub_status)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
-                case_id,
-                'Case created from interface',
-                'System',
-                datetime.now().isoformat(),
-                'Case_Created'
-            ))
-            
-            conn.commit()
-            conn.close()
+            with self.db.transaction("IMMEDIATE") as conn:
+                cursor = conn.cursor()
+                
+                # Generate case ID
+                case_id = format_case_id(allocate_ids(conn, 'case_id'))
+                final_case_data['case_id'] = case_id
+                
+                columns = ', '.join(final_case_data.keys())
+                placeholders = ', '.join(['?' for _ in final_case_data])
+                cursor.execute(f"INSERT INTO cases ({columns}) VALUES ({placeholders})", list(final_case_data.values()))
+                
+                # Add initial update
+                cursor.execute('''
+                    INSERT INTO updates (case_id, note, updated_by, timestamp, sub_status)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (
+                    case_id,
+                    'Case created from interface',
+                    'System',
+                    datetime.now().isoformat(),
+                    'Case_Created'
+                ))
             
+            self.resources.case_counts = None
+            self._merge_facet_values(final_case_data)
             return case_id, final_case_data
             
         except Exception as e:
-            conn.close()
             raise Exception(f"Database error: {e}")
     
     def update_case_status(self, case_id, note, sub_status, updated_by="System", additional_data=None):
         """Update case with new substatus and additional data"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Check if case exists
-        cursor.execute("SELECT case_id FROM cases WHERE case_id = ?", (case_id,))
-        if not cursor.fetchone():
-            conn.close()
+        if not self.db.fetchone("SELECT case_id FROM cases WHERE case_id = ?", (case_id,)):
             return False, f"Case {case_id} not found"
         
         try:
-            # Add update record
-            cursor.execute('''
-                INSERT INTO updates (case_id, note, updated_by, timestamp, sub_status)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
-                case_id,
-                note,
-                updated_by,
-                datetime.now().isoformat(),
-                sub_status
-            ))
-            
             # Prepare case updates
             case_updates = {
                 'last_sub_status': sub_status,
@@ -656,18 +1300,7 @@ class QuickSupportBot:
             }
             
             # Map sub-status to case status
-            status_mapping = {
-                'Case_Created': 'SUBMITTED',
-                'INT_START': 'WIP',
-                'INT_WIP': 'WIP',
-                'ON_HOLD': 'ON-HOLD',
-                'CANCELLED': 'CANCELLED',
-                'HANDOVER': 'COMPLETED',
-                'SUPPORT': 'WIP',
-                'Note': 'WIP'
-            }
-            
-            case_updates['case_status'] = status_mapping.get(sub_status, 'WIP')
+            case_updates['case_status'] = SUB_STATUS_CASE_STATUS.get(sub_status, 'WIP')
             
             # Add additional data if provided
             if additional_data:
@@ -682,70 +1315,377 @@ class QuickSupportBot:
             set_clause = ', '.join([f"{key} = ?" for key in case_updates.keys()])
             values = list(case_updates.values()) + [case_id]
             
-            cursor.execute(f"UPDATE cases SET {set_clause} WHERE case_id = ?", values)
-            
-            conn.commit()
-            conn.close()
+            with self.db.transaction() as conn:
+                # Add update record
+                conn.execute('''
+                    INSERT INTO updates (case_id, note, updated_by, timestamp, sub_status)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (
+                    case_id,
+                    note,
+                    updated_by,
+                    datetime.now().isoformat(),
+                    sub_status
+                ))
+                
+                conn.execute(f"UPDATE cases SET {set_clause} WHERE case_id = ?", values)
             
+            self.resources.case_counts = None
+            self._merge_facet_values(case_updates)
             return True, f"Case {case_id} updated successfully"
             
         except Exception as e:
-            conn.close()
             return False, f"Error updating case: {e}"
     
+    def bulk_update_cases(self, records, updated_by="System"):
+        """Apply many case updates in one transaction.
+        
+        records are (case_id, note, sub_status, additional_data) tuples or
+        dicts with those keys; additional_data is as for update_case_status.
+        Existence is checked with one query and every updates row and cases
+        change is written with executemany, so either all valid records are
+        applied or (on a database error) none are. Returns one
+        (success, message) pair per record, in order; records for the same
+        case apply in order.
+        """
+        records = [
+            (r.get('case_id'), r.get('note'), r.get('sub_status'), r.get('additional_data'))
+            if isinstance(r, dict) else tuple(r) + (None,) * (4 - len(r))
+            for r in records
+        ]
+        outcomes = [None] * len(records)
+        now = datetime.now().isoformat()
+        
+        try:
+            with self.db.transaction("IMMEDIATE") as conn:
+                case_ids = list({case_id for case_id, _, _, _ in records if case_id})
+                existing = {row[0] for row in conn.execute(
+                    "SELECT case_id FROM cases WHERE case_id IN (SELECT value FROM json_each(?))",
+                    (json.dumps(case_ids),),
+                )}
+                
+                update_rows = []
+                case_rows = []
+                for i, (case_id, note, sub_status, additional_data) in enumerate(records):
+                    if not case_id or not sub_status:
+                        outcomes[i] = (False, "case_id and sub_status are required")
+                        continue
+                    if case_id not in existing:
+                        outcomes[i] = (False, f"Case {case_id} not found")
+                        continue
+                    extra = additional_data or {}
+                    update_rows.append((case_id, note or '', updated_by, now, sub_status))
+                    case_rows.append((
+                        sub_status, now, SUB_STATUS_CASE_STATUS.get(sub_status, 'WIP'),
+                        extra.get('listing_completion_date') or None,
+                        extra.get('csat_score') or None,
+                        extra.get('feedback_received') or None,
+                        case_id,
+                    ))
+                    outcomes[i] = (True, f"Case {case_id} updated successfully")
+                
+                conn.executemany('''
+                    INSERT INTO updates (case_id, note, updated_by, timestamp, sub_status)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', update_rows)
+                # Optional fields keep their current value when not supplied
+                conn.executemany('''
+                    UPDATE cases SET
+                        last_sub_status = ?, updated_at = ?, case_status = ?,
+                        listing_completion_date = COALESCE(?, listing_completion_date),
+                        csat_score = COALESCE(?, csat_score),
+                        feedback_received = COALESCE(?, feedback_received)
+                    WHERE case_id = ?
+                ''', case_rows)
+        except Exception as e:
+            return [(False, f"Error updating case: {e}")] * len(records)
+        
+        if case_rows:
+            self.resources.case_counts = None
+            for sub_status, case_status in {(row[0], row[2]) for row in case_rows}:
+                self._merge_facet_values({'last_sub_status': sub_status, 'case_status': case_status})
+        return outcomes
+    
+    def search_cases(self, query, filters=None, limit=20):
+        """Cases whose notes or update notes match query, best match first.
+        
+        query is free text; every word must appear (stemmed, so "tokens"
+        matches "token"). filters maps LIST_FILTER_COLUMNS to a value or a
+        list of values. Served by the FTS5 indexes, so the cost follows the
+        number of matches rather than the number of notes. Returns a list of
+        {"case_id", "score", "snippet", "seller_name", "case_status",
+        "marketplace"}; higher scores are better matches.
+        """
+        fts_query = " ".join(f'"{word}"' for word in re.findall(r"\w+", query or ""))
+        if not fts_query:
+            return []
+        
+        where_conditions = []
+        params = []
+        for field, values in (filters or {}).items():
+            if field not in LIST_FILTER_COLUMNS:
+                raise ValueError(f"Cannot filter by {field!r}; use one of {', '.join(LIST_FILTER_COLUMNS)}")
+            if values in (None, "", "All"):
+                continue
+            values = values if isinstance(values, list) else [values]
+            where_conditions.append(f"c.{field} IN ({', '.join('?' for _ in values)})" if values else "0")
+            params.extend(values)
+        where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+        # Filters are applied after ranking, so only cap the candidates when there are none
+        candidates = -1 if where_conditions else SEARCH_CANDIDATES
+        
+        rows = self.db.fetchall(f"""
+            WITH hits AS (
+                SELECT c.case_id, h.score, h.snippet FROM (
+                    SELECT rowid, rank AS score, snippet(case_notes_fts, 0, '**', '**', '…', 12) AS snippet
+                    FROM case_notes_fts WHERE case_notes_fts MATCH ? ORDER BY rank LIMIT ?
+                ) h JOIN cases c ON c.id = h.rowid
+                UNION ALL
+                SELECT u.case_id, h.score, h.snippet FROM (
+                    SELECT rowid, rank AS score, snippet(update_notes_fts, 0, '**', '**', '…', 12) AS snippet
+                    FROM update_notes_fts WHERE update_notes_fts MATCH ? ORDER BY rank LIMIT ?
+                ) h JOIN updates u ON u.id = h.rowid
+            )
+            SELECT hits.case_id, MIN(hits.score) AS score, hits.snippet, c.seller_name, c.case_status, c.marketplace
+            FROM hits JOIN cases c ON c.case_id = hits.case_id
+            WHERE {where_clause}
+            GROUP BY hits.case_id
+            ORDER BY score
+            LIMIT ?
+        """, [fts_query, candidates, fts_query, candidates] + params + [limit])
+        
+        # bm25 ranks are negative, lower is better
+        return [
+            {"case_id": case_id, "score": round(-score, 3), "snippet": snippet,
+             "seller_name": seller_name, "case_status": case_status, "marketplace": marketplace}
+            for case_id, score, snippet, seller_name, case_status, marketplace in rows
+        ]
+    
     def query_case(self, case_id):
         """Get case details"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get case info
-        cursor.execute("SELECT * FROM cases WHERE case_id = ?", (case_id,))
-        case = cursor.fetchone()
-        
-        if not case:
-            conn.close()
-            return None, "Case not found"
-        
-        # Get case column names
-        columns = [description[0] for description in cursor.description]
-        case_dict = dict(zip(columns, case))
-        
-        # Get recent updates
-        cursor.execute('''
-            SELECT note, updated_by, timestamp, sub_status 
-            FROM updates 
-            WHERE case_id = ? 
-            ORDER BY timestamp DESC 
-            LIMIT 5
-        ''', (case_id,))
-        updates = cursor.fetchall()
-        conn.close()
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            
+            # Get case info
+            cursor.execute("SELECT * FROM cases WHERE case_id = ?", (case_id,))
+            case = cursor.fetchone()
+            
+            if not case:
+                return None, "Case not found"
+            
+            # Get case column names
+            columns = [description[0] for description in cursor.description]
+            case_dict = dict(zip(columns, case))
+            
+            # Get recent updates
+            cursor.execute('''
+                SELECT note, updated_by, timestamp, sub_status 
+                FROM updates 
+                WHERE case_id = ? 
+                ORDER BY timestamp DESC 
+                LIMIT 5
+            ''', (case_id,))
+            updates = cursor.fetchall()
         
         return case_dict, updates
     
     def show_all_cases(self):
         """Show summary of all cases"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        return self.db.fetchall('''
             SELECT case_id, seller_name, marketplace, case_status, priority, issue_type, last_sub_status
             FROM cases 
             ORDER BY updated_at DESC
         ''')
-        cases = cursor.fetchall()
-        conn.close()
+    
+    def get_case_counts(self):
+        """Total, active and per-status case counts.
         
-        return cases
+        Read from the trigger-maintained case_counts table (one row per
+        status) and cached for CASE_COUNTS_TTL seconds; creating or updating a
+        case through the bot drops the cached value.
+        """
+        cached = self.resources.case_counts
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        by_status = {status: count for status, count in self.db.fetchall("SELECT case_status, count FROM case_counts") if count}
+        counts = {
+            "total": sum(by_status.values()),
+            "active": sum(by_status.get(status, 0) for status in ACTIVE_STATUSES),
+            "by_status": by_status
+        }
+        self.resources.case_counts = (time.monotonic() + CASE_COUNTS_TTL, counts)
+        return counts
+    
+    def list_cases(self, filters=None, sort="-updated_at", cursor=None, limit=50):
+        """One page of cases, newest first by default.
+        
+        filters maps LIST_FILTER_COLUMNS to a value or list of values ("All"
+        and empty values are ignored); sort is a LIST_SORTS column, prefixed
+        with "-" for descending. Pages use keyset pagination on (sort column,
+        case_id): pass the returned next_cursor to get the following page.
+        Returns {"rows": [dict, ...], "next_cursor": token or None}.
+        """
+        column = sort.lstrip("-")
+        query, params = self._list_query(filters, sort, cursor, limit + 1)
+        rows = [dict(zip(LIST_COLUMNS, row)) for row in self.db.fetchall(query, params)]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1][column], rows[-1]["case_id"]])
+        return {"rows": rows, "next_cursor": next_cursor}
     
-    def get_hierarchical_data(self, listing_start_date=None, listing_end_date=None, created_start_date=None, created_end_date=None):
-        """Get hierarchical case data with all required columns"""
-        conn = sqlite3.connect(self.db_path)
+    def _list_query(self, filters=None, sort="-updated_at", cursor=None, limit=51):
+        """SQL and params for one list_cases page of at most limit rows"""
+        column = sort.lstrip("-")
+        if column not in LIST_SORTS:
+            raise ValueError(f"Cannot sort by {sort!r}; use one of {', '.join(LIST_SORTS)}")
+        descending = sort.startswith("-")
+        
+        where, params = [], []
+        for field, values in (filters or {}).items():
+            if field not in LIST_FILTER_COLUMNS:
+                raise ValueError(f"Cannot filter by {field!r}; use one of {', '.join(LIST_FILTER_COLUMNS)}")
+            if not isinstance(values, (list, tuple, set)):
+                values = [values]
+            values = [value for value in values if value not in (None, "", "All")]
+            if values:
+                # case_status has an index in page order; for the other filters "+" stops SQLite
+                # from using their index (then sorting every match) so it walks the sort index
+                # and stops after one page
+                column_ref = field if field == "case_status" else f"+{field}"
+                where.append(f"{column_ref} IN ({', '.join('?' for _ in values)})")
+                params.extend(values)
+        
+        if cursor:
+            key, case_id = decode_cursor(cursor)
+            where.append(f"({column}, case_id) {'<' if descending else '>'} (?, ?)")
+            params.extend([key, case_id])
+        
+        order = "DESC" if descending else "ASC"
+        query = f'''
+            SELECT {', '.join(LIST_COLUMNS)}
+            FROM cases
+            {'WHERE ' + ' AND '.join(where) if where else ''}
+            ORDER BY {column} {order}, case_id {order}
+            LIMIT ?
+        '''
+        return query, params + [limit]
+    
+    def hot_queries(self):
+        """{name: (sql, params)} for the queries the app runs most, built as the bot builds them.
         
-        # Build date filters
+        Used by the query-plan check (database.check_query_plans): each must
+        search an index rather than scan cases, unless it is listed in
+        database.FULL_INDEX_WALKS.
+        """
+        queries = dict(HOT_QUERIES)
+        queries["list_cases_first_page"] = self._list_query()
+        queries["list_cases_next_page"] = self._list_query(cursor=encode_cursor(["2024-06-01T00:00:00", "CASE-0001"]))
+        queries["list_cases_by_status"] = self._list_query({"case_status": ["WIP"]})
+        queries["list_cases_by_marketplace"] = self._list_query({"marketplace": ["EU"]})
+        queries["list_cases_by_created"] = self._list_query(sort="created_at")
+        for name, params in HOT_ANALYSES.items():
+            sql, values, _, _ = plan_analysis(params)
+            queries[f"analysis_{name}"] = (sql, values)
+        queries["hierarchical_data"] = self._hierarchical_query("2024-01-01", "2024-12-31", "2024-01-01", "2024-12-31")
+        queries["hierarchical_data_filtered"] = self._hierarchical_query(
+            created_start_date="2024-01-01", created_end_date="2024-12-31",
+            filters={"marketplace": ["EU"], "workstream": ["DSR"]}, limit=500,
+        )
+        return queries
+    
+    def get_facet_values(self, column):
+        """Distinct values of a list_cases filter column, cached for FACET_TTL seconds"""
+        if column not in LIST_FILTER_COLUMNS:
+            raise ValueError(f"No facet for {column!r}")
+        cached = self.resources.facets.get(column)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        with self.db.connection() as conn:
+            values = distinct_values(conn, "cases", column)
+        self.resources.facets[column] = (time.monotonic() + FACET_TTL, values)
+        return values
+    
+    def _merge_facet_values(self, row):
+        """Add values just written to any cached facets so new options appear immediately"""
+        for column, (expires_at, values) in list(self.resources.facets.items()):
+            value = row.get(column)
+            if value is not None and value not in values:
+                self.resources.facets[column] = (expires_at, sorted(values + [value]))
+    
+    def get_rollup_counts(self, dimension, created_start_date=None, created_end_date=None, listing_start_date=None, listing_end_date=None, filters=None):
+        """{value: count} for one ROLLUP_DIMENSIONS column over cases created in the date range.
+        
+        Served from the trigger-maintained daily_rollup table, so the cost
+        depends on the number of days and values, not cases. The rollup only
+        knows the created date: with a listing date range or filters (as for
+        get_hierarchical_data) the counts come from a GROUP BY over cases
+        instead. Largest first.
+        """
+        if dimension not in ROLLUP_DIMENSIONS:
+            raise ValueError(f"No rollup for {dimension!r}; use one of {', '.join(ROLLUP_DIMENSIONS)}")
+        if (listing_start_date and listing_end_date) or filters:
+            where_clause, params = self._case_conditions(
+                listing_start_date, listing_end_date, created_start_date, created_end_date, filters
+            )
+            return dict(self.db.fetchall(f'''
+                SELECT {dimension}, COUNT(*) AS total
+                FROM cases
+                WHERE {where_clause} AND COALESCE({dimension}, '') != ''
+                GROUP BY {dimension}
+                ORDER BY total DESC, {dimension}
+            ''', params))
+        rows = self.db.fetchall('''
+            SELECT value, SUM(count) AS total
+            FROM daily_rollup
+            WHERE dimension = ? AND day BETWEEN ? AND ? AND value != ''
+            GROUP BY value
+            HAVING total > 0
+            ORDER BY total DESC, value
+        ''', (dimension, created_start_date or '0000-01-01', created_end_date or '9999-12-31'))
+        return dict(rows)
+    
+    def get_specialist_status_counts(self, created_start_date=None, created_end_date=None, listing_start_date=None, listing_end_date=None, filters=None):
+        """DataFrame of specialist_id, case_status, count for cases created in the date range.
+        
+        Like get_rollup_counts, a listing date range or filters switch from
+        the daily_specialist_status rollup to a GROUP BY over cases.
+        """
+        if (listing_start_date and listing_end_date) or filters:
+            where_clause, params = self._case_conditions(
+                listing_start_date, listing_end_date, created_start_date, created_end_date, filters
+            )
+            rows = self.db.fetchall(f'''
+                SELECT specialist_id, case_status, COUNT(*)
+                FROM cases
+                WHERE {where_clause} AND COALESCE(specialist_id, '') != ''
+                GROUP BY specialist_id, case_status
+                ORDER BY specialist_id, case_status
+            ''', params)
+        else:
+            rows = self.db.fetchall('''
+                SELECT specialist_id, case_status, SUM(count) AS total
+                FROM daily_specialist_status
+                WHERE day BETWEEN ? AND ? AND specialist_id != ''
+                GROUP BY specialist_id, case_status
+                HAVING total > 0
+                ORDER BY specialist_id, case_status
+            ''', (created_start_date or '0000-01-01', created_end_date or '9999-12-31'))
+        return pd.DataFrame(rows, columns=['specialist_id', 'case_status', 'count'])
+    
+    def _case_conditions(self, listing_start_date=None, listing_end_date=None, created_start_date=None, created_end_date=None, filters=None):
+        """WHERE clause and params for the dashboard's date ranges and column filters"""
         where_conditions = []
         params = []
         
+        for field, values in (filters or {}).items():
+            if field not in LIST_FILTER_COLUMNS:
+                raise ValueError(f"Cannot filter by {field!r}; use one of {', '.join(LIST_FILTER_COLUMNS)}")
+            where_conditions.append(f"{field} IN ({', '.join('?' for _ in values)})" if values else "0")
+            params.extend(values)
+        
         if listing_start_date and listing_end_date:
             where_conditions.append("(listing_start_date BETWEEN ? AND ? OR listing_start_date = '')")
             params.extend([listing_start_date, listing_end_date])
@@ -754,7 +1694,13 @@ class QuickSupportBot:
             where_conditions.append("DATE(created_at) BETWEEN ? AND ?")
             params.extend([created_start_date, created_end_date])
         
-        where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+        return " AND ".join(where_conditions) if where_conditions else "1=1", params
+    
+    def _hierarchical_query(self, listing_start_date=None, listing_end_date=None, created_start_date=None, created_end_date=None, filters=None, limit=None):
+        """SQL and params behind get_hierarchical_data and export_cases"""
+        where_clause, params = self._case_conditions(
+            listing_start_date, listing_end_date, created_start_date, created_end_date, filters
+        )
         
         query = f"""
         SELECT 
@@ -776,35 +1722,311 @@ class QuickSupportBot:
         WHERE {where_clause}
         ORDER BY workstream, marketplace, issue_type, api_supported, last_sub_status
         """
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        return query, params
+    
+    def get_hierarchical_data(self, listing_start_date=None, listing_end_date=None, created_start_date=None, created_end_date=None, filters=None, limit=None):
+        """Get hierarchical case data with all required columns.
         
-        df = pd.read_sql_query(query, conn, params=params)
-        conn.close()
+        filters maps LIST_FILTER_COLUMNS to lists of allowed values; limit caps
+        the number of rows returned.
+        """
+        query, params = self._hierarchical_query(
+            listing_start_date, listing_end_date, created_start_date, created_end_date, filters, limit
+        )
+        with self.db.connection() as conn:
+            df = pd.read_sql_query(query, conn, params=params)
         
         return df
     
+    def export_cases(self, fileobj, fmt="csv", listing_start_date=None, listing_end_date=None, created_start_date=None, created_end_date=None, filters=None, chunk_size=EXPORT_CHUNK_SIZE):
+        """Stream the get_hierarchical_data rows into a binary file object.
+        
+        fmt is one of EXPORT_FORMATS ("csv", "csv.gz", "parquet"; Parquet
+        needs pyarrow). Rows go from the cursor to the file chunk_size at a
+        time, so memory stays flat however many cases match. Returns
+        {"success": True, "rows", "format"} or {"error": ...}.
+        """
+        try:
+            query, params = self._hierarchical_query(
+                listing_start_date, listing_end_date, created_start_date, created_end_date, filters
+            )
+            with self.db.connection() as conn:
+                types = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(cases)")}
+                rows = export_query(conn, query, params, fileobj, fmt, chunk_size, types)
+        except Exception as e:
+            return {"error": f"Export failed: {e}"}
+        return {"success": True, "rows": rows, "format": fmt}
+    
     def change_model(self, tier):
         """Change the AI model being used"""
         if tier in MODELS:
+            self.model_tier = tier
             self.model = MODELS[tier]
             return f"✅ Switched to {tier} model: {self.model}"
         else:
             return f"❌ Invalid tier. Available: {', '.join(MODELS.keys())}"
 
+    def _timed(self, timings, stage, func, *args):
+        """Call func(*args) and record its duration in seconds under timings[stage]"""
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            timings[stage] = time.perf_counter() - started
+    
     # Enhanced legacy method for backward compatibility
     def process_message(self, user_id, message):
         """Process user input - enhanced with improved analytics"""
-        intent = self.determine_intent(message)
+        return self.handle_message(user_id, message)["response"]
+    
+    def handle_message(self, user_id, message, speculative=None):
+        """Process user input and return a structured result.
+        
+        Returns a dict with the resolved "intent", the "extracted" fields
+        (None when no extraction ran), the rendered "response" text and
+        per-stage "timings" in seconds, so callers can reuse the intent and
+        extraction instead of asking the model again. With speculative mode
+        (argument or self.speculative) a "speculation" report is included.
+        """
+        with self._request_scope():
+            return self._handle_message(user_id, message, speculative)
+    
+    def _request_scope(self):
+        """Model-call budget shared by everything one message triggers"""
+        return self.router.request() if self.router else nullcontext()
+    
+    def _handle_message(self, user_id, message, speculative):
+        started = time.perf_counter()
+        timings = {}
+        prefetched = {}
+        speculation = None
+        
+        intent = self._timed(timings, "intent", self._intent_shortcut, message)
+        if not intent:
+            intent, prefetched, speculation = self._model_intent(message, timings, speculative)
+        extracted, response = self._respond_intent(intent, message, prefetched, timings)
+        
+        timings["total"] = time.perf_counter() - started
+        result = {
+            "intent": intent,
+            "extracted": extracted,
+            "response": response,
+            "timings": timings
+        }
+        if speculation:
+            result["speculation"] = speculation
+        return result
+    
+    def _model_intent(self, message, timings, speculative):
+        """Resolve intent with the model once the shortcut has failed.
         
+        Returns (intent, {intent: payload fetched along the way}, speculation
+        report or None), using combined mode or speculation when enabled.
+        """
+        if self.combined:
+            combined = self._timed(timings, "intent", self.classify_and_extract, message)
+            if "error" not in combined:
+                return combined["intent"], {combined["intent"]: combined["payload"]}, None
+        if self.speculative if speculative is None else speculative:
+            return self._speculate(message, timings)
+        return self._timed(timings, "intent", self.determine_intent, message), {}, None
+    
+    def _intent_action(self, intent, message):
+        """How to answer intent: (payload key, extractor, responder, responder args).
+        
+        The one intent -> handler mapping, shared by the sync, streaming and
+        async paths. The payload is prefetched[key] when present, else the
+        model-backed extractor method (if any) called with message; it is
+        appended to args and responder(*args) renders the reply. Every
+        extractor has an *_async twin on AsyncQuickSupportBot. responder is
+        None for an unknown intent.
+        """
         if "create" in intent:
-            # Extract information for case creation
-            extracted_data = self.extract_case_info(message)
-            
-            if "error" not in extracted_data:
-                # For legacy compatibility, create case directly
+            return "create", "extract_case_info", "_respond_create", ()
+        if "update" in intent:
+            return "update", "extract_update_info", "_respond_update", ()
+        if "analytics" in intent:
+            return "analytics", "_analytics_params", "_analyze_params", (message,)
+        if "search" in intent:
+            return "search", None, "_respond_search", (message,)
+        if "query" in intent:
+            return None, None, "_respond_query", (message,)
+        return None, None, None, ()
+    
+    def _respond_intent(self, intent, message, prefetched, timings):
+        """Run the action for intent; returns (extracted fields or None, response text)"""
+        key, extractor, responder, args = self._intent_action(intent, message)
+        if responder is None:
+            return None, UNKNOWN_INTENT_RESPONSE
+        
+        payload = prefetched.get(key)
+        if key and key not in prefetched and extractor:
+            payload = self._timed(timings, "extract", getattr(self, extractor), message)
+        if key:
+            args += (payload,)
+        response = self._timed(timings, "execute", getattr(self, responder), *args)
+        return self._reported_extraction(key, payload), response
+    
+    def _reported_extraction(self, key, payload):
+        """The "extracted" result field: case fields only, which the chat tab offers for review"""
+        return payload if key in ("create", "update") else None
+    
+    def handle_message_stream(self, user_id, message, speculative=None):
+        """Streaming counterpart of handle_message.
+        
+        Yields {"progress": markdown} events while the intent and extracted
+        fields arrive, then the same result dict handle_message returns. Intent
+        resolution (combined mode, speculation) and the request budget are the
+        same as handle_message; create/update fields are streamed unless they
+        were already fetched. For updates the case is looked up as soon as its
+        ID arrives and the model stream is dropped if it does not exist.
+        """
+        # The request budget lives in a private context so it holds across
+        # yields without leaking into (or being reset from) the caller's context
+        context = contextvars.copy_context()
+        events = context.run(self._scoped_message_stream, user_id, message, speculative)
+        try:
+            while True:
                 try:
-                    case_id, created_case = self.create_case_from_data(extracted_data)
-                    
-                    return f"""✅ **Case Created!**
+                    event = context.run(next, events)
+                except StopIteration:
+                    return
+                yield event
+        finally:
+            context.run(events.close)
+    
+    def _scoped_message_stream(self, user_id, message, speculative):
+        with self._request_scope():
+            yield from self._handle_message_stream(user_id, message, speculative)
+    
+    def _handle_message_stream(self, user_id, message, speculative):
+        started = time.perf_counter()
+        timings = {}
+        prefetched = {}
+        speculation = None
+        
+        def progress(lines):
+            if "first_progress" not in timings:
+                timings["first_progress"] = time.perf_counter() - started
+            return {"progress": "\n".join(lines)}
+        
+        intent = self._timed(timings, "intent", self._intent_shortcut, message)
+        if not intent:
+            yield progress(["🧭 Working out what you need..."])
+            intent, prefetched, speculation = self._model_intent(message, timings, speculative)
+        
+        lines = [f"🧭 **Intent:** {intent}"]
+        yield progress(lines)
+        
+        kind = "create" if "create" in intent else "update" if "update" in intent else None
+        if kind and kind not in prefetched:
+            extracting = kind == "create"
+            fields = self.stream_case_info(message) if extracting else self.stream_update_info(message)
+            extracted = {}
+            extract_started = time.perf_counter()
+            response = None
+            try:
+                for field, value in fields:
+                    extracted[field] = value
+                    if field == "error":
+                        break
+                    if value not in (None, ""):
+                        lines.append(f"• {field.replace('_', ' ')}: {value}")
+                        yield progress(lines)
+                    # Start DB work early: an unknown case ID needs no further extraction
+                    if field == "case_id" and not extracting:
+                        case_dict, _ = self.query_case(str(value or "").upper())
+                        if not case_dict:
+                            response = f"❌ Case {value} not found"
+                            break
+            finally:
+                fields.close()
+                timings["extract"] = time.perf_counter() - extract_started
+            
+            if response is None:
+                respond = self._respond_create if extracting else self._respond_update
+                response = self._timed(timings, "execute", respond, extracted)
+        else:
+            extracted, response = self._respond_intent(intent, message, prefetched, timings)
+        
+        timings["total"] = time.perf_counter() - started
+        result = {
+            "intent": intent,
+            "extracted": extracted,
+            "response": response,
+            "timings": timings
+        }
+        if speculation:
+            result["speculation"] = speculation
+        yield result
+    
+    def _speculation_calls(self, message):
+        """Model calls worth starting before the intent is known: {intent: (func, args)}"""
+        calls = {"create": (self.extract_case_info, (message,))}
+        # Analytics params only need the model when no local shortcut resolves them
+        if not self._analytics_shortcut(message):
+            calls["analytics"] = (self._resolve_analytics_params, (message,))
+        return calls
+    
+    def _speculate(self, message, timings):
+        """Classify intent while the likely extractions run in parallel.
+        
+        Returns (intent, {intent: prefetched result}, report). The report
+        lists the calls launched, used and cancelled and the seconds saved
+        against running intent and extraction one after the other.
+        """
+        started = time.perf_counter()
+        stage_timings = {}
+        # Each worker runs in a copy of this context so routed calls share the request budget
+        intent_future = SPECULATION_POOL.submit(
+            contextvars.copy_context().run, self._timed, stage_timings, "intent", self.determine_intent, message
+        )
+        cancels = {}
+        futures = {}
+        for name, (func, args) in self._speculation_calls(message).items():
+            cancels[name] = threading.Event()
+            context = contextvars.copy_context()
+            context.run(_speculation_cancel.set, cancels[name])
+            futures[name] = SPECULATION_POOL.submit(context.run, self._timed, stage_timings, name, func, *args)
+        
+        intent = intent_future.result()
+        timings["intent"] = stage_timings["intent"]
+        
+        # Stop the losers: queued ones never start, running ones make no further model
+        # calls and close the response they are streaming; then wait for the match
+        cancelled = []
+        for name, future in futures.items():
+            if name not in intent:
+                cancels[name].set()
+                if future.cancel() or not future.done():
+                    cancelled.append(name)
+        prefetched = {name: future.result() for name, future in futures.items() if name in intent}
+        
+        elapsed = time.perf_counter() - started
+        serial = timings["intent"] + sum(stage_timings.get(name, 0.0) for name in prefetched)
+        timings["speculative"] = elapsed
+        return intent, prefetched, {
+            "launched": list(futures),
+            "used": list(prefetched),
+            "cancelled": cancelled,
+            "saved": max(serial - elapsed, 0.0),
+        }
+    
+    def _respond_create(self, extracted_data):
+        """Create a case from extracted fields and render the reply"""
+        if extracted_data.get("circuit_open"):
+            return f"❌ {extracted_data['error']}"
+        if "error" in extracted_data:
+            return f"❌ Error extracting information: {extracted_data['error']}"
+        
+        # For legacy compatibility, create case directly
+        try:
+            case_id, created_case = self.create_case_from_data(extracted_data)
+            
+            return f"""✅ **Case Created!**
                     
 **Case ID:** {case_id}
 **Seller:** {created_case['seller_name']}
@@ -814,64 +2036,78 @@ class QuickSupportBot:
 **API:** {created_case['api_supported']}
 
 You can update this case by referencing: {case_id}"""
-                except Exception as e:
-                    return f"❌ Error creating case: {e}"
-            else:
-                return f"❌ Error extracting information: {extracted_data['error']}"
-        
-        elif "update" in intent:
-            # Extract update information
-            update_data = self.extract_update_info(message)
-            
-            if "error" not in update_data and update_data.get('case_id'):
-                additional_data = {}
-                if update_data.get('listing_completion_date'):
-                    additional_data['listing_completion_date'] = update_data['listing_completion_date']
-                if update_data.get('csat_score'):
-                    additional_data['csat_score'] = update_data['csat_score']
-                if update_data.get('feedback_received'):
-                    additional_data['feedback_received'] = update_data['feedback_received']
-                
-                success, message = self.update_case_status(
-                    update_data['case_id'],
-                    update_data.get('note', 'Update from chat'),
-                    update_data.get('sub_status', 'Note'),
-                    'Chat User',
-                    additional_data if additional_data else None
-                )
-                
-                if success:
-                    return f"✅ **{message}**\n\n**Note:** {update_data.get('note', 'Update recorded')}\n**Sub-status:** {update_data.get('sub_status', 'Note')}"
-                else:
-                    return f"❌ {message}"
-            else:
-                return "❌ Please specify a valid case ID and update details."
-        
-        elif "analytics" in intent:
-            # Handle analytics queries
-            return self.analyze_cases(message)
-        
-        elif "query" in intent:
-            # Extract case ID from message
-            words = message.upper().split()
-            case_id = None
-            for word in words:
-                if word.startswith('CASE-'):
-                    case_id = word
-                    break
-            
-            if case_id:
-                case_dict, updates = self.query_case(case_id)
-                
-                if case_dict:
-                    updates_text = ""
-                    if updates:
-                        updates_text = "\n\n**Recent Updates:**"
-                        for note, updated_by, timestamp, sub_status in updates:
-                            date = timestamp.split('T')[0]
-                            updates_text += f"\n• {date}: {note} ({sub_status})"
-                    
-                    return f"""📋 **Case {case_id}**
+        except Exception as e:
+            return f"❌ Error creating case: {e}"
+    
+    def _respond_update(self, update_data):
+        """Apply extracted update fields and render the reply"""
+        if update_data.get("circuit_open"):
+            return f"❌ {update_data['error']}"
+        if "error" in update_data or not update_data.get('case_id'):
+            return "❌ Please specify a valid case ID and update details."
+        
+        additional_data = {}
+        if update_data.get('listing_completion_date'):
+            additional_data['listing_completion_date'] = update_data['listing_completion_date']
+        if update_data.get('csat_score'):
+            additional_data['csat_score'] = update_data['csat_score']
+        if update_data.get('feedback_received'):
+            additional_data['feedback_received'] = update_data['feedback_received']
+        
+        success, message = self.update_case_status(
+            update_data['case_id'],
+            update_data.get('note', 'Update from chat'),
+            update_data.get('sub_status', 'Note'),
+            'Chat User',
+            additional_data if additional_data else None
+        )
+        
+        if success:
+            return f"✅ **{message}**\n\n**Note:** {update_data.get('note', 'Update recorded')}\n**Sub-status:** {update_data.get('sub_status', 'Note')}"
+        else:
+            return f"❌ {message}"
+    
+    def _respond_search(self, message, payload=None):
+        """Run a notes search for message (or its extracted query) and render the hits"""
+        phrase = (payload or {}).get("query") or search_phrase(message)
+        query = search_terms(phrase) if phrase else search_terms(message, command=True)
+        if not query:
+            return "🔍 What should I look for? Try 'Find cases mentioning token expiry'"
+        results = self.search_cases(query, limit=SEARCH_LIMIT)
+        if not results:
+            return f"🔍 No cases mention **{query}**"
+        
+        lines = [f"🔍 **Cases mentioning {query}**", ""]
+        for hit in results:
+            lines.append(f"• **{hit['case_id']}** ({hit['seller_name']}, {hit['case_status']}): {hit['snippet']}")
+        return "\n".join(lines)
+    
+    def _respond_query(self, message):
+        """Look up the case ID mentioned in message and render its details"""
+        # Extract case ID from message
+        words = message.upper().split()
+        case_id = None
+        for word in words:
+            if word.startswith('CASE-'):
+                case_id = word
+                break
+        
+        if not case_id:
+            return "❌ Please specify a case ID (e.g., 'show case CASE-0001')"
+        
+        case_dict, updates = self.query_case(case_id)
+        
+        if not case_dict:
+            return f"❌ Case {case_id} not found"
+        
+        updates_text = ""
+        if updates:
+            updates_text = "\n\n**Recent Updates:**"
+            for note, updated_by, timestamp, sub_status in updates:
+                date = timestamp.split('T')[0]
+                updates_text += f"\n• {date}: {note} ({sub_status})"
+        
+        return f"""📋 **Case {case_id}**
 
 **Seller:** {case_dict['seller_name']} (ID: {case_dict['seller_id']})
 **Amazon Case ID:** {case_dict.get('amazon_case_id', 'Not provided')}
@@ -888,14 +2124,3 @@ You can update this case by referencing: {case_id}"""
 **CSAT:** {case_dict.get('csat_score', 'Not rated')}
 
 **Notes:** {case_dict.get('notes', 'None')}{updates_text}"""
-                else:
-                    return f"❌ Case {case_id} not found"
-            else:
-                return "❌ Please specify a case ID (e.g., 'show case CASE-0001')"
-        
-        else:
-            return """❓ I'm not sure what you want to do. Try:
-- 'New case for [seller] on [marketplace]'
-- 'Update CASE-0001: [description]'  
-- 'Show case CASE-0001'
-- 'How many WIP cases in EU marketplace?'"""
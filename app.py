@@ -3,9 +3,11 @@ import sqlite3
 from datetime import datetime, date
 import pandas as pd
 import os
+import tempfile
 
 # Import your enhanced bot
-from api_support_bot import QuickSupportBot, MARKETPLACES, CASE_SOURCES, WORKSTREAMS, COMPLEXITIES, PRIORITIES, SELLER_TYPES, SUB_STATUSES
+from api_support_bot import QuickSupportBot, BotResources, MARKETPLACES, CASE_SOURCES, WORKSTREAMS, COMPLEXITIES, PRIORITIES, SELLER_TYPES, SUB_STATUSES
+from case_export import EXPORT_FORMATS, available_formats
 
 # Page config
 st.set_page_config(
@@ -21,10 +23,24 @@ except:
     st.error("❌ OPENROUTER_API_KEY not found in secrets.")
     st.stop()
 
+@st.cache_resource
+def get_bot_resources(api_key):
+    """DB pool, HTTP client, caches and router shared by every session in this process"""
+    return BotResources(api_key)
+
+# Rows shown in the dashboard's case table (the charts cover every case)
+DASHBOARD_TABLE_LIMIT = 500
+
+def discard_export():
+    """Delete this session's prepared export file, if any"""
+    export = st.session_state.pop('export', None)
+    if export and os.path.exists(export[0]):
+        os.remove(export[0])
+
 # Initialize session state
 if 'bot' not in st.session_state:
     try:
-        st.session_state.bot = QuickSupportBot("balanced", api_key)
+        st.session_state.bot = QuickSupportBot("balanced", speculative=True, resources=get_bot_resources(api_key))
         st.session_state.messages = []
         st.session_state.case_creation_mode = False
         st.session_state.extracted_data = {}
@@ -48,16 +64,25 @@ if st.sidebar.button("Switch Model"):
 
 # Quick stats
 try:
-    cases = st.session_state.bot.show_all_cases()
-    total_cases = len(cases)
-    active_cases = len([c for c in cases if c[3] in ['SUBMITTED', 'WIP', 'AWAITING INFORMATION']])
+    counts = st.session_state.bot.get_case_counts()
     
-    st.sidebar.metric("Total Cases", total_cases)
-    st.sidebar.metric("Active Cases", active_cases)
+    st.sidebar.metric("Total Cases", counts["total"])
+    st.sidebar.metric("Active Cases", counts["active"])
     
 except Exception as e:
     st.sidebar.error(f"Error loading stats: {e}")
 
+# Model routing metrics
+if st.session_state.bot.router:
+    routing = st.session_state.bot.router.stats()
+    with st.sidebar.expander("🧭 Model Routing"):
+        st.markdown("**Calls by tier**")
+        st.bar_chart(pd.Series(routing["calls_by_tier"]))
+        saved = routing["saved_latency"]
+        st.metric("Latency Saved", f"{saved:.1f}s" if saved is not None else "n/a")
+        st.metric("Escalations", routing["escalations"])
+        st.caption(f"Budget-limited: {routing['budget_limited']} | Spend: ${routing['cost_usd']:.4f}")
+
 # Main interface
 st.title("🤖 API Support Bot Enhanced")
 st.markdown("Advanced case management with analytics and interactive workflows")
@@ -183,28 +208,33 @@ Examples:
         
         # Process message
         with st.chat_message("assistant"):
-            with st.spinner("Processing..."):
-                try:
-                    # Process through the bot
-                    response = st.session_state.bot.process_message("streamlit_user", prompt)
-                    
-                    # Check if this was a case creation attempt
-                    intent = st.session_state.bot.determine_intent(prompt)
-                    if "create" in intent and st.session_state.awaiting_case_info:
-                        st.session_state.awaiting_case_info = False
-                        # Extract and store data for Create Case tab
-                        extracted_data = st.session_state.bot.extract_case_info(prompt)
-                        if "error" not in extracted_data:
-                            st.session_state.extracted_data = extracted_data
-                            response += "\n\n🎯 **Information extracted!** Please review and complete in the 'Create Case' tab."
-                    
-                    st.markdown(response)
-                    st.session_state.messages.append({"role": "assistant", "content": response})
-                    
-                except Exception as e:
-                    error_msg = f"❌ Error: {str(e)}"
-                    st.error(error_msg)
-                    st.session_state.messages.append({"role": "assistant", "content": error_msg})
+            placeholder = st.empty()
+            placeholder.markdown("⏳ Processing...")
+            try:
+                # Stream through the bot, rendering fields as they are extracted
+                for event in st.session_state.bot.handle_message_stream("streamlit_user", prompt):
+                    if "progress" in event:
+                        placeholder.markdown(event["progress"] + " ▌")
+                    else:
+                        result = event
+                response = result["response"]
+                
+                # Check if this was a case creation attempt
+                if "create" in result["intent"] and st.session_state.awaiting_case_info:
+                    st.session_state.awaiting_case_info = False
+                    # Store the already-extracted data for Create Case tab
+                    extracted_data = result["extracted"]
+                    if extracted_data and "error" not in extracted_data:
+                        st.session_state.extracted_data = extracted_data
+                        response += "\n\n🎯 **Information extracted!** Please review and complete in the 'Create Case' tab."
+                
+                placeholder.markdown(response)
+                st.session_state.messages.append({"role": "assistant", "content": response})
+                
+            except Exception as e:
+                error_msg = f"❌ Error: {str(e)}"
+                placeholder.error(error_msg)
+                st.session_state.messages.append({"role": "assistant", "content": error_msg})
 
 with tab2:
     st.subheader("➕ Create New Case")
@@ -317,69 +347,71 @@ with tab3:
     st.markdown("### 📅 Date Filters")
     col1, col2, col3, col4 = st.columns(4)
     
+    # Listing dates are optional; leaving either empty keeps every listing date
     with col1:
-        listing_start = st.date_input("Listing Start Date From", value=date(2024, 1, 1))
+        listing_start = st.date_input("Listing Start Date From", value=None)
     with col2:
-        listing_end = st.date_input("Listing Start Date To", value=date.today())
+        listing_end = st.date_input("Listing Start Date To", value=None)
     with col3:
         created_start = st.date_input("Created Date From", value=date(2024, 1, 1))
     with col4:
         created_end = st.date_input("Created Date To", value=date.today())
     
-    # Get hierarchical data
     try:
-        df = st.session_state.bot.get_hierarchical_data(
-            listing_start.strftime('%Y-%m-%d'),
-            listing_end.strftime('%Y-%m-%d'),
-            created_start.strftime('%Y-%m-%d'),
-            created_end.strftime('%Y-%m-%d')
+        bot = st.session_state.bot
+        created_range = (created_start.strftime('%Y-%m-%d'), created_end.strftime('%Y-%m-%d'))
+        listing_range = (
+            listing_start.strftime('%Y-%m-%d') if listing_start else None,
+            listing_end.strftime('%Y-%m-%d') if listing_end else None,
         )
         
-        if not df.empty:
+        # Case filters; options come from cached distinct-value queries
+        col1, col2, col3, col4 = st.columns(4)
+        
+        table_filters = {}
+        for column, label, container in (
+            ('workstream', "Filter Workstreams", col1),
+            ('marketplace', "Filter Marketplaces", col2),
+            ('case_status', "Filter Case Status", col3),
+            ('specialist_id', "Filter Specialists", col4),
+        ):
+            options = bot.get_facet_values(column)
+            with container:
+                selected = st.multiselect(label, options=options, default=options)
+            # Only narrow the query when something was deselected
+            if len(selected) < len(options):
+                table_filters[column] = selected
+        
+        # Metrics, table and charts all cover the same cases. Counts come from the
+        # per-day rollup tables while only the created date is set, and from a
+        # GROUP BY over cases once a listing range or filter narrows them
+        case_slice = dict(listing_start_date=listing_range[0], listing_end_date=listing_range[1], filters=table_filters)
+        status_counts = bot.get_rollup_counts('case_status', *created_range, **case_slice)
+        
+        if status_counts:
             # Summary metrics
             st.markdown("### 📈 Summary Metrics")
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                st.metric("Total Cases", len(df))
+                st.metric("Total Cases", sum(status_counts.values()))
             with col2:
-                st.metric("Workstreams", df['workstream'].nunique())
+                st.metric("Workstreams", len(bot.get_rollup_counts('workstream', *created_range, **case_slice)))
             with col3:
-                st.metric("Marketplaces", df['marketplace'].nunique())
+                st.metric("Marketplaces", len(bot.get_rollup_counts('marketplace', *created_range, **case_slice)))
             with col4:
-                st.metric("Specialists", df['specialist_id'].nunique())
+                st.metric("Specialists", len(bot.get_rollup_counts('specialist_id', *created_range, **case_slice)))
             
             # Hierarchical Data Table
             st.markdown("### 🗂️ Hierarchical Case Data")
             st.markdown("**Workstream → Marketplace → Issue Type → API → Status → Latest Sub Status**")
             
-            # Filters for the hierarchical table
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                workstream_filter = st.multiselect("Filter Workstreams", 
-                                                 options=df['workstream'].unique(),
-                                                 default=df['workstream'].unique())
-            with col2:
-                marketplace_filter = st.multiselect("Filter Marketplaces", 
-                                                   options=df['marketplace'].unique(),
-                                                   default=df['marketplace'].unique())
-            with col3:
-                status_filter = st.multiselect("Filter Case Status", 
-                                             options=df['case_status'].unique(),
-                                             default=df['case_status'].unique())
-            with col4:
-                specialist_filter = st.multiselect("Filter Specialists", 
-                                                  options=df['specialist_id'].unique(),
-                                                  default=df['specialist_id'].unique())
-            
-            # Apply filters
-            filtered_df = df[
-                (df['workstream'].isin(workstream_filter)) &
-                (df['marketplace'].isin(marketplace_filter)) &
-                (df['case_status'].isin(status_filter)) &
-                (df['specialist_id'].isin(specialist_filter))
-            ]
+            filtered_df = bot.get_hierarchical_data(
+                *listing_range,
+                *created_range,
+                filters=table_filters,
+                limit=DASHBOARD_TABLE_LIMIT
+            )
             
             # Display hierarchical table
             if not filtered_df.empty:
@@ -392,6 +424,9 @@ with tab3:
                 
                 display_df['created_at'] = pd.to_datetime(display_df['created_at']).dt.strftime('%Y-%m-%d %H:%M')
                 
+                if len(display_df) == DASHBOARD_TABLE_LIMIT:
+                    st.caption(f"Showing the first {DASHBOARD_TABLE_LIMIT} matching cases.")
+                
                 st.dataframe(
                     display_df,
                     use_container_width=True,
@@ -410,52 +445,77 @@ with tab3:
                     }
                 )
                 
-                # Export functionality
-                csv = display_df.to_csv(index=False)
-                st.download_button(
-                    label="📄 Download as CSV",
-                    data=csv,
-                    file_name=f"case_data_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-                    mime="text/csv"
-                )
+                # Export functionality: every matching case (not just the preview),
+                # streamed from SQLite to a temp file in chunks
+                exp1, exp2, exp3 = st.columns([1, 1, 2])
+                with exp1:
+                    export_format = st.selectbox(
+                        "Export format", available_formats(),
+                        format_func=lambda fmt: {"csv": "CSV", "csv.gz": "CSV (gzip)", "parquet": "Parquet"}[fmt]
+                    )
+                with exp2:
+                    if st.button("📦 Prepare export"):
+                        discard_export()
+                        mime, extension = EXPORT_FORMATS[export_format]
+                        # A fresh file per export; removed once downloaded or replaced
+                        fd, export_path = tempfile.mkstemp(prefix="case_export_", suffix=extension)
+                        with os.fdopen(fd, "wb") as export_file:
+                            result = bot.export_cases(
+                                export_file, export_format,
+                                *listing_range, *created_range, filters=table_filters
+                            )
+                        if "error" in result:
+                            os.remove(export_path)
+                            st.error(result["error"])
+                        else:
+                            st.session_state.export = (export_path, export_format, result["rows"])
+                with exp3:
+                    if st.session_state.get('export'):
+                        export_path, ready_format, export_rows = st.session_state.export
+                        mime, extension = EXPORT_FORMATS[ready_format]
+                        # download_button reads the file now, so it can go once clicked
+                        with open(export_path, "rb") as export_file:
+                            st.download_button(
+                                label=f"📄 Download {export_rows} cases",
+                                data=export_file,
+                                file_name=f"case_data_{datetime.now().strftime('%Y%m%d_%H%M')}{extension}",
+                                mime=mime,
+                                on_click=discard_export
+                            )
             else:
                 st.info("No cases match the selected filters.")
             
             # Charts Section
             st.markdown("### 📊 Analytics Charts")
+            st.caption("Charts count every case matching the dates and filters above, not just the table preview.")
             
             # First row of charts
             col1, col2 = st.columns(2)
             
             with col1:
                 st.subheader("Cases by Workstream")
-                ws_counts = filtered_df['workstream'].value_counts()
-                st.bar_chart(ws_counts)
+                st.bar_chart(pd.Series(bot.get_rollup_counts('workstream', *created_range, **case_slice)))
             
             with col2:
                 st.subheader("Cases by Marketplace")
-                mp_counts = filtered_df['marketplace'].value_counts()
-                st.bar_chart(mp_counts)
+                st.bar_chart(pd.Series(bot.get_rollup_counts('marketplace', *created_range, **case_slice)))
             
             # Second row of charts
             col1, col2 = st.columns(2)
             
             with col1:
                 st.subheader("Cases by Sub-Status")
-                ss_counts = filtered_df['last_sub_status'].value_counts()
-                st.bar_chart(ss_counts)
+                st.bar_chart(pd.Series(bot.get_rollup_counts('last_sub_status', *created_range, **case_slice)))
             
             with col2:
                 st.subheader("Cases by API")
-                api_counts = filtered_df['api_supported'].value_counts()
-                st.bar_chart(api_counts)
+                st.bar_chart(pd.Series(bot.get_rollup_counts('api_supported', *created_range, **case_slice)))
             
             # Simplified Specialist Performance Chart
             st.markdown("### 👥 Specialist Performance")
             
             try:
-                # Create specialist data from the main dataframe
-                specialist_data = filtered_df.groupby(['specialist_id', 'case_status']).size().reset_index(name='count')
+                specialist_data = bot.get_specialist_status_counts(*created_range, **case_slice)
                 
                 if not specialist_data.empty:
                     # Create simple pivot table
@@ -469,25 +529,23 @@ with tab3:
                     
                     with col1:
                         st.subheader("Total Cases per Specialist")
-                        specialist_totals = filtered_df['specialist_id'].value_counts()
-                        st.bar_chart(specialist_totals)
+                        st.bar_chart(pd.Series(bot.get_rollup_counts('specialist_id', *created_range, **case_slice)))
                     
                     with col2:
                         st.subheader("Case Status Distribution")
-                        status_totals = filtered_df['case_status'].value_counts()
-                        st.bar_chart(status_totals)
+                        st.bar_chart(pd.Series(status_counts))
                     
                     # Detailed breakdown table
                     with st.expander("📋 Detailed Specialist Breakdown"):
                         st.dataframe(specialist_data, use_container_width=True)
                 else:
-                    st.info("No specialist data available for the current filters.")
+                    st.info("No specialist data available for the selected dates and filters.")
                     
             except Exception as e:
                 st.error(f"Error loading specialist data: {e}")
             
         else:
-            st.info("No cases found for the selected date range.")
+            st.info("No cases found for the selected dates and filters.")
             
     except Exception as e:
         st.error(f"Error loading dashboard: {e}")
@@ -496,124 +554,139 @@ with tab4:
     st.subheader("📋 Case Management")
     
     try:
-        cases = st.session_state.bot.show_all_cases()
+        bot = st.session_state.bot
         
-        if cases:
-            # Convert to DataFrame for filtering
-            df = pd.DataFrame(cases, columns=['case_id', 'seller_name', 'marketplace', 'case_status', 'priority', 'issue_type', 'last_sub_status'])
+        # Filters; options come from cached distinct-value queries, not a full table load
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            status_filter = st.selectbox("Filter by Status", ["All"] + bot.get_facet_values('case_status'))
+        with col2:
+            marketplace_filter = st.selectbox("Filter by Marketplace", ["All"] + bot.get_facet_values('marketplace'))
+        with col3:
+            priority_filter = st.selectbox("Filter by Priority", ["All"] + bot.get_facet_values('priority'))
+        with col4:
+            substatus_filter = st.selectbox("Filter by Sub-Status", ["All"] + bot.get_facet_values('last_sub_status'))
+        
+        filters = {
+            'case_status': status_filter,
+            'marketplace': marketplace_filter,
+            'priority': priority_filter,
+            'last_sub_status': substatus_filter
+        }
+        
+        # Back to the first page whenever the filters change
+        filter_key = tuple(filters.values())
+        if st.session_state.get('case_filter_key') != filter_key:
+            st.session_state.case_filter_key = filter_key
+            st.session_state.case_cursors = [None]
+        
+        page = bot.list_cases(filters, cursor=st.session_state.case_cursors[-1], limit=50)
+        
+        if page["rows"]:
+            df = pd.DataFrame(page["rows"])
             
-            # Filters
-            col1, col2, col3, col4 = st.columns(4)
+            # Display table
+            st.dataframe(df, use_container_width=True)
             
-            with col1:
-                status_filter = st.selectbox("Filter by Status", ["All"] + list(df['case_status'].unique()))
-            with col2:
-                marketplace_filter = st.selectbox("Filter by Marketplace", ["All"] + list(df['marketplace'].unique()))
-            with col3:
-                priority_filter = st.selectbox("Filter by Priority", ["All"] + list(df['priority'].unique()))
-            with col4:
-                substatus_filter = st.selectbox("Filter by Sub-Status", ["All"] + list(df['last_sub_status'].unique()))
+            # Page navigation
+            nav1, nav2, nav3 = st.columns([1, 1, 4])
+            with nav1:
+                if st.button("⬅️ Previous", disabled=len(st.session_state.case_cursors) == 1):
+                    st.session_state.case_cursors.pop()
+                    st.rerun()
+            with nav2:
+                if st.button("Next ➡️", disabled=page["next_cursor"] is None):
+                    st.session_state.case_cursors.append(page["next_cursor"])
+                    st.rerun()
+            with nav3:
+                st.caption(f"Page {len(st.session_state.case_cursors)}")
             
-            # Apply filters
-            filtered_df = df.copy()
-            if status_filter != "All":
-                filtered_df = filtered_df[filtered_df['case_status'] == status_filter]
-            if marketplace_filter != "All":
-                filtered_df = filtered_df[filtered_df['marketplace'] == marketplace_filter]
-            if priority_filter != "All":
-                filtered_df = filtered_df[filtered_df['priority'] == priority_filter]
-            if substatus_filter != "All":
-                filtered_df = filtered_df[filtered_df['last_sub_status'] == substatus_filter]
+            # Case details and update section
+            st.markdown("---")
             
-            # Display table
-            st.dataframe(filtered_df, use_container_width=True)
+            selected_case = st.selectbox("Select Case for Details/Update", 
+                                       ["Select a case..."] + list(df['case_id'].tolist()))
             
-            # Case details and update section
-            if len(filtered_df) > 0:
-                st.markdown("---")
-                
-                selected_case = st.selectbox("Select Case for Details/Update", 
-                                           ["Select a case..."] + list(filtered_df['case_id'].tolist()))
+            if selected_case != "Select a case...":
+                case_dict, updates = st.session_state.bot.query_case(selected_case)
                 
-                if selected_case != "Select a case...":
-                    case_dict, updates = st.session_state.bot.query_case(selected_case)
+                if case_dict:
+                    col1, col2 = st.columns([2, 1])
                     
-                    if case_dict:
-                        col1, col2 = st.columns([2, 1])
+                    with col1:
+                        st.markdown(f"### Case {selected_case}")
                         
-                        with col1:
-                            st.markdown(f"### Case {selected_case}")
-                            
-                            subcol1, subcol2 = st.columns(2)
-                            
-                            with subcol1:
-                                st.markdown(f"**Seller:** {case_dict['seller_name']}")
-                                st.markdown(f"**Amazon Case ID:** {case_dict.get('amazon_case_id', 'Not provided')}")
-                                st.markdown(f"**Marketplace:** {case_dict['marketplace']}")
-                                st.markdown(f"**Priority:** {case_dict['priority']}")
-                                st.markdown(f"**Status:** {case_dict['case_status']}")
-                                st.markdown(f"**Listing Start:** {case_dict.get('listing_start_date', 'Not set')}")
+                        subcol1, subcol2 = st.columns(2)
+                        
+                        with subcol1:
+                            st.markdown(f"**Seller:** {case_dict['seller_name']}")
+                            st.markdown(f"**Amazon Case ID:** {case_dict.get('amazon_case_id', 'Not provided')}")
+                            st.markdown(f"**Marketplace:** {case_dict['marketplace']}")
+                            st.markdown(f"**Priority:** {case_dict['priority']}")
+                            st.markdown(f"**Status:** {case_dict['case_status']}")
+                            st.markdown(f"**Listing Start:** {case_dict.get('listing_start_date', 'Not set')}")
+                        
+                        with subcol2:
+                            st.markdown(f"**Issue Type:** {case_dict['issue_type']}")
+                            st.markdown(f"**API:** {case_dict['api_supported']}")
+                            st.markdown(f"**Workstream:** {case_dict['workstream']}")
+                            st.markdown(f"**Sub-status:** {case_dict['last_sub_status']}")
+                            st.markdown(f"**Specialist:** {case_dict['specialist_id']}")
+                            st.markdown(f"**Feedback:** {case_dict.get('feedback_received', 'No')}")
+                        
+                        st.markdown(f"**Notes:** {case_dict['notes']}")
+                    
+                    with col2:
+                        st.markdown("### Update Case")
+                        
+                        with st.form(f"update_form_{selected_case}"):
+                            update_note = st.text_area("Update Note", height=100)
+                            new_substatus = st.selectbox("New Sub-Status", SUB_STATUSES, 
+                                                       index=SUB_STATUSES.index(case_dict['last_sub_status']) if case_dict['last_sub_status'] in SUB_STATUSES else 0)
                             
-                            with subcol2:
-                                st.markdown(f"**Issue Type:** {case_dict['issue_type']}")
-                                st.markdown(f"**API:** {case_dict['api_supported']}")
-                                st.markdown(f"**Workstream:** {case_dict['workstream']}")
-                                st.markdown(f"**Sub-status:** {case_dict['last_sub_status']}")
-                                st.markdown(f"**Specialist:** {case_dict['specialist_id']}")
-                                st.markdown(f"**Feedback:** {case_dict.get('feedback_received', 'No')}")
+                            # Additional fields
+                            completion_date = st.date_input("Completion Date (if applicable)", value=None)
+                            feedback_received = st.selectbox("Feedback Received", ["No Change", "No", "Yes"])
                             
-                            st.markdown(f"**Notes:** {case_dict['notes']}")
-                        
-                        with col2:
-                            st.markdown("### Update Case")
+                            if feedback_received == "Yes":
+                                csat_score = st.slider("CSAT Score", 1.0, 5.0, 3.0, 0.5)
+                            else:
+                                csat_score = None
                             
-                            with st.form(f"update_form_{selected_case}"):
-                                update_note = st.text_area("Update Note", height=100)
-                                new_substatus = st.selectbox("New Sub-Status", SUB_STATUSES, 
-                                                           index=SUB_STATUSES.index(case_dict['last_sub_status']) if case_dict['last_sub_status'] in SUB_STATUSES else 0)
-                                
-                                # Additional fields
-                                completion_date = st.date_input("Completion Date (if applicable)", value=None)
-                                feedback_received = st.selectbox("Feedback Received", ["No Change", "No", "Yes"])
-                                
-                                if feedback_received == "Yes":
-                                    csat_score = st.slider("CSAT Score", 1.0, 5.0, 3.0, 0.5)
-                                else:
-                                    csat_score = None
-                                
-                                if st.form_submit_button("Update Case"):
-                                    if update_note:
-                                        additional_data = {}
-                                        if completion_date:
-                                            additional_data['listing_completion_date'] = completion_date.strftime('%Y-%m-%d')
-                                        if feedback_received != "No Change":
-                                            additional_data['feedback_received'] = feedback_received
-                                        if csat_score:
-                                            additional_data['csat_score'] = csat_score
-                                        
-                                        success, message = st.session_state.bot.update_case_status(
-                                            selected_case,
-                                            update_note,
-                                            new_substatus,
-                                            'Web User',
-                                            additional_data if additional_data else None
-                                        )
-                                        
-                                        if success:
-                                            st.success(message)
-                                            st.rerun()
-                                        else:
-                                            st.error(message)
+                            if st.form_submit_button("Update Case"):
+                                if update_note:
+                                    additional_data = {}
+                                    if completion_date:
+                                        additional_data['listing_completion_date'] = completion_date.strftime('%Y-%m-%d')
+                                    if feedback_received != "No Change":
+                                        additional_data['feedback_received'] = feedback_received
+                                    if csat_score:
+                                        additional_data['csat_score'] = csat_score
+                                    
+                                    success, message = st.session_state.bot.update_case_status(
+                                        selected_case,
+                                        update_note,
+                                        new_substatus,
+                                        'Web User',
+                                        additional_data if additional_data else None
+                                    )
+                                    
+                                    if success:
+                                        st.success(message)
+                                        st.rerun()
                                     else:
-                                        st.error("Please provide an update note")
-                        
-                        # Show update history
-                        if updates:
-                            st.markdown("### Update History")
-                            for note, updated_by, timestamp, sub_status in updates:
-                                with st.expander(f"{timestamp[:16]} - {sub_status}"):
-                                    st.markdown(f"**Updated by:** {updated_by}")
-                                    st.markdown(f"**Note:** {note}")
+                                        st.error(message)
+                                else:
+                                    st.error("Please provide an update note")
+                    
+                    # Show update history
+                    if updates:
+                        st.markdown("### Update History")
+                        for note, updated_by, timestamp, sub_status in updates:
+                            with st.expander(f"{timestamp[:16]} - {sub_status}"):
+                                st.markdown(f"**Updated by:** {updated_by}")
+                                st.markdown(f"**Note:** {note}")
         else:
             st.info("No cases found. Create some cases using the chat interface or Create Case tab!")
             
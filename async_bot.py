@@ -0,0 +1,275 @@
+import asyncio
+import time
+
+from openai import AsyncOpenAI
+
+from api_support_bot import QuickSupportBot, MODELS, MODEL_UNAVAILABLE_RESPONSE, UNKNOWN_INTENT_RESPONSE
+from resilience import CircuitOpenError
+
+
+class AsyncQuickSupportBot(QuickSupportBot):
+    """QuickSupportBot whose model calls run on asyncio.
+
+    All *_async methods share one AsyncOpenAI client (and so one HTTP
+    connection pool); pass async_client to share it across bots. At most
+    max_concurrency model calls are in flight at once. The synchronous API
+    inherited from QuickSupportBot keeps working.
+    """
+
+    def __init__(self, model_tier="balanced", api_key=None, async_client=None, max_concurrency=8, **kwargs):
+        super().__init__(model_tier, api_key, **kwargs)
+        self.async_client = async_client
+        if self.async_client is None and self.api_key:
+            self.async_client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=0,  # retries are handled by self.resilience
+            )
+        self.max_concurrency = max_concurrency
+        self._limiters = {}
+
+    def _limiter(self):
+        """Per-event-loop semaphore bounding concurrent model calls"""
+        loop = asyncio.get_running_loop()
+        if loop not in self._limiters:
+            self._limiters = {loop: asyncio.Semaphore(self.max_concurrency)}
+        return self._limiters[loop]
+
+    async def _make_api_call_async(self, messages, temperature=0.1, max_tokens=400, call_site=None, model=None):
+        """Async counterpart of _make_api_call"""
+        if not self.async_client:
+            return {"error": "API client not initialized. Please check your API key."}
+
+        cache_key, cached = self._cache_lookup(messages, temperature, max_tokens, call_site, model)
+        if cached:
+            return cached
+
+        try:
+            async with self._limiter():
+                response = await self._create_completion_async(
+                    self._completion_kwargs(messages, temperature, max_tokens, model), call_site
+                )
+            content = response.choices[0].message.content.strip()
+        except CircuitOpenError as e:
+            return {"error": str(e), "circuit_open": True}
+        except Exception as e:
+            return {"error": str(e)}
+
+        self._cache_store(cache_key, content, model)
+        return {"success": True, "content": content, "usage": self._record_usage(response)}
+
+    async def _routed_call_async(self, messages, call_site, validate, max_tokens=400):
+        """Async counterpart of _routed_call"""
+        if not self.router:
+            return await self._make_api_call_async(messages, max_tokens=max_tokens, call_site=call_site)
+
+        result = None
+        for tier in self.router.route(call_site, self.model_tier, messages, max_tokens):
+            started = time.perf_counter()
+            result = await self._make_api_call_async(
+                messages, max_tokens=max_tokens, call_site=call_site, model=MODELS[tier]
+            )
+            self.router.record(call_site, tier, self.model_tier, time.perf_counter() - started,
+                               result.get("usage"), result.get("cached"))
+            if "error" in result or validate(result) >= self.router.min_confidence:
+                break
+        return result
+
+    async def _create_completion_async(self, kwargs, call_site=None):
+        """Run a chat completion through the resilience policy when one is set"""
+        if self.resilience:
+            return await self.resilience.call_async(self.async_client.chat.completions.create, kwargs, call_site)
+        return await self.async_client.chat.completions.create(**kwargs)
+
+    async def extract_case_info_async(self, text):
+        """Extract case information from text"""
+        if self.rule_parser:
+            parsed = self.rule_parser.parse_case(text)
+            if parsed:
+                return parsed
+
+        result = await self._routed_call_async(
+            self._case_info_messages(text), "extract_case",
+            lambda result: self._payload_confidence("create", self._parse_json_result(result))
+        )
+        if result.get("circuit_open"):
+            return {"error": MODEL_UNAVAILABLE_RESPONSE, "circuit_open": True}
+        return self._parse_json_result(result)
+
+    async def extract_update_info_async(self, text):
+        """Extract update information from text"""
+        if self.rule_parser:
+            parsed = self.rule_parser.parse_update(text)
+            if parsed:
+                return parsed
+
+        result = await self._routed_call_async(
+            self._update_info_messages(text), "extract_update",
+            lambda result: self._payload_confidence("update", self._parse_json_result(result)), max_tokens=300
+        )
+        if result.get("circuit_open"):
+            return {"error": MODEL_UNAVAILABLE_RESPONSE, "circuit_open": True}
+        return self._parse_json_result(result)
+
+    async def determine_intent_async(self, text):
+        """Determine user intent"""
+        intent = self._intent_shortcut(text)
+        if intent:
+            return intent
+
+        result = await self._routed_call_async(self._intent_messages(text), "intent", self._intent_confidence, max_tokens=50)
+        if "error" in result:
+            return "error"
+        return result["content"].lower()
+
+    async def analyze_cases_async(self, query):
+        """Perform analytics on cases based on natural language query"""
+        params = self._analytics_shortcut(query)
+        if params:
+            return await asyncio.to_thread(self.execute_analysis, params)
+
+        params = await self._resolve_analytics_params_async(query)
+        return await asyncio.to_thread(self._analyze_params, query, params)
+
+    async def _analytics_params_async(self, query):
+        """Analysis params from a local shortcut, else from the model"""
+        return self._analytics_shortcut(query) or await self._resolve_analytics_params_async(query)
+
+    async def classify_and_extract_async(self, text):
+        """Resolve intent and its payload with one model call"""
+        result = await self._routed_call_async(
+            self._combined_messages(text), "combined",
+            lambda result: 0.0 if "error" in self._validate_combined(self._parse_json_result(result)) else 1.0,
+            max_tokens=500
+        )
+        return self._validate_combined(self._parse_json_result(result))
+
+    async def _resolve_analytics_params_async(self, query):
+        """Ask the model for analysis params (or an {"error": ...} dict)"""
+        result = await self._routed_call_async(
+            self._analytics_messages(query), "analytics",
+            lambda result: self._payload_confidence("analytics", self._parse_json_result(result)), max_tokens=300
+        )
+        if result.get("circuit_open"):
+            return self._degraded_analytics_params(query) or self._parse_json_result(result)
+        return self._parse_json_result(result)
+
+    async def _timed_async(self, timings, stage, awaitable):
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            timings[stage] = time.perf_counter() - started
+
+    async def _speculate_async(self, message, timings):
+        """Async counterpart of _speculate; losing calls are cancelled mid-flight"""
+        started = time.perf_counter()
+        stage_timings = {}
+        calls = {"create": self.extract_case_info_async(message)}
+        if not self._analytics_shortcut(message):
+            calls["analytics"] = self._resolve_analytics_params_async(message)
+        tasks = {
+            name: asyncio.create_task(self._timed_async(stage_timings, name, call))
+            for name, call in calls.items()
+        }
+
+        intent = await self._timed_async(timings, "intent", self.determine_intent_async(message))
+
+        # Cancel the losers first, then wait for the extraction that matches
+        cancelled = []
+        for name, task in tasks.items():
+            if name not in intent and not task.done():
+                task.cancel()
+                cancelled.append(name)
+        prefetched = {name: await task for name, task in tasks.items() if name in intent}
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        elapsed = time.perf_counter() - started
+        serial = timings["intent"] + sum(stage_timings.get(name, 0.0) for name in prefetched)
+        timings["speculative"] = elapsed
+        return intent, prefetched, {
+            "launched": list(tasks),
+            "used": list(prefetched),
+            "cancelled": cancelled,
+            "saved": max(serial - elapsed, 0.0),
+        }
+
+    async def handle_message_async(self, user_id, message, speculative=None):
+        """Async counterpart of handle_message; returns the same result dict"""
+        with self._request_scope():
+            return await self._handle_message_async(user_id, message, speculative)
+
+    async def _handle_message_async(self, user_id, message, speculative):
+        started = time.perf_counter()
+        timings = {}
+        prefetched = {}
+        speculation = None
+
+        intent = self._timed(timings, "intent", self._intent_shortcut, message)
+        if not intent and self.combined:
+            combined = await self._timed_async(timings, "intent", self.classify_and_extract_async(message))
+            if "error" not in combined:
+                intent = combined["intent"]
+                prefetched = {intent: combined["payload"]}
+        if not intent:
+            if self.speculative if speculative is None else speculative:
+                intent, prefetched, speculation = await self._speculate_async(message, timings)
+            else:
+                intent = await self._timed_async(timings, "intent", self.determine_intent_async(message))
+
+        extracted, response = await self._respond_intent_async(intent, message, prefetched, timings)
+
+        timings["total"] = time.perf_counter() - started
+        result = {
+            "intent": intent,
+            "extracted": extracted,
+            "response": response,
+            "timings": timings
+        }
+        if speculation:
+            result["speculation"] = speculation
+        return result
+
+    async def _respond_intent_async(self, intent, message, prefetched, timings):
+        """Async counterpart of _respond_intent over the same _intent_action mapping.
+
+        Extractors run as their *_async twins; responders only touch the
+        database and run in a worker thread so the event loop stays free.
+        """
+        key, extractor, responder, args = self._intent_action(intent, message)
+        if responder is None:
+            return None, UNKNOWN_INTENT_RESPONSE
+
+        payload = prefetched.get(key)
+        if key and key not in prefetched and extractor:
+            payload = await self._timed_async(timings, "extract", getattr(self, f"{extractor}_async")(message))
+        if key:
+            args += (payload,)
+        response = await self._timed_async(timings, "execute", asyncio.to_thread(getattr(self, responder), *args))
+        return self._reported_extraction(key, payload), response
+
+    async def process_message_async(self, user_id, message):
+        """Process user input and return the response text"""
+        return (await self.handle_message_async(user_id, message))["response"]
+
+    async def process_batch(self, messages, user_id="batch", max_concurrency=None):
+        """Handle many messages concurrently; results come back in input order.
+
+        At most max_concurrency messages (default: the bot's limit) are in
+        progress at a time.
+        """
+        gate = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def run(message):
+            async with gate:
+                try:
+                    return await self.handle_message_async(user_id, message)
+                except Exception as e:
+                    return {"intent": "error", "extracted": None, "response": f"❌ Error: {e}", "timings": {}}
+
+        return await asyncio.gather(*(run(message) for message in messages))
+
+    async def aclose(self):
+        """Close the shared async HTTP client"""
+        if self.async_client:
+            await self.async_client.close()
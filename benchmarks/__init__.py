@@ -0,0 +1 @@
+"""Performance benchmarks for the support bot (run modules with python -m benchmarks.<name>)"""
@@ -0,0 +1,95 @@
+"""execute_analysis formatting: pandas + iterrows (previous) vs cursor rows with top-N bucketing.
+
+Fills a temp database with --cases cases spread over --groups specialists,
+then times a grouped analysis (by specialist_id) and a plain COUNT(*) with
+both implementations.
+
+Usage: python -m benchmarks.analysis_format [--cases 200000] [--groups 100,10000,100000] [--repeat 5]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from api_support_bot import QuickSupportBot
+
+
+def legacy_execute_analysis(bot, params):
+    """execute_analysis as it was: read_sql_query, then iterrows and string concatenation"""
+    group_by = params.get('group_by')
+    if group_by:
+        query = f"SELECT {group_by}, COUNT(*) as count FROM cases WHERE 1=1 GROUP BY {group_by} ORDER BY count DESC"
+    else:
+        query = "SELECT COUNT(*) as total_count FROM cases WHERE 1=1"
+
+    with bot.db.connection() as conn:
+        df = pd.read_sql_query(query, conn)
+    description = params.get('description', 'Case analysis')
+    if group_by:
+        result = f"📊 **{description}**\n\n"
+        for _, row in df.iterrows():
+            result += f"• **{row[group_by]}**: {row['count']} cases\n"
+        result += f"\n**Total**: {df['count'].sum()} cases"
+    else:
+        total = df.iloc[0]['total_count'] if len(df) > 0 else 0
+        result = f"📊 **{description}**\n\n**Total**: {total} cases"
+    return result
+
+
+def fill(bot, cases, groups):
+    """Replace the cases table contents with cases rows over groups specialists"""
+    with bot.db.transaction("IMMEDIATE") as conn:
+        conn.execute("DELETE FROM cases")
+        conn.executemany(
+            """INSERT INTO cases (case_id, seller_id, seller_name, specialist_id, specialist_name, marketplace,
+               case_source, case_status, workstream, issue_type, complexity, priority, api_supported,
+               integration_type, seller_type)
+               VALUES (?, ?, 'Bench Seller', ?, 'Bench', 'EU', 'ASTRO', 'WIP', 'DSR', 'Bench', 'Easy', 'Low',
+               'General API', 'API', 'NEW')""",
+            ((f"BENCH-{i}", i, f"SPEC{i % groups:06d}") for i in range(cases)),
+        )
+
+
+def timed(func, repeat):
+    """Best of repeat runs in milliseconds"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best, 2)
+
+
+def run(bot, cases, groups, repeat=5):
+    fill(bot, cases, groups)
+    grouped = {"filters": {}, "group_by": "specialist_id", "description": "Cases by specialist"}
+    total = {"filters": {}, "group_by": None, "description": "All cases"}
+    return {
+        "groups": groups,
+        "grouped_legacy_ms": timed(lambda: legacy_execute_analysis(bot, grouped), repeat),
+        "grouped_top_n_ms": timed(lambda: bot.run_analysis(grouped), repeat),
+        "grouped_all_rows_ms": timed(lambda: bot.run_analysis(grouped, top_n=None), repeat),
+        "count_legacy_ms": timed(lambda: legacy_execute_analysis(bot, total), repeat),
+        "count_ms": timed(lambda: bot.run_analysis(total), repeat),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=200000)
+    parser.add_argument("--groups", default="100,10000,100000", help="comma-separated group counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bot = QuickSupportBot(
+            api_key="bench", db_path=os.path.join(tmp, "bench.db"), cache=False, analytics_cache=False,
+        )
+        for groups in (int(g) for g in args.groups.split(",")):
+            print(f"{args.cases} cases:")
+            for key, value in run(bot, args.cases, groups, args.repeat).items():
+                print(f"  {key}: {value}")
+        bot.db.close()
@@ -0,0 +1,108 @@
+"""Hit rate of the semantic analytics cache over a recorded query log.
+
+The log is JSONL with one {"query": ..., "params": {...}} object per line,
+where params is what the model resolved for that query. Each query is looked
+up before being stored; a hit is correct when its filters and group_by match
+the recorded params.
+
+Usage: python -m benchmarks.analytics_cache_hit_rate [--log queries.jsonl] [--min-similarity 0.6]
+"""
+import argparse
+import json
+import time
+
+from analytics_cache import SemanticAnalyticsCache
+from api_support_bot import ANALYTICS_VOCABULARIES
+from query_normalizer import QueryNormalizer
+
+
+def _params(filters=None, group_by=None):
+    return {"filters": filters or {}, "group_by": group_by}
+
+
+# Small built-in log of paraphrased questions used when no --log is given
+SAMPLE_LOG = [
+    ("How many WIP cases?", _params({"case_status": ["WIP"]})),
+    ("Count of cases in WIP status", _params({"case_status": ["WIP"]})),
+    ("how many cases are work in progress", _params({"case_status": ["WIP"]})),
+    ("WIP cases in EU", _params({"case_status": ["WIP"], "marketplace": ["EU"]})),
+    ("how many EU cases are WIP", _params({"case_status": ["WIP"], "marketplace": ["EU"]})),
+    ("Number of WIP cases in the EU marketplace", _params({"case_status": ["WIP"], "marketplace": ["EU"]})),
+    ("Show me EU marketplace cases", _params({"marketplace": ["EU"]})),
+    ("EU marketplace cases count", _params({"marketplace": ["EU"]})),
+    ("High priority cases by marketplace", _params({"priority": ["High"]}, "marketplace")),
+    ("high priority cases per marketplace", _params({"priority": ["High"]}, "marketplace")),
+    ("breakdown of high priority cases by market", _params({"priority": ["High"]}, "marketplace")),
+    ("Cases in ON_HOLD sub-status", _params({"last_sub_status": ["ON_HOLD"]})),
+    ("how many cases have sub-status ON_HOLD", _params({"last_sub_status": ["ON_HOLD"]})),
+    ("Count of cases in PMA sub-status", _params({"last_sub_status": ["PMA"]})),
+    ("cases in PMA sub status", _params({"last_sub_status": ["PMA"]})),
+    ("cases by status", _params(None, "case_status")),
+    ("case count by status", _params(None, "case_status")),
+    ("cases per specialist", _params(None, "specialist_id")),
+    ("how many cases does each specialist have, by specialist", _params(None, "specialist_id")),
+    ("cases on hold", _params({"case_status": ["ON-HOLD"]})),
+    ("how many on-hold cases", _params({"case_status": ["ON-HOLD"]})),
+    ("completed cases in NA", _params({"case_status": ["COMPLETED"], "marketplace": ["NA"]})),
+    ("NA cases that are completed", _params({"case_status": ["COMPLETED"], "marketplace": ["NA"]})),
+    ("low priority DSR cases", _params({"priority": ["Low"], "workstream": ["DSR"]})),
+    ("DSR workstream cases with low priority", _params({"priority": ["Low"], "workstream": ["DSR"]})),
+    ("SPEC001 cases by status", _params({"specialist_id": ["SPEC001"]}, "case_status")),
+    ("status breakdown for spec 1, by status", _params({"specialist_id": ["SPEC001"]}, "case_status")),
+    ("WIP cases created last week in EU", _params({"case_status": ["WIP"], "marketplace": ["EU"]})),
+]
+
+
+def _same_answer(a, b):
+    filters_a = {k: sorted(v) for k, v in (a.get("filters") or {}).items() if v}
+    filters_b = {k: sorted(v) for k, v in (b.get("filters") or {}).items() if v}
+    return filters_a == filters_b and a.get("group_by") == b.get("group_by")
+
+
+def run(log, min_similarity=0.6):
+    """Replay log through a fresh cache and return a summary dict"""
+    cache = SemanticAnalyticsCache(QueryNormalizer(ANALYTICS_VOCABULARIES), min_similarity=min_similarity)
+    correct = wrong = 0
+    lookup_seconds = 0.0
+
+    for query, params in log:
+        started = time.perf_counter()
+        cached, _ = cache.lookup(query)
+        lookup_seconds += time.perf_counter() - started
+
+        if cached is None:
+            cache.store(query, params)
+        elif _same_answer(cached, params):
+            correct += 1
+        else:
+            wrong += 1
+
+    stats = cache.stats()
+    return {
+        "queries": len(log),
+        "hits": stats["hits"],
+        "hit_rate": round(stats["hit_rate"], 3),
+        "correct_hits": correct,
+        "wrong_hits": wrong,
+        "model_calls_saved": correct + wrong,
+        "mean_lookup_us": round(lookup_seconds / len(log) * 1e6, 1) if log else 0.0,
+    }
+
+
+def load_log(path):
+    with open(path) as f:
+        return [
+            (entry["query"], entry["params"])
+            for entry in (json.loads(line) for line in f if line.strip())
+        ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--log", help="JSONL query log (default: built-in sample)")
+    parser.add_argument("--min-similarity", type=float, default=0.6)
+    args = parser.parse_args()
+
+    log = load_log(args.log) if args.log else SAMPLE_LOG
+    for key, value in run(log, args.min_similarity).items():
+        print(f"  {key}: {value}")
@@ -0,0 +1,79 @@
+"""Multi-process create storm: concurrent create_case_from_data against one database.
+
+Usage: python -m benchmarks.case_id_storm [--processes 8] [--cases 200] [--db PATH]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from api_support_bot import QuickSupportBot
+
+
+def _worker(db_path, count, start_event, results):
+    bot = QuickSupportBot(db_path=db_path)
+    start_event.wait()
+
+    case_ids = []
+    errors = 0
+    for i in range(count):
+        try:
+            case_id, _ = bot.create_case_from_data({
+                'seller_name': f"Storm Seller {os.getpid()}-{i}",
+                'issue_type': 'Load Test',
+            })
+            case_ids.append(case_id)
+        except Exception:
+            errors += 1
+
+    bot.db.close()
+    results.put((case_ids, errors))
+
+
+def run_storm(db_path, processes=8, cases_per_process=200):
+    """Create cases from several processes at once and return a summary dict"""
+    # Initialise schema and seed data once before the storm starts
+    QuickSupportBot(db_path=db_path).db.close()
+
+    start_event = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(target=_worker, args=(db_path, cases_per_process, start_event, results))
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+
+    started = time.perf_counter()
+    start_event.set()
+    outcomes = [results.get() for _ in workers]
+    elapsed = time.perf_counter() - started
+    for worker in workers:
+        worker.join()
+
+    all_ids = [case_id for case_ids, _ in outcomes for case_id in case_ids]
+    return {
+        'processes': processes,
+        'cases_per_process': cases_per_process,
+        'created': len(all_ids),
+        'duplicates': len(all_ids) - len(set(all_ids)),
+        'errors': sum(errors for _, errors in outcomes),
+        'seconds': round(elapsed, 3),
+        'creates_per_sec': round(len(all_ids) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--cases", type=int, default=200, help="cases created per process")
+    parser.add_argument("--db", help="database path (default: a fresh temp file)")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), "storm.db")
+    summary = run_storm(db_path, args.processes, args.cases)
+
+    print(f"Database: {db_path}")
+    for key, value in summary.items():
+        print(f"  {key}: {value}")
@@ -0,0 +1,132 @@
+"""Two-step (intent, then extraction) vs single combined prompt.
+
+Runs a labeled message set through both flows against the live model and
+reports model calls, prompt/completion tokens, latency and accuracy (intent
+and labeled fields). Caches and the rule parser are disabled so every
+message reaches the model, and routing is off so both flows use one tier.
+
+Usage: python -m benchmarks.combined_prompt --api-key KEY [--base-url URL] [--model-tier balanced] [--labels labels.jsonl]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from api_support_bot import QuickSupportBot
+
+# Built-in labeled set: (message, intent, expected payload fields)
+SAMPLE_LABELS = [
+    ("Acme Tools is struggling to get their inventory feed working in the EU store, pretty urgent",
+     "create", {"marketplace": "EU", "priority": "High"}),
+    ("Came in via Winston: Bright Home says the orders API keeps timing out for them in NA",
+     "create", {"marketplace": "NA", "case_source": "WINSTON", "api_supported": "Orders API"}),
+    ("Seller Nova Retail can't authenticate against SP-API, they're a new seller in the MENA marketplace",
+     "create", {"marketplace": "MENA", "seller_type": "NEW"}),
+    ("CASE-0003 seller confirmed everything works now, csat 5",
+     "update", {"case_id": "CASE-0003", "csat_score": 5}),
+    ("For CASE-0002 we're waiting on the seller to share credentials",
+     "update", {"case_id": "CASE-0002"}),
+    ("Handing CASE-0004 over to the strategic team",
+     "update", {"case_id": "CASE-0004", "sub_status": "HANDOVER"}),
+    ("What's going on with CASE-0001?", "query", {"case_id": "CASE-0001"}),
+    ("Where are we on CASE-0005", "query", {"case_id": "CASE-0005"}),
+    ("Which marketplaces have the most open high priority work?",
+     "analytics", {"group_by": "marketplace"}),
+    ("Are any EU cases stuck waiting on seller info?",
+     "analytics", {"filters": {"marketplace": ["EU"], "case_status": ["AWAITING INFORMATION"]}}),
+]
+
+
+def _matches(expected, actual):
+    if isinstance(expected, dict):
+        return isinstance(actual, dict) and all(_matches(v, actual.get(k)) for k, v in expected.items())
+    if isinstance(expected, list):
+        return isinstance(actual, list) and sorted(map(str, expected)) == sorted(map(str, actual))
+    if isinstance(expected, (int, float)):
+        try:
+            return float(actual) == float(expected)
+        except (TypeError, ValueError):
+            return False
+    return str(actual or "").lower() == str(expected).lower()
+
+
+def two_step(bot, message):
+    """Intent call, then the intent's own extraction call"""
+    result = bot._make_api_call(bot._intent_messages(message), max_tokens=50, call_site="intent")
+    intent = result.get("content", "error").lower().strip()
+    if "create" in intent:
+        return "create", bot.extract_case_info(message)
+    if "update" in intent:
+        return "update", bot.extract_update_info(message)
+    if "analytics" in intent:
+        return "analytics", bot._resolve_analytics_params(message)
+    if "query" in intent:
+        # The two-step flow reads the case ID locally
+        words = [w.strip("?.,!:") for w in message.upper().split()]
+        return "query", {"case_id": next((w for w in words if w.startswith("CASE-")), None)}
+    return intent, {}
+
+
+def combined(bot, message):
+    """One classify-and-extract call"""
+    result = bot.classify_and_extract(message)
+    if "error" in result:
+        return "error", {}
+    return result["intent"], result["payload"]
+
+
+def run(bot, labels, flow):
+    """Run labels through flow(bot, message) and return a summary dict"""
+    bot.usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    intents_ok = fields_ok = 0
+    latencies = []
+
+    for message, intent, fields in labels:
+        started = time.perf_counter()
+        got_intent, payload = flow(bot, message)
+        latencies.append(time.perf_counter() - started)
+        if got_intent == intent:
+            intents_ok += 1
+            if _matches(fields, payload):
+                fields_ok += 1
+
+    latencies.sort()
+    return dict(
+        bot.usage,
+        messages=len(labels),
+        intent_accuracy=round(intents_ok / len(labels), 3),
+        field_accuracy=round(fields_ok / len(labels), 3),
+        mean_latency_ms=round(sum(latencies) / len(latencies) * 1000, 1),
+        p95_latency_ms=round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1),
+    )
+
+
+def load_labels(path):
+    with open(path) as f:
+        return [
+            (entry["message"], entry["intent"], entry.get("fields") or {})
+            for entry in (json.loads(line) for line in f if line.strip())
+        ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--api-key", default=os.getenv("OPENROUTER_API_KEY"))
+    parser.add_argument("--base-url", help="OpenAI-compatible endpoint (default: OpenRouter)")
+    parser.add_argument("--model-tier", default="balanced")
+    parser.add_argument("--labels", help="JSONL with message, intent, fields (default: built-in sample)")
+    args = parser.parse_args()
+
+    labels = load_labels(args.labels) if args.labels else SAMPLE_LABELS
+    with tempfile.TemporaryDirectory() as tmp:
+        bot = QuickSupportBot(
+            args.model_tier, args.api_key, db_path=os.path.join(tmp, "bench.db"),
+            cache=False, analytics_cache=False, use_rules=False, router=False, base_url=args.base_url,
+        )
+
+        for name, flow in (("two-step", two_step), ("combined", combined)):
+            print(f"{name}:")
+            for key, value in run(bot, labels, flow).items():
+                print(f"  {key}: {value}")
+        bot.db.close()
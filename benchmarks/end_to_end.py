@@ -0,0 +1,293 @@
+"""End-to-end latency, throughput and memory of the bot's main paths.
+
+For each database size a seeded synthetic database is generated (see
+benchmarks.synthetic_data; kept in --data-dir and reused by later runs) and
+every scenario runs --iterations times against it, with model calls served
+by a local FakeOpenAIServer after --latency seconds. Response and analytics
+caches are off so every message does its full work; --no-rules also turns
+off the rule parser, leaving only the keyword shortcuts before the model. Read
+scenarios run before the create/update ones, which add a few rows to the
+database.
+
+Reports p50/p95/p99 latency, error rate, throughput and peak traced Python
+memory per scenario. Errors count exceptions and the bot's own error results
+("❌ ..." replies, {"error": ...} dicts, (None, ...) lookups). --json writes
+the report for comparing commits; --compare BASELINE.json prints the change
+against an earlier report.
+
+Usage: python -m benchmarks.end_to_end [--sizes 10000,100000] [--iterations 200] [--latency 0.05] [--concurrency 1] [--no-rules] [--json out.json] [--compare old.json]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import resource
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+from api_support_bot import QuickSupportBot
+from benchmarks.fake_openai_server import FakeOpenAIServer
+from benchmarks.synthetic_data import populate, MARKETPLACE_WEIGHTS, WORKSTREAM_WEIGHTS
+from database import format_case_id
+
+# Rows the dashboard table asks get_hierarchical_data for
+TABLE_LIMIT = 500
+# Calls traced with tracemalloc per scenario; tracing slows Python, so latencies come from an untraced pass
+MEMORY_ITERATIONS = 20
+
+ANALYSES = [
+    {"filters": {}, "group_by": "case_status", "description": "Cases by status"},
+    {"filters": {"marketplace": ["EU", "NA"]}, "group_by": ["marketplace", "priority"], "description": "EU/NA by priority"},
+    {"filters": {}, "group_by": "specialist_id", "aggregates": ["avg:csat_score", "median:completion_days"],
+     "description": "Specialist CSAT and completion time"},
+    {"filters": {"case_status": ["WIP"]}, "group_by": None, "description": "Open cases"},
+]
+
+
+def _case_id(rng, cases):
+    # Generated cases follow the four demo cases
+    return format_case_id(rng.randint(1, cases + 4))
+
+
+def scenarios(cases):
+    """Scenario name -> call(bot, rng); reads first, then the writes"""
+    marketplaces = list(MARKETPLACE_WEIGHTS)
+    workstreams = list(WORKSTREAM_WEIGHTS)
+    return {
+        "query_case": lambda bot, rng: bot.query_case(_case_id(rng, cases)),
+        "execute_analysis": lambda bot, rng: bot.execute_analysis(rng.choice(ANALYSES)),
+        "get_hierarchical_data": lambda bot, rng: bot.get_hierarchical_data(
+            created_start_date="2025-01-01", created_end_date="2025-12-31",
+            filters={"marketplace": [rng.choice(marketplaces)], "workstream": [rng.choice(workstreams)]},
+            limit=TABLE_LIMIT,
+        ),
+        "process_message:query": lambda bot, rng: bot.process_message(
+            "bench", f"Show case {_case_id(rng, cases)}"
+        ),
+        "process_message:analytics": lambda bot, rng: bot.process_message(
+            "bench", f"How many {rng.choice(marketplaces)} cases by priority?"
+        ),
+        "process_message:create": lambda bot, rng: bot.process_message(
+            "bench", f"Seller Bench {rng.randrange(10 ** 6)} in {rng.choice(marketplaces)} can't get the inventory feed working"
+        ),
+        "process_message:update": lambda bot, rng: bot.process_message(
+            "bench", f"Update {_case_id(rng, cases)}: seller replied, mark INT_WIP"
+        ),
+        "create_case_from_data": lambda bot, rng: bot.create_case_from_data({
+            "seller_name": f"Bench Seller {rng.randrange(10 ** 6)}", "marketplace": rng.choice(marketplaces),
+            "notes": "Benchmark case",
+        }),
+        "update_case_status": lambda bot, rng: bot.update_case_status(
+            _case_id(rng, cases), "Benchmark update", rng.choice(["INT_WIP", "PMA", "ON_HOLD"]), "Bench"
+        ),
+    }
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    return sorted_values[max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))]
+
+
+def failed(result):
+    """Whether a call returned one of the bot's error results rather than raising"""
+    if isinstance(result, str):
+        return result.startswith("❌")
+    if isinstance(result, dict):
+        return "error" in result
+    # (None, "Case not found"), (False, "Case ... not found")
+    if isinstance(result, tuple) and result:
+        return result[0] is None or result[0] is False
+    return False
+
+
+def measure(bots, call, iterations, seed):
+    """Run call iterations times split over one thread per bot.
+
+    Returns (sorted latencies in seconds, wall seconds, errors); errors
+    counts raised exceptions and returned error results alike.
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(index, bot):
+        rng = random.Random(seed + index)
+        own = []
+        errors_seen = 0
+        for _ in range(index, iterations, len(bots)):
+            started = time.perf_counter()
+            try:
+                if failed(call(bot, rng)):
+                    errors_seen += 1
+            except Exception:
+                errors_seen += 1
+            own.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(own)
+            errors[0] += errors_seen
+
+    threads = [threading.Thread(target=worker, args=(i, bot)) for i, bot in enumerate(bots)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(latencies), time.perf_counter() - started, errors[0]
+
+
+def peak_memory(bot, call, iterations, seed):
+    """Peak traced Python allocation in MB over iterations sequential calls"""
+    rng = random.Random(seed)
+    tracemalloc.start()
+    try:
+        for _ in range(iterations):
+            try:
+                call(bot, rng)
+            except Exception:
+                pass
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def prepare_database(data_dir, cases, seed):
+    """Path of a synthetic database with cases generated cases, built on first use"""
+    path = os.path.join(data_dir, f"synthetic-{cases}-seed{seed}.db")
+    if not os.path.exists(path):
+        print(f"Generating {cases} cases into {path}...")
+        bot = QuickSupportBot(db_path=path)
+        # Nothing else uses the new file yet, so the indexes can be rebuilt once at the end
+        summary = populate(bot, cases, seed, defer_indexes=True)
+        bot.db.close()
+        print(f"  {summary['cases']} cases, {summary['updates']} updates in {summary['seconds']} s")
+    return path
+
+
+def run_size(db_path, cases, base_url, iterations, concurrency, seed, only=None, use_rules=True):
+    """Result dicts for every scenario against one database"""
+    bot = QuickSupportBot(
+        api_key="bench", base_url=base_url, db_path=db_path, cache=False, analytics_cache=False, use_rules=use_rules,
+    )
+    # Extra sessions share the pool and client, as Streamlit sessions do
+    bots = [bot] + [QuickSupportBot(resources=bot.resources) for _ in range(concurrency - 1)]
+    results = []
+    for name, call in scenarios(cases).items():
+        if only and name not in only:
+            continue
+        latencies, wall, errors = measure(bots, call, iterations, seed)
+        results.append({
+            "size": cases,
+            "scenario": name,
+            "iterations": iterations,
+            "errors": errors,
+            "error_rate": round(errors / iterations, 4) if iterations else 0.0,
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+            "throughput_per_sec": round(iterations / wall, 1) if wall else 0.0,
+            "peak_mb": round(peak_memory(bot, call, min(iterations, MEMORY_ITERATIONS), seed), 2),
+        })
+    bot.db.close()
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(sizes, iterations=200, latency=0.05, jitter=0.0, concurrency=1, seed=42, data_dir=None, only=None, use_rules=True):
+    """Benchmark report: {"meta": {...}, "results": [one dict per size and scenario]}"""
+    data_dir = data_dir or tempfile.mkdtemp()
+    results = []
+    with FakeOpenAIServer(latency=latency, jitter=jitter) as server:
+        for cases in sizes:
+            db_path = prepare_database(data_dir, cases, seed)
+            results.extend(run_size(db_path, cases, server.base_url, iterations, concurrency, seed, only, use_rules))
+        model_requests = server.requests
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "sizes": sizes,
+            "iterations": iterations,
+            "concurrency": concurrency,
+            "use_rules": use_rules,
+            "model_latency_s": latency,
+            "model_jitter_s": jitter,
+            "seed": seed,
+            "model_requests": model_requests,
+            # ru_maxrss is in KB on Linux
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline):
+    """Lines showing p50/p95, throughput and error rate change per scenario against baseline"""
+    previous = {(r["size"], r["scenario"]): r for r in baseline["results"]}
+    lines = [f"Compared with {baseline['meta'].get('commit') or 'baseline'}:"]
+    for result in report["results"]:
+        old = previous.get((result["size"], result["scenario"]))
+        if not old:
+            continue
+        changes = []
+        for key in ("p50_ms", "p95_ms", "throughput_per_sec"):
+            change = (result[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            changes.append(f"{key} {old[key]} -> {result[key]} ({change:+.1f}%)")
+        # Reports from before error_rate was recorded
+        if "error_rate" in old:
+            changes.append(f"error_rate {old['error_rate']:.2%} -> {result['error_rate']:.2%}")
+        lines.append(f"  {result['size']} {result['scenario']}: {', '.join(changes)}")
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000", help="comma-separated case counts")
+    parser.add_argument("--iterations", type=int, default=200, help="calls per scenario and size")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=1, help="sessions calling at once")
+    parser.add_argument("--no-rules", action="store_true", help="disable the rule parser (keyword shortcuts stay)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", help="where generated databases are kept (default: a fresh temp dir)")
+    parser.add_argument("--scenarios", help="comma-separated subset of scenarios")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="earlier --json report to compare against")
+    args = parser.parse_args()
+
+    report = run(
+        [int(size) for size in args.sizes.split(",")], args.iterations, args.latency, args.jitter,
+        args.concurrency, args.seed, args.data_dir, args.scenarios.split(",") if args.scenarios else None,
+        not args.no_rules,
+    )
+    for key, value in report["meta"].items():
+        print(f"{key}: {value}")
+    for result in report["results"]:
+        print(f"{result['size']} {result['scenario']}:")
+        for key, value in result.items():
+            if key not in ("size", "scenario"):
+                print(f"  {key}: {value}")
+    if args.compare:
+        with open(args.compare) as f:
+            print("\n".join(compare(report, json.load(f))))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
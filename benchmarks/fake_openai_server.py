@@ -0,0 +1,209 @@
+"""Local fake OpenAI-compatible chat completions server.
+
+Answers POST .../chat/completions (plain or stream=True) with canned replies
+shaped like the bot's prompts expect, after a configurable latency, and can
+inject errors (e.g. 429/503) to exercise retries, the circuit breaker and
+hedging without touching OpenRouter.
+
+Usage: python -m benchmarks.fake_openai_server [--port 8001] [--latency 0.2] [--jitter 0.1] [--error-rate 0.1]
+Then point the bot at it: QuickSupportBot(api_key="fake", base_url="http://127.0.0.1:8001/v1")
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CASE_ID = re.compile(r"CASE-\d+", re.IGNORECASE)
+QUOTED = re.compile(r'"(.*?)"', re.DOTALL)
+
+
+def _quoted_text(prompt):
+    match = QUOTED.search(prompt)
+    return match.group(1) if match else prompt
+
+
+def _guess_intent(text):
+    lower = text.lower()
+    if "mention" in lower:
+        return "search"
+    if any(word in lower for word in ("how many", "count", "by ", "stats", "breakdown")):
+        return "analytics"
+    if CASE_ID.search(text):
+        return "update" if any(word in lower for word in ("update", "done", "replied", "mark")) else "query"
+    return "create"
+
+
+def _case_payload(text):
+    return {
+        "seller_name": "Fake Seller", "amazon_case_id": None, "marketplace": "EU", "case_source": "ASTRO",
+        "workstream": "DSR", "issue_type": "Integration issue", "complexity": "Medium", "priority": "Medium",
+        "seller_type": "EXISTING", "api_supported": "General API", "listing_start_date": None, "notes": text,
+    }
+
+
+def _update_payload(text):
+    match = CASE_ID.search(text)
+    return {
+        "case_id": match.group(0).upper() if match else "CASE-0001", "note": text, "sub_status": "INT_WIP",
+        "listing_completion_date": None, "csat_score": None, "feedback_received": None,
+    }
+
+
+def default_reply(body):
+    """Canned reply for the bot's prompt shapes"""
+    prompt = body["messages"][-1]["content"]
+    text = _quoted_text(prompt)
+    if "determine the intent" in prompt:
+        return _guess_intent(text)
+    if "Classify this support message" in prompt:
+        intent = _guess_intent(text)
+        payload = {
+            "create": _case_payload, "update": _update_payload,
+            "query": lambda t: {"case_id": (CASE_ID.search(t) or ["CASE-0001"])[0]},
+            "analytics": lambda t: {"filters": {}, "group_by": "case_status", "description": t},
+            "search": lambda t: {"query": t.lower().split("mention", 1)[1].split(" ", 1)[-1]},
+        }[intent](text)
+        return json.dumps({"intent": intent, "payload": payload})
+    if "Extract case information" in prompt:
+        return json.dumps(_case_payload(text))
+    if "Extract update information" in prompt:
+        return json.dumps(_update_payload(text))
+    if "filters" in prompt:
+        return json.dumps({"filters": {}, "group_by": "case_status", "description": text})
+    return "OK"
+
+
+class FakeOpenAIServer:
+    """Threaded fake server; use as a context manager or start()/stop().
+
+    latency/jitter are seconds per request; model_latency overrides latency
+    per model name (useful for hedging). error_rate is the fraction of
+    requests answered with error_status instead of a completion.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 error_status=503, model_latency=None, reply=None, chunk_size=8):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.model_latency = model_latency or {}
+        self.reply = reply or default_reply
+        self.chunk_size = chunk_size
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    return self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+                with server._lock:
+                    server.requests += 1
+                    failing = random.random() < server.error_rate
+                    if failing:
+                        server.errors += 1
+
+                model = body.get("model", "fake-model")
+                delay = server.model_latency.get(model, server.latency) + random.uniform(0, server.jitter)
+                time.sleep(delay)
+                if failing:
+                    return self._send_json(server.error_status, {"error": {"message": "Injected failure"}})
+
+                content = server.reply(body)
+                usage = {
+                    "prompt_tokens": len(json.dumps(body.get("messages", []))) // 4,
+                    "completion_tokens": max(1, len(content) // 4),
+                }
+                usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+                base = {"id": f"fake-{server.requests}", "created": int(time.time()), "model": model}
+
+                if not body.get("stream"):
+                    return self._send_json(200, dict(
+                        base, object="chat.completion", usage=usage,
+                        choices=[{"index": 0, "finish_reason": "stop",
+                                  "message": {"role": "assistant", "content": content}}],
+                    ))
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                try:
+                    for i in range(0, len(content), server.chunk_size):
+                        chunk = dict(base, object="chat.completion.chunk", choices=[
+                            {"index": 0, "finish_reason": None,
+                             "delta": {"content": content[i:i + server.chunk_size]}},
+                        ])
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                        self.wfile.flush()
+                    final = dict(base, object="chat.completion.chunk", choices=[], usage=usage)
+                    self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode())
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client closed the stream early
+                self.close_connection = True
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(args.host, args.port, args.latency, args.jitter, args.error_rate, args.error_status)
+    print(f"Fake OpenAI-compatible server on {server.base_url} (Ctrl+C to stop)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
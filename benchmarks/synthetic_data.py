@@ -0,0 +1,230 @@
+"""Seeded synthetic cases and update timelines for load tests and benchmarks.
+
+The same seed and arguments always produce the same data, so databases of
+any size can be rebuilt for before/after comparisons. Cases are spread over
+marketplaces, workstreams and specialists with skewed (realistic)
+frequencies; each case walks a sub-status timeline from Case_Created towards
+HANDOVER or CANCELLED, with dated updates along the way.
+
+Usage: python -m benchmarks.synthetic_data --cases 100000 [--db bench.db] [--seed 42] [--specialists 25] [--days 365] [--drop-indexes]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+
+from api_support_bot import QuickSupportBot, WORKSTREAMS, SUB_STATUS_CASE_STATUS
+from bulk_import import IMPORT_COLUMNS, write_cases
+from database import deferred_indexes
+
+MARKETPLACE_WEIGHTS = {"EU": 30, "NA": 25, "EU5": 12, "JP": 8, "AU": 6, "MENA": 6, "SG": 5, "3PX": 5, "ZA": 3}
+CASE_SOURCE_WEIGHTS = {"ASTRO": 70, "WINSTON": 30}
+# Workstreams follow a Zipf-like curve in list order
+WORKSTREAM_WEIGHTS = {workstream: 1 / (i + 1) for i, workstream in enumerate(WORKSTREAMS)}
+COMPLEXITY_WEIGHTS = {"Easy": 35, "Medium": 45, "Hard": 20}
+PRIORITY_WEIGHTS = {"Low": 30, "Medium": 50, "High": 20}
+SELLER_TYPE_WEIGHTS = {"NEW": 40, "EXISTING": 60}
+API_WEIGHTS = {"Product API": 25, "Inventory API": 25, "Orders API": 25, "Payment API": 10, "General API": 15}
+
+# Issue type -> phrases used in case notes and update notes
+ISSUES = {
+    "Integration issue": ["SP-API integration failing", "webhook deliveries missing", "sandbox calls succeed but production fails"],
+    "Authentication": ["token expiry on the refresh flow", "invalid grant during OAuth", "LWA credentials rejected"],
+    "Inventory sync": ["inventory feed rejected", "stock levels out of sync", "feed processing stuck"],
+    "Order sync": ["orders API timing out", "throttling on getOrders", "missing order items"],
+    "Listing errors": ["listing suppressed after upload", "product type attributes rejected", "image upload errors"],
+    "Brand Registry": ["waiting for brand registry approval", "trademark verification pending"],
+    "Onboarding": ["new seller onboarding", "developer profile under review", "app registration questions"],
+}
+
+# Sub-status milestones in timeline order; a case stops somewhere along the way
+TIMELINE = ["Case_Created", "ASSIGNED", "INT_START", "KO_SENT", "INT_WIP", "PMA_DRAF", "PMA", "PMA_FUP_1", "PMA_FUP_2", "HANDOVER"]
+# Sub-statuses where the case waits on the seller
+AWAITING_SUB_STATUSES = {"KO_SENT", "PMA_FUP_1", "PMA_FUP_2"}
+UPDATE_NOTES = {
+    "Case_Created": "Case created from {source}",
+    "ASSIGNED": "Assigned to {specialist}",
+    "INT_START": "Integration kick-off, seller reports {phrase}",
+    "KO_SENT": "Kick-off email sent, waiting for seller details",
+    "INT_WIP": "Working on {phrase}",
+    "PMA_DRAF": "Draft plan shared for {api}",
+    "PMA": "Plan agreed with seller",
+    "PMA_FUP_1": "First follow-up sent about {phrase}",
+    "PMA_FUP_2": "Second follow-up sent, no reply yet",
+    "HANDOVER": "Resolved and handed over to seller",
+    "ON_HOLD": "On hold: {phrase}",
+    "CANCELLED": "Cancelled, seller no longer pursuing {api}",
+    "Note": "Note: seller asked again about {phrase}",
+}
+
+FIRST_NAMES = ["Alice", "Bob", "Carol", "Dan", "Eve", "Farah", "Gus", "Hana", "Ivan", "Jia", "Kofi", "Lena", "Mo", "Nina", "Omar"]
+LAST_NAMES = ["Johnson", "Smith", "Wilson", "Garcia", "Chen", "Okafor", "Novak", "Silva", "Tanaka", "Haddad"]
+SELLER_WORDS = ["Acme", "Bright", "Nova", "Blue", "Urban", "Prime", "Green", "Peak", "Royal", "Swift", "Star", "Home"]
+SELLER_NOUNS = ["Tools", "Retail", "Goods", "Fashion", "Electronics", "Outlet", "Market", "Living", "Supply", "Store"]
+
+
+def _picker(rng, weights):
+    values = list(weights)
+    cumulative = []
+    total = 0
+    for value in values:
+        total += weights[value]
+        cumulative.append(total)
+    return lambda: rng.choices(values, cum_weights=cumulative)[0]
+
+
+def generate_cases(count, seed=42, specialists=25, days=365, end=datetime(2025, 12, 31, 18, 0), max_notes=2):
+    """Yield count (case dict, [(sub_status, note, updated_by, timestamp)]) pairs.
+
+    Case dicts hold every IMPORT_COLUMNS field except case_id, so the case
+    IDs can be allocated when the rows are written.
+    """
+    rng = random.Random(seed)
+    pick = {
+        field: _picker(rng, weights) for field, weights in (
+            ("marketplace", MARKETPLACE_WEIGHTS), ("case_source", CASE_SOURCE_WEIGHTS),
+            ("workstream", WORKSTREAM_WEIGHTS), ("complexity", COMPLEXITY_WEIGHTS),
+            ("priority", PRIORITY_WEIGHTS), ("seller_type", SELLER_TYPE_WEIGHTS),
+            ("api_supported", API_WEIGHTS),
+        )
+    }
+    # A few specialists carry most of the work
+    team = [
+        (f"SPEC{i + 1:03d}", f"{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[(i * 7) % len(LAST_NAMES)]}")
+        for i in range(specialists)
+    ]
+    pick_specialist = _picker(rng, {member: 1 / (i + 1) ** 0.7 for i, member in enumerate(team)})
+    sellers = max(1, count // 4)
+    issue_types = list(ISSUES)
+    start = end - timedelta(days=days)
+
+    for _ in range(count):
+        seller_number = rng.randrange(sellers)
+        specialist_id, specialist_name = pick_specialist()
+        issue_type = rng.choice(issue_types)
+        phrase = rng.choice(ISSUES[issue_type])
+        case = {
+            "amazon_case_id": f"AMZ-{rng.randrange(10 ** 8):08d}" if rng.random() < 0.6 else "",
+            "seller_id": 10000 + seller_number,
+            "seller_name": f"{SELLER_WORDS[seller_number % len(SELLER_WORDS)]} "
+                           f"{SELLER_NOUNS[(seller_number // len(SELLER_WORDS)) % len(SELLER_NOUNS)]} {seller_number}",
+            "specialist_id": specialist_id,
+            "specialist_name": specialist_name,
+            "issue_type": issue_type,
+            "integration_type": "REST API",
+            "notes": f"Seller reports {phrase}",
+            "feedback_received": "No",
+            "csat_score": None,
+            "listing_start_date": "",
+            "listing_completion_date": "",
+        }
+        for field, choose in pick.items():
+            case[field] = choose()
+
+        created = start + timedelta(seconds=rng.randrange(days * 86400))
+        # Older cases are more often handed over, and otherwise further along
+        age = (end - created).days / max(days, 1)
+        if rng.random() < 0.85 * age:
+            reached = len(TIMELINE) - 1
+        else:
+            reached = int(rng.betavariate(1 + 3 * age, 2) * (len(TIMELINE) - 1))
+        sub_statuses = TIMELINE[:reached + 1]
+        if sub_statuses[-1] != "HANDOVER":
+            ending = rng.random()
+            if ending < 0.08:
+                sub_statuses.append("CANCELLED")
+            elif ending < 0.15:
+                sub_statuses.append("ON_HOLD")
+        # Free-form notes land between milestones, never after the final one
+        for _ in range(rng.randint(0, max_notes)):
+            sub_statuses.insert(rng.randint(1, max(1, len(sub_statuses) - 1)), "Note")
+
+        context = {"source": case["case_source"], "specialist": specialist_name, "phrase": phrase, "api": case["api_supported"]}
+        updates = []
+        timestamp = created
+        for sub_status in sub_statuses:
+            by = "System" if sub_status == "Case_Created" else specialist_name
+            updates.append((sub_status, UPDATE_NOTES[sub_status].format(**context), by, timestamp.isoformat()))
+            if sub_status == "INT_START":
+                case["listing_start_date"] = timestamp.date().isoformat()
+            if sub_status == "HANDOVER":
+                case["listing_completion_date"] = timestamp.date().isoformat()
+            timestamp = min(end, timestamp + timedelta(hours=rng.uniform(2, 120)))
+
+        last = sub_statuses[-1]
+        case["last_sub_status"] = last
+        if last == "HANDOVER" and rng.random() < 0.7:
+            case["csat_score"] = float(rng.choices([1, 2, 3, 4, 5], weights=[3, 5, 15, 37, 40])[0])
+            case["feedback_received"] = "Yes"
+        if last in AWAITING_SUB_STATUSES:
+            case["case_status"] = "AWAITING INFORMATION"
+        else:
+            case["case_status"] = SUB_STATUS_CASE_STATUS.get(last, "WIP")
+        case["created_at"] = created.isoformat()
+        case["updated_at"] = updates[-1][3]
+        yield case, updates
+
+
+def populate(bot, count, seed=42, specialists=25, days=365, chunk_size=20000, defer_indexes=False):
+    """Write count generated cases (and their updates) into bot's database.
+
+    Chunks are written with bulk_import.write_cases, as import_cases
+    writes them; defer_indexes is as for import_cases. Returns {"cases",
+    "updates", "seconds", "cases_per_sec"}.
+    """
+    columns = IMPORT_COLUMNS[1:]
+    summary = {"cases": 0, "updates": 0}
+    started = time.perf_counter()
+    generated = generate_cases(count, seed, specialists, days)
+
+    def load():
+        while True:
+            chunk = list(islice(generated, chunk_size))
+            if not chunk:
+                return
+            summary["updates"] += write_cases(
+                bot.db,
+                [[case[column] for column in columns] for case, _ in chunk],
+                [[(note, updated_by, timestamp, sub_status) for sub_status, note, updated_by, timestamp in updates]
+                 for _, updates in chunk],
+            )
+            summary["cases"] += len(chunk)
+
+    try:
+        if defer_indexes:
+            with deferred_indexes(bot.db, "cases"):
+                load()
+        else:
+            load()
+    finally:
+        bot.resources.case_counts = None
+        bot.resources.facets.clear()
+
+    elapsed = time.perf_counter() - started
+    summary["seconds"] = round(elapsed, 3)
+    summary["cases_per_sec"] = round(summary["cases"] / elapsed, 1) if elapsed else 0.0
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=100000)
+    parser.add_argument("--db", help="database path (default: a fresh temp file)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--specialists", type=int, default=25)
+    parser.add_argument("--days", type=int, default=365, help="created_at spread, ending 2025-12-31")
+    parser.add_argument("--chunk-size", type=int, default=20000)
+    parser.add_argument("--drop-indexes", action="store_true", help="drop the case indexes and rebuild them after the load")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), "synthetic.db")
+    bot = QuickSupportBot(db_path=db_path)
+    summary = populate(bot, args.cases, args.seed, args.specialists, args.days, args.chunk_size, args.drop_indexes)
+    bot.db.close()
+
+    print(f"Database: {db_path}")
+    for key, value in summary.items():
+        print(f"  {key}: {value}")
@@ -0,0 +1,255 @@
+"""Bulk case import from CSV or JSONL.
+
+Rows are streamed from the file, validated against the bot's vocabularies,
+given case IDs in blocks and inserted with executemany, one transaction per
+chunk. Invalid rows are skipped and reported with their line number.
+
+Usage: python -m bulk_import cases.csv [--db support_demo.db] [--chunk-size 5000] [--drop-indexes]
+"""
+import argparse
+import csv
+import json
+import random
+import re
+import sys
+import time
+from datetime import datetime
+from itertools import islice
+
+from api_support_bot import (
+    BotResources, QuickSupportBot, MARKETPLACES, CASE_SOURCES, CASE_STATUSES, WORKSTREAMS, COMPLEXITIES,
+    PRIORITIES, SELLER_TYPES, SUB_STATUSES,
+)
+from database import allocate_ids, format_case_id, deferred_indexes, bulk_insert_counters, bulk_insert_search, migrate
+
+# Enumerated columns; matched case-insensitively and stored in canonical form
+IMPORT_ENUMS = {
+    "marketplace": MARKETPLACES,
+    "case_source": CASE_SOURCES,
+    "case_status": CASE_STATUSES,
+    "workstream": WORKSTREAMS,
+    "complexity": COMPLEXITIES,
+    "priority": PRIORITIES,
+    "seller_type": SELLER_TYPES,
+    "last_sub_status": SUB_STATUSES,
+    "feedback_received": ["Yes", "No"],
+}
+_CANONICAL = {field: {value.lower(): value for value in values} for field, values in IMPORT_ENUMS.items()}
+
+DATE_FIELDS = ["listing_start_date", "listing_completion_date"]
+TIMESTAMP_FIELDS = ["created_at", "updated_at"]
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}$")
+
+# Inserted columns and their defaults (as in create_case_from_data); case_id is allocated
+IMPORT_DEFAULTS = {
+    "amazon_case_id": "",
+    "seller_id": None,
+    "seller_name": None,
+    "specialist_id": "SPEC001",
+    "specialist_name": "Demo Specialist",
+    "marketplace": "EU",
+    "case_source": "ASTRO",
+    "case_status": "SUBMITTED",
+    "workstream": "DSR",
+    "listing_start_date": "",
+    "listing_completion_date": "",
+    "issue_type": "General Issue",
+    "complexity": "Medium",
+    "priority": "Medium",
+    "api_supported": "General API",
+    "integration_type": "REST API",
+    "seller_type": "EXISTING",
+    "feedback_received": "No",
+    "csat_score": None,
+    "notes": "",
+    "last_sub_status": "Case_Created",
+    "created_at": None,
+    "updated_at": None,
+}
+IMPORT_COLUMNS = ["case_id"] + list(IMPORT_DEFAULTS)
+
+# Invalid rows kept in the summary; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+
+def read_records(path, fmt=None):
+    """Yield (line_number, dict) from a .csv or .jsonl file without loading it whole"""
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+        elif fmt == "jsonl":
+            for line_number, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        yield line_number, json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield line_number, {"_error": f"Invalid JSON: {e.msg}"}
+        else:
+            raise ValueError(f"Unknown format {fmt!r}; use csv or jsonl")
+
+
+def validate_record(record, now):
+    """Return (row tuple without case_id, None) or (None, error message)"""
+    if not isinstance(record, dict):
+        return None, "Record is not an object"
+    if "_error" in record:
+        return None, record["_error"]
+
+    # Only the fields present need checking; the defaults are already valid
+    row = dict(IMPORT_DEFAULTS)
+    for field, value in record.items():
+        if field not in row:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                continue
+        elif value is None:
+            continue
+        canonical = _CANONICAL.get(field)
+        if canonical is not None:
+            if str(value).lower() not in canonical:
+                return None, f"Invalid {field}: {value!r}"
+            value = canonical[str(value).lower()]
+        row[field] = value
+
+    if not row["seller_name"]:
+        return None, "seller_name is required"
+    for field in DATE_FIELDS:
+        if row[field] and not DATE_PATTERN.match(str(row[field])):
+            return None, f"Invalid {field}: {row[field]!r} (expected YYYY-MM-DD)"
+    for field in TIMESTAMP_FIELDS:
+        if row[field] is None:
+            row[field] = now
+        else:
+            try:
+                datetime.fromisoformat(str(row[field]))
+            except ValueError:
+                return None, f"Invalid {field}: {row[field]!r}"
+    if row["csat_score"] is not None:
+        try:
+            row["csat_score"] = float(row["csat_score"])
+        except (TypeError, ValueError):
+            return None, f"Invalid csat_score: {row['csat_score']!r}"
+        if not 1 <= row["csat_score"] <= 5:
+            return None, f"csat_score out of range: {row['csat_score']}"
+    if row["seller_id"] is None:
+        row["seller_id"] = random.randint(10000, 99999)
+    else:
+        try:
+            row["seller_id"] = int(row["seller_id"])
+        except (TypeError, ValueError):
+            return None, f"Invalid seller_id: {row['seller_id']!r}"
+
+    return tuple(row.values()), None
+
+
+def write_cases(db, rows, updates):
+    """Insert one chunk of cases and their updates; returns the number of updates written.
+
+    rows are IMPORT_COLUMNS tuples without case_id, and updates[i] lists
+    (note, updated_by, timestamp, sub_status) for rows[i]. The chunk takes
+    one block of case IDs and one IMMEDIATE transaction, with the status
+    counters, rollups and notes search indexes updated once for the chunk.
+    """
+    with db.transaction("IMMEDIATE") as conn, bulk_insert_search(conn):
+        first = allocate_ids(conn, "case_id", len(rows))
+        case_ids = [format_case_id(first + i) for i in range(len(rows))]
+        with bulk_insert_counters(conn):
+            conn.executemany(
+                f"INSERT INTO cases ({', '.join(IMPORT_COLUMNS)}) VALUES ({', '.join('?' for _ in IMPORT_COLUMNS)})",
+                [(case_id,) + tuple(row) for case_id, row in zip(case_ids, rows)],
+            )
+        update_rows = [
+            (case_id,) + tuple(update)
+            for case_id, case_updates in zip(case_ids, updates)
+            for update in case_updates
+        ]
+        conn.executemany(
+            "INSERT INTO updates (case_id, note, updated_by, timestamp, sub_status) VALUES (?, ?, ?, ?, ?)",
+            update_rows,
+        )
+    return len(update_rows)
+
+
+def import_cases(bot, records, chunk_size=5000, defer_indexes=False):
+    """Insert validated (line_number, record) pairs as new cases.
+
+    Each chunk of valid rows takes one block of case IDs and is written in
+    one IMMEDIATE transaction together with its "Case imported" updates, so
+    a failure loses at most the chunk in flight. Status counters, rollups
+    and the notes search indexes are updated once per chunk rather than by
+    the per-row triggers. defer_indexes drops the secondary case indexes for
+    the load and rebuilds them once at the end; other connections fall back
+    to table scans meanwhile, so only use it for offline loads.
+
+    Returns {"imported", "skipped", "errors": [(line, message)], "seconds", "rows_per_sec"}.
+    """
+    now = datetime.now().isoformat()
+    summary = {"imported": 0, "skipped": 0, "errors": []}
+    started = time.perf_counter()
+
+    # Initial update row, as create_case_from_data writes
+    sub_status = IMPORT_COLUMNS.index("last_sub_status") - 1
+
+    def write(rows):
+        write_cases(bot.db, rows, [[("Case imported", "Import", now, row[sub_status])] for row in rows])
+        summary["imported"] += len(rows)
+
+    def load():
+        records_iter = iter(records)
+        while True:
+            batch = list(islice(records_iter, chunk_size))
+            if not batch:
+                return
+            rows = []
+            for line_number, record in batch:
+                row, error = validate_record(record, now)
+                if error:
+                    summary["skipped"] += 1
+                    if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+                        summary["errors"].append((line_number, error))
+                else:
+                    rows.append(row)
+            if rows:
+                write(rows)
+
+    try:
+        if defer_indexes:
+            with deferred_indexes(bot.db, "cases"):
+                load()
+        else:
+            load()
+    finally:
+        bot.resources.case_counts = None
+        bot.resources.facets.clear()
+
+    elapsed = time.perf_counter() - started
+    summary["seconds"] = round(elapsed, 3)
+    summary["rows_per_sec"] = round(summary["imported"] / elapsed, 1) if elapsed else 0.0
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help=".csv or .jsonl file")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="default: from the file extension")
+    parser.add_argument("--db", default="support_demo.db")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--drop-indexes", action="store_true", help="drop the case indexes and rebuild them after the load (offline loads only)")
+    args = parser.parse_args()
+
+    # Schema only: a migration tool must not seed the demo cases or open the model response cache
+    resources = BotResources(db_path=args.db, cache=False, analytics_cache=False, use_rules=False, resilience=False, router=False)
+    resources.ensure_initialized(lambda: migrate(resources.db))
+    bot = QuickSupportBot(resources=resources)
+    summary = import_cases(bot, read_records(args.path, args.format), args.chunk_size, args.drop_indexes)
+    bot.db.close()
+
+    for line_number, error in summary.pop("errors"):
+        print(f"  line {line_number}: {error}", file=sys.stderr)
+    for key, value in summary.items():
+        print(f"{key}: {value}")
@@ -0,0 +1,90 @@
+import csv
+import gzip
+import io
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = pq = None
+
+# Export format -> (MIME type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", ".csv"),
+    "csv.gz": ("application/gzip", ".csv.gz"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+# Rows fetched from SQLite and written per step; bounds memory regardless of result size
+EXPORT_CHUNK_SIZE = 5000
+
+# SQLite declared column type -> Parquet type
+_ARROW_TYPES = {"INTEGER": "int64", "REAL": "float64", "TEXT": "string"}
+
+
+def available_formats():
+    """Export formats usable in this environment (Parquet needs pyarrow)"""
+    return [fmt for fmt in EXPORT_FORMATS if fmt != "parquet" or pa is not None]
+
+
+def _chunks(cursor, chunk_size):
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+def _write_csv(fileobj, columns, chunks, compress):
+    raw = gzip.GzipFile(fileobj=fileobj, mode="wb") if compress else fileobj
+    text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(columns)
+    rows = 0
+    for chunk in chunks:
+        writer.writerows(chunk)
+        rows += len(chunk)
+    text.flush()
+    text.detach()  # leave the caller's file open
+    if compress:
+        raw.close()  # writes the gzip trailer
+    return rows
+
+
+def _write_parquet(fileobj, columns, chunks, types):
+    schema = pa.schema([(column, _ARROW_TYPES.get(types.get(column), "string")) for column in columns])
+    rows = 0
+    with pq.ParquetWriter(fileobj, schema) as writer:
+        for chunk in chunks:
+            arrays = [
+                pa.array(
+                    [None if value is None else str(value) for value in values]
+                    if field.type == pa.string() else list(values),
+                    type=field.type,
+                )
+                for field, values in zip(schema, zip(*chunk))
+            ]
+            # One row group per chunk
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            rows += len(chunk)
+    return rows
+
+
+def export_query(conn, sql, params, fileobj, fmt="csv", chunk_size=EXPORT_CHUNK_SIZE, types=None):
+    """Stream a query's rows into a binary file object; return the row count.
+
+    Rows are fetched chunk_size at a time and written before the next fetch,
+    so at most one chunk is held in memory. types maps column names to
+    SQLite declared types and sets the Parquet column types (default TEXT).
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; use one of {', '.join(EXPORT_FORMATS)}")
+    if fmt == "parquet" and pa is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+
+    cursor = conn.execute(sql, params)
+    columns = [description[0] for description in cursor.description]
+    chunks = _chunks(cursor, chunk_size)
+    if fmt == "parquet":
+        return _write_parquet(fileobj, columns, chunks, types or {})
+    return _write_csv(fileobj, columns, chunks, compress=fmt == "csv.gz")
@@ -0,0 +1,804 @@
+import base64
+import json
+import sqlite3
+import threading
+import queue
+from contextlib import contextmanager
+
+# Connection tuning applied to every pooled connection
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -65536,        # 64 MB page cache (negative = KiB)
+    "mmap_size": 268435456,      # 256 MB memory-mapped I/O
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+
+
+class ConnectionPool:
+    """Thread-aware pool of long-lived SQLite connections"""
+
+    def __init__(self, db_path, max_connections=8, pragmas=None, cached_statements=256, timeout=30.0):
+        self.db_path = db_path
+        self.max_connections = max_connections
+        self.pragmas = dict(DEFAULT_PRAGMAS)
+        if pragmas:
+            self.pragmas.update(pragmas)
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = False
+
+    def _connect(self):
+        """Open a new connection and apply pragmas"""
+        # isolation_level=None: we issue BEGIN/COMMIT ourselves in transaction()
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=self.cached_statements,
+        )
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _acquire(self):
+        """Take an idle connection, opening a new one while under the limit"""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._all) < self.max_connections:
+                conn = self._connect()
+                self._all.append(conn)
+                return conn
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise RuntimeError(f"Timed out waiting for a database connection ({self.max_connections} in use)")
+
+    def _release(self, conn):
+        """Return a connection to the pool, discarding any open transaction"""
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection; nested use on the same thread reuses it"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            self._release(conn)
+
+    @contextmanager
+    def transaction(self, mode="DEFERRED"):
+        """Run a block in a transaction: commit on success, rollback on error.
+
+        Nested calls join the outer transaction.
+        """
+        with self.connection() as conn:
+            if conn.in_transaction:
+                yield conn
+                return
+
+            conn.execute(f"BEGIN {mode}")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+
+    def fetchone(self, sql, params=()):
+        """Run a read query and return the first row"""
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def fetchall(self, sql, params=()):
+        """Run a read query and return all rows"""
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def close(self):
+        """Close every connection owned by the pool"""
+        self._closed = True
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait()
+                except queue.Empty:
+                    break
+            for conn in self._all:
+                conn.close()
+            self._all = []
+
+
+# Baseline tables; {name} lets rebuild_table create a copy under another name
+CASES_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS {name} (
+        case_id TEXT NOT NULL UNIQUE,
+        amazon_case_id TEXT,
+        seller_id INTEGER NOT NULL,
+        seller_name TEXT NOT NULL,
+        specialist_id TEXT NOT NULL,
+        specialist_name TEXT NOT NULL,
+        marketplace TEXT NOT NULL,
+        case_source TEXT NOT NULL,
+        case_status TEXT NOT NULL,
+        workstream TEXT NOT NULL,
+        listing_start_date TEXT,
+        listing_completion_date TEXT,
+        issue_type TEXT NOT NULL,
+        complexity TEXT NOT NULL,
+        priority TEXT NOT NULL,
+        api_supported TEXT NOT NULL,
+        integration_type TEXT NOT NULL,
+        seller_type TEXT NOT NULL,
+        feedback_received TEXT DEFAULT 'No',
+        csat_score REAL,
+        notes TEXT,
+        last_sub_status TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        -- Search index key; unlike an implicit rowid it survives VACUUM and table rebuilds
+        id INTEGER PRIMARY KEY
+    )
+'''
+
+UPDATES_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        case_id TEXT NOT NULL,
+        note TEXT NOT NULL,
+        updated_by TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        sub_status TEXT NOT NULL,
+        FOREIGN KEY (case_id) REFERENCES cases(case_id)
+    )
+'''
+
+
+def table_columns(conn, table):
+    """Return {column name: (declared type, notnull, default)} for a table"""
+    return {
+        row[1]: (row[2], row[3], row[4])
+        for row in conn.execute(f"PRAGMA table_info({table})")
+    }
+
+
+def rebuild_table(conn, table, table_sql, fill=None):
+    """Recreate a table from table_sql and copy rows across, keeping indexes and triggers.
+
+    Columns missing from the old table take their value from fill, else their
+    default. Must run inside a transaction.
+    """
+    fill = fill or {}
+    new_table = f"{table}__rebuild"
+    old_columns = table_columns(conn, table)
+    dependent_sql = [
+        row[0] for row in conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type IN ('index', 'trigger') AND tbl_name = ? AND sql IS NOT NULL",
+            (table,)
+        )
+    ]
+
+    conn.execute(f"DROP TABLE IF EXISTS {new_table}")
+    conn.execute(table_sql.format(name=new_table))
+    new_columns = table_columns(conn, new_table)
+
+    columns = [c for c in new_columns if c in old_columns or c in fill]
+    select_exprs = [c if c in old_columns else "?" for c in columns]
+    fill_values = [fill[c] for c in columns if c not in old_columns]
+    conn.execute(
+        f"INSERT INTO {new_table} ({', '.join(columns)}) SELECT {', '.join(select_exprs)} FROM {table}",
+        fill_values
+    )
+
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {new_table} RENAME TO {table}")
+    for sql in dependent_sql:
+        conn.execute(sql)
+
+
+def ensure_columns(table, table_sql, fill=None):
+    """Migration step adding any columns of table_sql missing from table.
+
+    Uses ALTER TABLE ADD COLUMN where SQLite allows it and falls back to a
+    rebuild-and-copy for NOT NULL columns without a default.
+    """
+    def step(conn):
+        existing = table_columns(conn, table)
+        conn.execute(table_sql.format(name="temp.__target"))
+        target = table_columns(conn, "__target")
+        conn.execute("DROP TABLE temp.__target")
+
+        missing = {name: spec for name, spec in target.items() if name not in existing}
+        if not missing:
+            return
+        if any(notnull and default is None for _, notnull, default in missing.values()):
+            rebuild_table(conn, table, table_sql, fill)
+            return
+        for name, (col_type, _, default) in missing.items():
+            default_clause = f" DEFAULT {default}" if default is not None else ""
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}{default_clause}")
+
+    return step
+
+
+def distinct_values(conn, table, column):
+    """Sorted distinct non-null values of an indexed column.
+    
+    Walks the index with one MIN(...) probe per distinct value ("skip scan"),
+    so the cost grows with the number of values rather than rows.
+    """
+    rows = conn.execute(f'''
+        WITH RECURSIVE distinct_values(value) AS (
+            SELECT MIN({column}) FROM {table}
+            UNION ALL
+            SELECT (SELECT MIN({column}) FROM {table} WHERE {column} > value)
+            FROM distinct_values WHERE value IS NOT NULL
+        )
+        SELECT value FROM distinct_values WHERE value IS NOT NULL
+    ''').fetchall()
+    return [row[0] for row in rows]
+
+
+def encode_cursor(values):
+    """Opaque page token for a keyset position (a list of sort-key values)"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(token):
+    """Inverse of encode_cursor; raises ValueError for a malformed token"""
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {token!r}") from e
+
+
+def format_case_id(number):
+    """Render a sequence number as a case ID"""
+    return f"CASE-{number:04d}"
+
+
+def allocate_ids(conn, name, count=1):
+    """Reserve count consecutive values from a sequence and return the first.
+
+    Call inside a BEGIN IMMEDIATE transaction so the increment and the rows
+    using the IDs commit together and concurrent writers serialize.
+    """
+    conn.execute("UPDATE sequences SET value = value + ? WHERE name = ?", (count, name))
+    row = conn.execute("SELECT value FROM sequences WHERE name = ?", (name,)).fetchone()
+    if row is None:
+        raise RuntimeError(f"Unknown sequence: {name}")
+    return row[0] - count + 1
+
+
+def advance_sequence(conn, name, value):
+    """Make sure a sequence will never hand out value or anything below it"""
+    conn.execute("UPDATE sequences SET value = MAX(value, ?) WHERE name = ?", (value, name))
+
+
+def dropped_indexes(conn):
+    """(name, sql) of indexes deferred_indexes dropped and has not rebuilt yet"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS dropped_indexes (
+            name TEXT PRIMARY KEY,
+            tbl_name TEXT NOT NULL,
+            sql TEXT NOT NULL
+        )
+    ''')
+    return conn.execute("SELECT name, sql FROM dropped_indexes ORDER BY name").fetchall()
+
+
+def restore_dropped_indexes(conn):
+    """Recreate recorded indexes that are still missing and return their names.
+
+    Must run inside a write transaction.
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    restored = []
+    for name, sql in dropped_indexes(conn):
+        if name not in existing:
+            conn.execute(sql)
+            restored.append(name)
+        conn.execute("DELETE FROM dropped_indexes WHERE name = ?", (name,))
+    return restored
+
+
+@contextmanager
+def deferred_indexes(pool, table):
+    """Drop table's secondary indexes for the block and rebuild them afterwards.
+
+    Bulk loads into an unindexed table and one index build per index beat
+    updating every index row by row, but queries inside the block fall back
+    to table scans, so this is for offline loads only. The dropped indexes
+    are recorded in dropped_indexes in the same transaction as the drop;
+    they are rebuilt when the block ends, even on error, and otherwise by
+    the next migrate() if the process dies first.
+    """
+    with pool.transaction("IMMEDIATE") as conn:
+        dropped_indexes(conn)
+        indexes = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (table,),
+        ).fetchall()
+        for name, sql in indexes:
+            conn.execute("INSERT OR REPLACE INTO dropped_indexes (name, tbl_name, sql) VALUES (?, ?, ?)", (name, table, sql))
+            conn.execute(f'DROP INDEX "{name}"')
+    try:
+        yield [name for name, _ in indexes]
+    finally:
+        with pool.transaction("IMMEDIATE") as conn:
+            restore_dropped_indexes(conn)
+
+
+# Case columns with per-day counts in daily_rollup (NULL is stored as '')
+ROLLUP_DIMENSIONS = [
+    "workstream", "marketplace", "issue_type", "api_supported",
+    "case_status", "last_sub_status", "specialist_id",
+]
+
+
+def _rollup_triggers():
+    """Triggers keeping daily_rollup and daily_specialist_status in step with cases"""
+    def bump(row, delta, guard=""):
+        statements = [
+            f"""
+            INSERT INTO daily_rollup (dimension, day, value, count)
+            SELECT '{dimension}', DATE({row}.created_at), COALESCE({row}.{dimension}, ''), {delta} {guard}
+            ON CONFLICT(dimension, day, value) DO UPDATE SET count = count + {delta};"""
+            for dimension in ROLLUP_DIMENSIONS
+        ]
+        statements.append(f"""
+            INSERT INTO daily_specialist_status (day, specialist_id, case_status, count)
+            SELECT DATE({row}.created_at), COALESCE({row}.specialist_id, ''), COALESCE({row}.case_status, ''), {delta} {guard}
+            ON CONFLICT(day, specialist_id, case_status) DO UPDATE SET count = count + {delta};""")
+        return "".join(statements)
+
+    # "WHERE true" keeps INSERT ... SELECT ... ON CONFLICT unambiguous for the parser
+    columns = ", ".join(ROLLUP_DIMENSIONS + ["created_at"])
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS trg_rollup_insert AFTER INSERT ON cases BEGIN{bump('NEW', 1, 'WHERE true')}\nEND",
+        f"CREATE TRIGGER IF NOT EXISTS trg_rollup_delete AFTER DELETE ON cases BEGIN{bump('OLD', -1, 'WHERE true')}\nEND",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_rollup_update AFTER UPDATE OF {columns} ON cases
+        WHEN {' OR '.join(f'OLD.{c} IS NOT NEW.{c}' for c in ROLLUP_DIMENSIONS + ['created_at'])}
+        BEGIN{bump('OLD', -1, 'WHERE true')}{bump('NEW', 1, 'WHERE true')}\nEND""",
+    ]
+
+
+
+def _counter_backfills():
+    """trigger name -> statements adding cases with rowid > ? to what that trigger maintains"""
+    return {
+        "trg_case_counts_insert": ['''
+            INSERT INTO case_counts (case_status, count)
+            SELECT case_status, COUNT(*) FROM cases WHERE rowid > ? GROUP BY case_status
+            ON CONFLICT(case_status) DO UPDATE SET count = count + excluded.count
+        '''],
+        "trg_rollup_insert": [
+            f"""
+            INSERT INTO daily_rollup (dimension, day, value, count)
+            SELECT '{dimension}', DATE(created_at), COALESCE({dimension}, ''), COUNT(*)
+            FROM cases WHERE rowid > ? GROUP BY 2, 3
+            ON CONFLICT(dimension, day, value) DO UPDATE SET count = count + excluded.count
+            """
+            for dimension in ROLLUP_DIMENSIONS
+        ] + ['''
+            INSERT INTO daily_specialist_status (day, specialist_id, case_status, count)
+            SELECT DATE(created_at), COALESCE(specialist_id, ''), COALESCE(case_status, ''), COUNT(*)
+            FROM cases WHERE rowid > ? GROUP BY 1, 2, 3
+            ON CONFLICT(day, specialist_id, case_status) DO UPDATE SET count = count + excluded.count
+        '''],
+    }
+
+
+@contextmanager
+def bulk_insert_counters(conn):
+    """Maintain case counters set-based instead of per row for inserts in the block.
+
+    Use inside a write transaction that only inserts into cases: the
+    counter insert triggers are dropped, and on success the new rows are
+    added to the counters with one GROUP BY each before the triggers are
+    recreated. Other connections never see the triggers missing; a failure
+    rolls the drop back with the rest of the transaction.
+    """
+    backfills = _counter_backfills()
+    triggers = conn.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({', '.join('?' for _ in backfills)})",
+        list(backfills),
+    ).fetchall()
+    last_rowid = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM cases").fetchone()[0]
+    for name, _ in triggers:
+        conn.execute(f"DROP TRIGGER {name}")
+    yield
+    for name, sql in triggers:
+        for statement in backfills[name]:
+            conn.execute(statement, (last_rowid,))
+        conn.execute(sql)
+
+
+# FTS index -> (source table, rowid column, text column)
+SEARCH_INDEXES = {
+    "case_notes_fts": ("cases", "id", "notes"),
+    "update_notes_fts": ("updates", "id", "note"),
+}
+
+
+def _search_triggers(indexes=SEARCH_INDEXES):
+    """Triggers keeping each search index in step with its source"""
+    statements = []
+    for index, (table, rowid, column) in indexes.items():
+        add = f"INSERT INTO {index}(rowid, {column}) VALUES (NEW.{rowid}, NEW.{column});"
+        remove = f"INSERT INTO {index}({index}, rowid, {column}) VALUES ('delete', OLD.{rowid}, OLD.{column});"
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS trg_{index}_insert AFTER INSERT ON {table} BEGIN {add} END",
+            f"CREATE TRIGGER IF NOT EXISTS trg_{index}_delete AFTER DELETE ON {table} BEGIN {remove} END",
+            f"""CREATE TRIGGER IF NOT EXISTS trg_{index}_update AFTER UPDATE OF {column} ON {table}
+            WHEN OLD.{column} IS NOT NEW.{column} BEGIN {remove} {add} END""",
+        ]
+    return statements
+
+
+def rebuild_search_indexes(conn):
+    """Re-index all notes from cases and updates, e.g. after editing them with the triggers off"""
+    for index in SEARCH_INDEXES:
+        conn.execute(f"INSERT INTO {index}({index}) VALUES ('rebuild')")
+
+
+@contextmanager
+def bulk_insert_search(conn):
+    """Index notes set-based instead of per row for inserts in the block.
+
+    Like bulk_insert_counters: use inside a write transaction that only
+    inserts into the SEARCH_INDEXES source tables. The search insert
+    triggers are dropped, and on success the new rows are indexed with one
+    INSERT ... SELECT per index before the triggers are recreated; FTS5
+    takes batched inserts far faster than one row per statement.
+    """
+    names = {f"trg_{index}_insert": index for index in SEARCH_INDEXES}
+    triggers = conn.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({', '.join('?' for _ in names)})",
+        list(names),
+    ).fetchall()
+    last_rowids = {}
+    for name, _ in triggers:
+        table, rowid, _ = SEARCH_INDEXES[names[name]]
+        last_rowids[name] = conn.execute(f"SELECT COALESCE(MAX({rowid}), 0) FROM {table}").fetchone()[0]
+        conn.execute(f"DROP TRIGGER {name}")
+    yield
+    for name, sql in triggers:
+        index = names[name]
+        table, rowid, column = SEARCH_INDEXES[index]
+        conn.execute(
+            f"INSERT INTO {index}(rowid, {column}) SELECT {rowid}, {column} FROM {table} WHERE {rowid} > ?",
+            (last_rowids[name],),
+        )
+        conn.execute(sql)
+
+
+def _key_cases_by_id(conn):
+    """Rebuild cases with its id INTEGER PRIMARY KEY unless it already has one"""
+    if not any(row[1] == "id" and row[5] for row in conn.execute("PRAGMA table_info(cases)")):
+        rebuild_table(conn, "cases", CASES_TABLE_SQL)
+
+
+# Steps bringing pre-versioning cases/updates tables up to the current columns.
+# migrate() runs them before any pending migration, since the index migrations
+# name columns that legacy tables may lack
+RECONCILE_COLUMNS = [
+    ensure_columns("cases", CASES_TABLE_SQL, fill={
+        "seller_id": 0,
+        "specialist_id": "",
+        "specialist_name": "",
+        "marketplace": "",
+        "case_source": "",
+        "case_status": "SUBMITTED",
+        "workstream": "",
+        "issue_type": "",
+        "complexity": "Medium",
+        "priority": "Medium",
+        "api_supported": "General API",
+        "integration_type": "REST API",
+        "seller_type": "EXISTING",
+    }),
+    ensure_columns("updates", UPDATES_TABLE_SQL, fill={
+        "updated_by": "System",
+        "sub_status": "Note",
+    }),
+]
+
+
+# Ordered schema migrations: (version, description, steps).
+# Each step is SQL or a callable taking the connection, and must be idempotent.
+MIGRATIONS = [
+    (1, "Secondary and covering indexes for hot queries", [
+        # query_case: latest updates for one case
+        "CREATE INDEX IF NOT EXISTS idx_updates_case_timestamp ON updates(case_id, timestamp)",
+        # show_all_cases: most recently updated first
+        "CREATE INDEX IF NOT EXISTS idx_cases_updated_at ON cases(updated_at)",
+        # execute_analysis filters / group-bys, covering the common status combinations
+        "CREATE INDEX IF NOT EXISTS idx_cases_status ON cases(case_status, marketplace, workstream)",
+        "CREATE INDEX IF NOT EXISTS idx_cases_marketplace ON cases(marketplace, case_status)",
+        "CREATE INDEX IF NOT EXISTS idx_cases_workstream ON cases(workstream, case_status)",
+        "CREATE INDEX IF NOT EXISTS idx_cases_priority ON cases(priority, case_status)",
+        "CREATE INDEX IF NOT EXISTS idx_cases_sub_status ON cases(last_sub_status, case_status)",
+        "CREATE INDEX IF NOT EXISTS idx_cases_specialist ON cases(specialist_id, case_status)",
+        # get_hierarchical_data: ordering key and created-date range
+        "CREATE INDEX IF NOT EXISTS idx_cases_hierarchy ON cases(workstream, marketplace, issue_type, api_supported, last_sub_status)",
+        "CREATE INDEX IF NOT EXISTS idx_cases_created_date ON cases(DATE(created_at))",
+    ]),
+    # migrate() already runs these first; kept so the version history stays complete
+    (2, "Bring pre-versioning cases/updates tables up to the current columns", RECONCILE_COLUMNS),
+    (3, "Sequence table for case ID allocation", [
+        '''
+        CREATE TABLE IF NOT EXISTS sequences (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+        ''',
+        # Seed from the highest existing CASE-n so new IDs never collide
+        '''
+        INSERT OR IGNORE INTO sequences (name, value)
+        SELECT 'case_id', COALESCE(MAX(CAST(SUBSTR(case_id, 6) AS INTEGER)), 0)
+        FROM cases WHERE case_id LIKE 'CASE-%'
+        ''',
+    ]),
+    (4, "Per-status case counters maintained by triggers", [
+        '''
+        CREATE TABLE IF NOT EXISTS case_counts (
+            case_status TEXT PRIMARY KEY,
+            count INTEGER NOT NULL
+        )
+        ''',
+        "DELETE FROM case_counts",
+        "INSERT INTO case_counts (case_status, count) SELECT case_status, COUNT(*) FROM cases GROUP BY case_status",
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_case_counts_insert AFTER INSERT ON cases BEGIN
+            INSERT INTO case_counts (case_status, count) VALUES (NEW.case_status, 1)
+            ON CONFLICT(case_status) DO UPDATE SET count = count + 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_case_counts_delete AFTER DELETE ON cases BEGIN
+            UPDATE case_counts SET count = count - 1 WHERE case_status = OLD.case_status;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_case_counts_status AFTER UPDATE OF case_status ON cases
+        WHEN OLD.case_status IS NOT NEW.case_status BEGIN
+            UPDATE case_counts SET count = count - 1 WHERE case_status = OLD.case_status;
+            INSERT INTO case_counts (case_status, count) VALUES (NEW.case_status, 1)
+            ON CONFLICT(case_status) DO UPDATE SET count = count + 1;
+        END
+        ''',
+    ]),
+    (5, "Keyset pagination indexes for list_cases", [
+        # (sort key, case_id) so a page resumes with a single index seek;
+        # supersedes idx_cases_updated_at
+        "CREATE INDEX IF NOT EXISTS idx_cases_updated_keyset ON cases(updated_at, case_id)",
+        "DROP INDEX IF EXISTS idx_cases_updated_at",
+        "CREATE INDEX IF NOT EXISTS idx_cases_created_keyset ON cases(created_at, case_id)",
+        # The Cases tab's most common filter, already in page order
+        "CREATE INDEX IF NOT EXISTS idx_cases_status_updated ON cases(case_status, updated_at, case_id)",
+    ]),
+    (6, "Daily dashboard rollups maintained by triggers", [
+        '''
+        CREATE TABLE IF NOT EXISTS daily_rollup (
+            dimension TEXT NOT NULL,
+            day TEXT NOT NULL,
+            value TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (dimension, day, value)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS daily_specialist_status (
+            day TEXT NOT NULL,
+            specialist_id TEXT NOT NULL,
+            case_status TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, specialist_id, case_status)
+        ) WITHOUT ROWID
+        ''',
+        "DELETE FROM daily_rollup",
+        "DELETE FROM daily_specialist_status",
+    ] + [
+        f"""
+        INSERT INTO daily_rollup (dimension, day, value, count)
+        SELECT '{dimension}', DATE(created_at), COALESCE({dimension}, ''), COUNT(*)
+        FROM cases GROUP BY DATE(created_at), COALESCE({dimension}, '')
+        """
+        for dimension in ROLLUP_DIMENSIONS
+    ] + [
+        '''
+        INSERT INTO daily_specialist_status (day, specialist_id, case_status, count)
+        SELECT DATE(created_at), COALESCE(specialist_id, ''), COALESCE(case_status, ''), COUNT(*)
+        FROM cases GROUP BY 1, 2, 3
+        ''',
+    ] + _rollup_triggers()),
+    (7, "Full-text search over case notes and update notes", [
+        # Legacy cases tables lack the id key the case notes index uses
+        _key_cases_by_id,
+        # External-content indexes: the text lives only in cases/updates
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS case_notes_fts
+        USING fts5(notes, content='cases', content_rowid='id', tokenize='porter unicode61')
+        """,
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS update_notes_fts
+        USING fts5(note, content='updates', content_rowid='id', tokenize='porter unicode61')
+        """,
+        "INSERT INTO case_notes_fts(case_notes_fts) VALUES ('rebuild')",
+        "INSERT INTO update_notes_fts(update_notes_fts) VALUES ('rebuild')",
+    ] + _search_triggers()),
+]
+
+
+def get_schema_version(conn):
+    """Return the highest applied migration version (0 if none)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def apply_migrations(conn, migrations=MIGRATIONS):
+    """Apply pending migrations in order and return the versions applied"""
+    current = get_schema_version(conn)
+    applied = []
+
+    for version, description, steps in sorted(migrations, key=lambda m: m[0]):
+        if version <= current:
+            continue
+        for step in steps:
+            if callable(step):
+                step(conn)
+            else:
+                conn.execute(step)
+        conn.execute(
+            "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+            (version, description)
+        )
+        applied.append(version)
+
+    return applied
+
+
+def migrate(pool, migrations=MIGRATIONS):
+    """Create or upgrade the schema in one transaction; a version check when current.
+
+    Also rebuilds indexes a crashed deferred_indexes block left dropped.
+    """
+    latest = max(version for version, _, _ in migrations)
+    with pool.connection() as conn:
+        if get_schema_version(conn) >= latest and not dropped_indexes(conn):
+            return []
+
+    # IMMEDIATE takes the write lock up front so concurrent starters serialize
+    with pool.transaction("IMMEDIATE") as conn:
+        conn.execute(CASES_TABLE_SQL.format(name="cases"))
+        conn.execute(UPDATES_TABLE_SQL.format(name="updates"))
+        for step in RECONCILE_COLUMNS:
+            step(conn)
+        applied = apply_migrations(conn, migrations)
+        # A bulk load that died inside deferred_indexes left its indexes dropped
+        restore_dropped_indexes(conn)
+        return applied
+
+
+# Hot queries with fixed SQL; QuickSupportBot.hot_queries adds the ones it builds
+# (list pages, planned analyses, dashboard data). Each must be served by an index
+HOT_QUERIES = {
+    "query_case_updates": (
+        "SELECT note, updated_by, timestamp, sub_status FROM updates WHERE case_id = ? ORDER BY timestamp DESC LIMIT 5",
+        ("CASE-0001",),
+    ),
+    "show_all_cases": (
+        "SELECT case_id, seller_name, marketplace, case_status, priority, issue_type, last_sub_status "
+        "FROM cases ORDER BY updated_at DESC",
+        (),
+    ),
+}
+
+
+# Hot queries allowed to walk a whole index ("SCAN cases USING [COVERING] INDEX");
+# anything else doing so fails check_query_plans
+FULL_INDEX_WALKS = {
+    # Unpaged listing of every case: reads all rows by design, the index only saves the sort
+    "show_all_cases",
+    # First list pages with no selective filter walk the keyset index in order and stop at LIMIT
+    "list_cases_first_page",
+    "list_cases_by_created",
+    # Marketplace filters match a large share of cases, so walking in page order beats sorting
+    "list_cases_by_marketplace",
+    # Unfiltered analyses count every case; a covering index is the cheapest full read
+    "analysis_group_by_status",
+    "analysis_specialist_csat",
+    "analysis_total",
+}
+
+
+def explain_query_plan(conn, sql, params=()):
+    """Return the EXPLAIN QUERY PLAN detail lines for a query"""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def check_query_plans(conn, queries=None, allowed_walks=FULL_INDEX_WALKS):
+    """Return {name: plan} for every hot query that reads a whole stored table.
+    
+    That is a SCAN of a table without an index, or a full index walk ("SCAN
+    t USING INDEX ...") unless the query is named in allowed_walks. Scans
+    of CTEs and subqueries (e.g. "SCAN base" in planned analyses) are fine.
+    Run it after ANALYZE on realistic data; plans on a near-empty database
+    say little.
+    """
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    failures = {}
+    for name, (sql, params) in (queries or HOT_QUERIES).items():
+        plan = explain_query_plan(conn, sql, params)
+        if any(
+            step.startswith("SCAN ") and step.split()[1] in tables
+            and (" USING " not in step or name not in allowed_walks)
+            for step in plan
+        ):
+            failures[name] = plan
+    return failures
+
+
+if __name__ == "__main__":
+    import sys
+
+    # The bot builds most hot queries; opening it also brings the schema up to date
+    from api_support_bot import QuickSupportBot
+
+    bot = QuickSupportBot(db_path=sys.argv[1] if len(sys.argv) > 1 else "support_demo.db", cache=False)
+    queries = bot.hot_queries()
+    with bot.db.connection() as conn:
+        for name, (sql, params) in queries.items():
+            print(f"{name}:")
+            for step in explain_query_plan(conn, sql, params):
+                print(f"    {step}")
+        failures = check_query_plans(conn, queries)
+    bot.db.close()
+
+    if failures:
+        print(f"\n❌ {len(failures)} hot queries scan a whole table or index: {', '.join(failures)}")
+        sys.exit(1)
+    print("\n✅ All hot queries search an index (or are allowed to walk one)")
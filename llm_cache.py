@@ -0,0 +1,121 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+class LLMCache:
+    """Persistent content-addressed cache for chat completion responses.
+
+    Entries are keyed on a hash of (model, messages, temperature, max_tokens),
+    expire after ttl seconds and are evicted least-recently-used once the
+    cache holds more than max_entries rows.
+    """
+
+    def __init__(self, db_path="llm_cache.db", ttl=7 * 24 * 3600, max_entries=10000):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)")
+        self._size = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    @staticmethod
+    def make_key(model, messages, temperature, max_tokens):
+        """Stable hash of everything that determines a completion"""
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return cached content for key, or None on a miss or expired entry"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or (self.ttl and now - row[1] > self.ttl):
+                if row is not None:
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._size -= 1
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def set(self, key, model, content):
+        """Store content under key, evicting least-recently-used rows over the limit"""
+        now = time.time()
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, content, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, model, content, now, now)
+            )
+            if not exists:
+                self._size += 1
+
+            if self._size > self.max_entries:
+                # Evict down to 90% so eviction is amortized over many inserts;
+                # recount since other processes may share the file
+                size = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+                excess = size - int(self.max_entries * 0.9)
+                if excess > 0:
+                    self._conn.execute('''
+                        DELETE FROM llm_cache WHERE key IN (
+                            SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?
+                        )
+                    ''', (excess,))
+                    self.evictions += excess
+                    size -= excess
+                self._size = size
+
+    def clear(self):
+        """Remove every cached entry and reset counters"""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": size,
+        }
+
+    def close(self):
+        """Close the underlying connection"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,164 @@
+import contextvars
+import json
+import threading
+from contextlib import contextmanager
+
+from resilience import LatencyTracker
+
+# Typical seconds per call for each tier until real latencies have been observed
+DEFAULT_TIER_LATENCY = {"fast": 0.6, "balanced": 1.0, "smart": 2.5, "premium": 4.0}
+
+# Call sites that always start on the cheapest tier
+FAST_CALL_SITES = {"intent"}
+
+_budget = contextvars.ContextVar("request_budget", default=None)
+
+
+class RequestBudget:
+    """Latency (seconds) and cost (USD) allowance for the model calls of one request"""
+
+    def __init__(self, latency=None, cost=None):
+        self.latency = latency
+        self.cost = cost
+        self.spent_latency = 0.0
+        self.spent_cost = 0.0
+
+    def fits(self, latency, cost):
+        """Whether a call estimated at latency/cost stays within the budget"""
+        if self.latency is not None and self.spent_latency + latency > self.latency:
+            return False
+        if self.cost is not None and self.spent_cost + cost > self.cost:
+            return False
+        return True
+
+
+class ModelRouter:
+    """Chooses the model tier for each call and escalates on weak results.
+
+    Intent classification starts on the fast tier; other call sites start on
+    the bot's base tier. route() yields the starting tier and then stronger
+    tiers for as long as the caller keeps asking (because validation failed
+    or confidence was below min_confidence) and the estimated latency and
+    cost still fit the current request's budget. The starting tier is also
+    stepped down when it alone would not fit.
+
+    tiers is the tier names from cheapest to strongest; prices maps each to
+    (input, output) USD per million tokens.
+    """
+
+    def __init__(self, tiers, prices, min_confidence=0.75, latency_budget=None, cost_budget=None):
+        self.tiers = list(tiers)
+        self.prices = prices
+        self.min_confidence = min_confidence
+        self.latency_budget = latency_budget
+        self.cost_budget = cost_budget
+        self.latency = {tier: LatencyTracker() for tier in self.tiers}
+
+        self.calls = {}  # call_site -> {tier: count}
+        self.escalations = 0
+        self.budget_limited = 0
+        self.cost = 0.0
+        self.downgraded = {}  # (tier used, base tier) -> uncached calls
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def request(self, latency_budget=None, cost_budget=None):
+        """Scope a budget over every routed call made inside the block (and its threads/tasks)"""
+        token = _budget.set(RequestBudget(
+            self.latency_budget if latency_budget is None else latency_budget,
+            self.cost_budget if cost_budget is None else cost_budget,
+        ))
+        try:
+            yield _budget.get()
+        finally:
+            _budget.reset(token)
+
+    def estimate_latency(self, tier):
+        return self.latency[tier].percentile(0.5) or DEFAULT_TIER_LATENCY.get(tier, 1.0)
+
+    def estimate_cost(self, tier, messages, max_tokens):
+        """Upper-bound cost: prompt size at ~4 characters per token plus max_tokens of output"""
+        prompt_tokens = len(json.dumps(messages)) / 4
+        input_price, output_price = self.prices[tier]
+        return (prompt_tokens * input_price + max_tokens * output_price) / 1e6
+
+    def start_tier(self, call_site, base_tier):
+        return self.tiers[0] if call_site in FAST_CALL_SITES else base_tier
+
+    def route(self, call_site, base_tier, messages, max_tokens):
+        """Yield tiers to try in order; stop iterating once a result is good enough"""
+        budget = _budget.get() or RequestBudget(self.latency_budget, self.cost_budget)
+        index = self.tiers.index(self.start_tier(call_site, base_tier))
+
+        # Step down until the first call fits the budget
+        while index > 0 and not budget.fits(
+            self.estimate_latency(self.tiers[index]), self.estimate_cost(self.tiers[index], messages, max_tokens)
+        ):
+            index -= 1
+            with self._lock:
+                self.budget_limited += 1
+        yield self.tiers[index]
+
+        for tier in self.tiers[index + 1:]:
+            if not budget.fits(self.estimate_latency(tier), self.estimate_cost(tier, messages, max_tokens)):
+                with self._lock:
+                    self.budget_limited += 1
+                return
+            with self._lock:
+                self.escalations += 1
+            yield tier
+
+    def record(self, call_site, tier, base_tier, seconds, usage=None, cached=False):
+        """Account for a finished call against the request budget and the metrics"""
+        cost = 0.0
+        if usage and not cached:
+            input_price, output_price = self.prices[tier]
+            cost = (usage.get("prompt_tokens", 0) * input_price + usage.get("completion_tokens", 0) * output_price) / 1e6
+
+        budget = _budget.get()
+        if budget is not None:
+            budget.spent_latency += seconds
+            budget.spent_cost += cost
+
+        if not cached:
+            self.latency[tier].record(seconds)
+        with self._lock:
+            site = self.calls.setdefault(call_site, {})
+            site[tier] = site.get(tier, 0) + 1
+            self.cost += cost
+            if not cached and self.tiers.index(tier) < self.tiers.index(base_tier):
+                self.downgraded[(tier, base_tier)] = self.downgraded.get((tier, base_tier), 0) + 1
+
+    def saved_latency(self):
+        """Seconds saved by calls run below their base tier, or None without data.
+
+        Each such call is credited with the difference between the observed
+        average latencies of its base tier and the tier it ran on; pairs where
+        either tier has no recorded calls yet are left out.
+        """
+        with self._lock:
+            downgraded = dict(self.downgraded)
+        saved = None
+        for (tier, base_tier), count in downgraded.items():
+            used, base = self.latency[tier].mean(), self.latency[base_tier].mean()
+            if used is None or base is None:
+                continue
+            saved = (saved or 0.0) + count * max(base - used, 0.0)
+        return saved
+
+    def stats(self):
+        """Tier mix per call site and overall, escalations, spend and latency saved"""
+        saved = self.saved_latency()
+        with self._lock:
+            by_tier = {tier: 0 for tier in self.tiers}
+            for site in self.calls.values():
+                for tier, count in site.items():
+                    by_tier[tier] += count
+            return {
+                "calls_by_tier": by_tier,
+                "calls_by_site": {site: dict(tiers) for site, tiers in self.calls.items()},
+                "escalations": self.escalations,
+                "budget_limited": self.budget_limited,
+                "cost_usd": round(self.cost, 6),
+                "saved_latency": round(saved, 3) if saved is not None else None,
+            }
@@ -0,0 +1,62 @@
+import json
+import re
+
+WHITESPACE = re.compile(r"\s*")
+
+
+class PartialJSONObject:
+    """Incrementally parses a streamed JSON object one top-level field at a time.
+
+    feed() takes the next chunk of model output and returns the fields that
+    became complete with it, so callers can act on early fields before the
+    rest of the object has been generated. Leading text such as a ```json
+    fence is skipped.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields = {}
+        self.complete = False
+        self._pos = None  # index after "{" or the last parsed value
+        self._decoder = json.JSONDecoder()
+
+    def feed(self, chunk):
+        """Add chunk and return {name: value} for newly completed fields"""
+        self.buffer += chunk
+        found = {}
+
+        if self._pos is None:
+            start = self.buffer.find("{")
+            if start < 0:
+                return found
+            self._pos = start + 1
+
+        while not self.complete:
+            pos = WHITESPACE.match(self.buffer, self._pos).end()
+            if pos < len(self.buffer) and self.buffer[pos] == ",":
+                pos = WHITESPACE.match(self.buffer, pos + 1).end()
+            if pos >= len(self.buffer):
+                break
+            if self.buffer[pos] == "}":
+                self.complete = True
+                break
+
+            try:
+                name, pos = self._decoder.raw_decode(self.buffer, pos)
+                pos = WHITESPACE.match(self.buffer, pos).end()
+                if self.buffer[pos] != ":":
+                    raise ValueError("expected ':'")
+                pos = WHITESPACE.match(self.buffer, pos + 1).end()
+                value, end = self._decoder.raw_decode(self.buffer, pos)
+            except (ValueError, IndexError):
+                break
+
+            # A value is only final once its delimiter arrives ("4" may still become "4.5")
+            after = WHITESPACE.match(self.buffer, end).end()
+            if after >= len(self.buffer) or self.buffer[after] not in ",}":
+                break
+
+            self.fields[name] = found[name] = value
+            self._pos = end
+
+        return found
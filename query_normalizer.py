@@ -0,0 +1,161 @@
+import re
+
+# Words that carry no meaning for analytics queries
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "with", "and", "or", "to", "at", "from",
+    "is", "are", "was", "were", "be", "do", "does", "have", "has", "there", "that", "which",
+    "how", "many", "much", "what", "me", "show", "give", "list", "get", "tell", "please",
+    "count", "counts", "number", "total", "cases", "case", "all", "currently", "right", "now",
+    "each", "breakdown", "distribution", "split", "stats", "statistics", "overview", "summary", "report",
+}
+
+# Alternative phrasings for enumerated values: phrase -> (field, value)
+SYNONYMS = {
+    "work in progress": ("case_status", "WIP"),
+    "in progress": ("case_status", "WIP"),
+    "awaiting info": ("case_status", "AWAITING INFORMATION"),
+    "waiting for information": ("case_status", "AWAITING INFORMATION"),
+    "on hold": ("case_status", "ON-HOLD"),
+    "done": ("case_status", "COMPLETED"),
+    "complete": ("case_status", "COMPLETED"),
+    "smart connect eu": ("workstream", "STRATEGIC_PRODUCT_SMART_CONNECT_EU"),
+    "smart connect mena": ("workstream", "STRATEGIC_PRODUCT_SMART_CONNECT_MENA"),
+    "smart connect au": ("workstream", "STRATEGIC_PRODUCT_SMART_CONNECT_AU"),
+    "luxury": ("workstream", "LUXURY STORE"),
+    "urgent": ("priority", "High"),
+}
+
+# Dimension words after "by"/"per" -> group_by column
+GROUP_BY_WORDS = {
+    "status": "case_status",
+    "statuses": "case_status",
+    "state": "case_status",
+    "marketplace": "marketplace",
+    "marketplaces": "marketplace",
+    "market": "marketplace",
+    "region": "marketplace",
+    "workstream": "workstream",
+    "workstreams": "workstream",
+    "specialist": "specialist_id",
+    "specialists": "specialist_id",
+    "priority": "priority",
+    "priorities": "priority",
+    "sub status": "last_sub_status",
+    "substatus": "last_sub_status",
+}
+
+# Sub-status codes that are also everyday words; only matched when the query says "sub-status"
+AMBIGUOUS_SUB_STATUSES = {"note", "support"}
+
+SPECIALIST_PATTERN = re.compile(r"\bspec\s*-?\s*(\d{1,4})\b")
+# Words introducing the group-by keys, and what may separate the keys ("by marketplace and priority")
+GROUP_BY_LEAD = r"\b(?:by|per|across|for each|grouped by|broken down by)\s+"
+GROUP_BY_SEPARATOR = r"\s+(?:(?:and|then)\s+)?"
+
+
+def vocabulary_phrase(value):
+    """Lower-case a vocabulary value and turn separators into spaces"""
+    return re.sub(r"[\s_\-]+", " ", value.lower()).strip()
+
+
+class QueryNormalizer:
+    """Maps free-text analytics questions onto the case vocabularies.
+
+    vocabularies is {field: [allowed values]}; fields listed earlier win when
+    two fields share a phrase (e.g. case_status ON-HOLD vs sub-status ON_HOLD),
+    unless the query mentions "sub-status".
+    """
+
+    def __init__(self, vocabularies, synonyms=None, group_by_words=None):
+        self.vocabularies = vocabularies
+        self.group_by_words = group_by_words or GROUP_BY_WORDS
+        # Every key in a "by X and Y" phrase
+        dimension = "(?:" + "|".join(re.escape(w) for w in sorted(self.group_by_words, key=len, reverse=True)) + r")\b"
+        self.dimension_pattern = re.compile(r"\b(" + dimension + ")")
+        self.group_by_pattern = re.compile(f"{GROUP_BY_LEAD}({dimension}(?:{GROUP_BY_SEPARATOR}{dimension})*)")
+        self.dimension_tokens = {token for words in self.group_by_words for token in words.split()}
+
+        # phrase -> [(field, value), ...] in vocabulary priority order
+        self.phrases = {}
+        for field, values in vocabularies.items():
+            for value in values:
+                self.phrases.setdefault(vocabulary_phrase(value), []).append((field, value))
+        for phrase, target in (synonyms or SYNONYMS).items():
+            if target[0] in vocabularies:
+                self.phrases.setdefault(phrase, []).append(target)
+
+        # Longest phrases first so "strategic product smart connect eu" beats "eu"
+        ordered = sorted(self.phrases, key=len, reverse=True)
+        self.phrase_pattern = re.compile(r"\b(" + "|".join(re.escape(p) for p in ordered) + r")\b")
+
+    def clean(self, text):
+        """Lower-case text and collapse punctuation to single spaces"""
+        return re.sub(r"\s+", " ", re.sub(r"[^\w@\s]+", " ", text.lower().replace("_", " "))).strip()
+
+    def normalize(self, text):
+        """Return (entities, group_by, residual_tokens) for a query.
+
+        entities is a frozenset of (field, value) pairs, group_by a tuple of
+        column names in the order asked for (empty without a "by" phrase),
+        and residual_tokens the meaningful words left over, including any
+        dimension word that names neither a filtered nor a grouped field.
+        """
+        cleaned = self.clean(text)
+        prefer_sub_status = "sub status" in cleaned or "substatus" in cleaned
+
+        group_by = ()
+        match = self.group_by_pattern.search(cleaned)
+        if match:
+            columns = [self.group_by_words[word] for word in self.dimension_pattern.findall(match.group(1))]
+            group_by = tuple(dict.fromkeys(columns))
+            cleaned = cleaned[:match.start()] + " " + cleaned[match.end():]
+
+        entities = set()
+        for number in SPECIALIST_PATTERN.findall(cleaned):
+            entities.add(("specialist_id", f"SPEC{int(number):03d}"))
+        cleaned = SPECIALIST_PATTERN.sub(" ", cleaned)
+
+        def take(match):
+            phrase = match.group(1)
+            candidates = self.phrases[phrase]
+            if phrase in AMBIGUOUS_SUB_STATUSES and not prefer_sub_status:
+                return phrase
+            if prefer_sub_status:
+                sub = [c for c in candidates if c[0] == "last_sub_status"]
+                candidates = sub or candidates
+            entities.add(candidates[0])
+            return " "
+
+        cleaned = self.phrase_pattern.sub(take, cleaned)
+
+        # "WIP status", "EU marketplace": a dimension word naming a filtered or grouped field is a label
+        mentioned = {field for field, _ in entities} | set(group_by)
+        cleaned = self.dimension_pattern.sub(
+            lambda match: " " if self.group_by_words[match.group(1)] in mentioned else match.group(1), cleaned
+        )
+
+        residual = set()
+        for token in cleaned.split():
+            if token in STOPWORDS:
+                continue
+            if token in self.dimension_tokens:
+                residual.add(token)
+                continue
+            if len(token) > 3 and token.endswith("s"):
+                token = token[:-1]
+            residual.add(token)
+
+        return frozenset(entities), group_by, frozenset(residual)
+
+    def to_params(self, text, description=None):
+        """Build execute_analysis params straight from the vocabulary match"""
+        entities, group_by, _ = self.normalize(text)
+        filters = {}
+        for field, value in sorted(entities):
+            filters.setdefault(field, []).append(value)
+        return {
+            "filters": filters,
+            # One key stays a plain column name, as the model returns it
+            "group_by": (group_by[0] if len(group_by) == 1 else list(group_by)) or None,
+            "description": description or text.strip().rstrip("?"),
+        }
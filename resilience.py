@@ -0,0 +1,315 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from openai import APIConnectionError, APIStatusError
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the model while the circuit breaker is open"""
+
+
+def is_retryable(error):
+    """True for transient failures (connection drops, timeouts, 429s, 5xx)"""
+    if isinstance(error, APIConnectionError):  # includes APITimeoutError
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUSES
+    return False
+
+
+class RetryPolicy:
+    """Jittered exponential backoff ("full jitter") for retryable errors"""
+
+    def __init__(self, max_attempts=3, base_delay=0.25, max_delay=4.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt):
+        """Seconds to sleep before retry number attempt (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """Stops calling a failing upstream for a while.
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    are refused for reset_timeout seconds; then one trial call is let through
+    (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self._trial = False
+        # Reentrant so ResilientCaller can update its stats and the breaker under one hold
+        self._lock = threading.RLock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        """Whether a call may go ahead now"""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial:
+                    self.trips += 1
+                self.opened_at = time.monotonic()
+                self._trial = False
+
+
+class LatencyTracker:
+    """Rolling window of call latencies for percentile estimates"""
+
+    def __init__(self, window=200):
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def mean(self):
+        """Average of the window; None until any samples exist"""
+        with self._lock:
+            if not self.samples:
+                return None
+            return sum(self.samples) / len(self.samples)
+
+    def percentile(self, p):
+        """p in [0, 1]; None until any samples exist"""
+        with self._lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+class ResilientCaller:
+    """Timeout, retry, circuit-breaker and hedging policy around a completion call.
+
+    call(create, kwargs, site) runs create(**kwargs) with a per-attempt
+    timeout, retries retryable errors with jittered backoff inside an overall
+    deadline, and counts the outcome against the breaker. hedge_models maps
+    a model to its backup: once enough latencies have been seen for that
+    model and call site, a duplicate request to the backup is started on
+    executor when the primary runs past their hedge_percentile latency. The
+    primary runs on the calling thread and its reply is used when it
+    succeeds; otherwise the backup's reply is awaited until the call
+    deadline. call_async has no threads to tie up, so there the first
+    successful reply wins.
+    """
+
+    def __init__(self, timeout=20.0, deadline=45.0, retry=None, breaker=None,
+                 hedge_models=None, hedge_percentile=0.95, min_hedge_samples=20, executor=None):
+        self.timeout = timeout
+        self.deadline = deadline
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = {}  # (model, call site) -> LatencyTracker
+        self.hedge_models = hedge_models or {}
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_samples = min_hedge_samples
+        self.executor = executor
+        # Updated under the breaker's lock, like the breaker state they describe
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "rejected": 0, "hedged": 0, "hedge_wins": 0}
+
+    def tracker(self, model, site=None):
+        """LatencyTracker for one model at one call site"""
+        with self.breaker._lock:
+            return self.latency.setdefault((model, site), LatencyTracker())
+
+    def _count(self, name):
+        with self.breaker._lock:
+            self.stats[name] += 1
+
+    def _hedge_delay(self, kwargs, site):
+        """Seconds to wait before hedging, or None when hedging is off"""
+        hedge_model = self.hedge_models.get(kwargs.get("model"))
+        if not hedge_model or hedge_model == kwargs.get("model") or kwargs.get("stream"):
+            return None
+        latency = self.tracker(kwargs.get("model"), site)
+        if len(latency.samples) < self.min_hedge_samples:
+            return None
+        return latency.percentile(self.hedge_percentile)
+
+    def _attempt(self, create, kwargs, timeout, site):
+        started = time.perf_counter()
+        response = create(timeout=timeout, **kwargs)
+        self.tracker(kwargs.get("model"), site).record(time.perf_counter() - started)
+        return response
+
+    def _attempt_hedged(self, create, kwargs, timeout, delay, give_up_at, site):
+        primary_done = threading.Event()
+        hedge_kwargs = dict(kwargs, model=self.hedge_models[kwargs["model"]])
+
+        def backup():
+            # Only sent when the primary is still running after delay
+            if primary_done.wait(delay):
+                return None
+            self._count("hedged")
+            return create(timeout=timeout, **hedge_kwargs)
+
+        # The primary runs on the calling thread, so a busy executor only delays the backup
+        hedge = self.executor.submit(backup)
+        try:
+            return self._attempt(create, kwargs, timeout, site)
+        except Exception as e:
+            error = e
+        finally:
+            primary_done.set()
+
+        done, _ = wait([hedge], timeout=max(0.0, give_up_at - time.monotonic()))
+        if hedge in done and hedge.exception() is None and hedge.result() is not None:
+            self._count("hedge_wins")
+            return hedge.result()
+        raise error
+
+    def _begin(self):
+        with self.breaker._lock:
+            if not self.breaker.allow():
+                self.stats["rejected"] += 1
+                raise CircuitOpenError("Model service unavailable (circuit open), try again shortly")
+            self.stats["calls"] += 1
+        return time.monotonic() + self.deadline
+
+    def _timeout(self, give_up_at):
+        remaining = give_up_at - time.monotonic()
+        if remaining <= 0:
+            return None
+        return min(self.timeout, remaining)
+
+    def _failed(self, error, attempt, give_up_at):
+        """Record a failed attempt; return the backoff before retrying, or None to give up"""
+        if is_retryable(error) and attempt < self.retry.max_attempts:
+            delay = self.retry.backoff(attempt)
+            if time.monotonic() + delay < give_up_at:
+                self._count("retries")
+                return delay
+        with self.breaker._lock:
+            self.stats["failures"] += 1
+            if is_retryable(error) or isinstance(error, TimeoutError):
+                self.breaker.record_failure()
+            else:
+                # The upstream answered (e.g. a 400), so it is not an outage
+                self.breaker.record_success()
+        return None
+
+    def call(self, create, kwargs, site=None):
+        """Run create(**kwargs) under the policy; raises the last error on failure.
+
+        site names the call site, so hedge delays follow that site's latencies.
+        """
+        give_up_at = self._begin()
+        attempt = 0
+        while True:
+            attempt += 1
+            timeout = self._timeout(give_up_at)
+            try:
+                if timeout is None:
+                    raise TimeoutError("Model call deadline exceeded")
+                delay = self._hedge_delay(kwargs, site) if self.executor is not None else None
+                if delay is None:
+                    response = self._attempt(create, kwargs, timeout, site)
+                else:
+                    response = self._attempt_hedged(create, kwargs, timeout, delay, give_up_at, site)
+            except Exception as e:
+                backoff = self._failed(e, attempt, give_up_at)
+                if backoff is None:
+                    raise
+                time.sleep(backoff)
+                continue
+            self.breaker.record_success()
+            return response
+
+    async def _attempt_async(self, create, kwargs, timeout, site):
+        started = time.perf_counter()
+        response = await create(timeout=timeout, **kwargs)
+        self.tracker(kwargs.get("model"), site).record(time.perf_counter() - started)
+        return response
+
+    async def _attempt_hedged_async(self, create, kwargs, timeout, delay, give_up_at, site):
+        tasks = [asyncio.ensure_future(self._attempt_async(create, kwargs, timeout, site))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return tasks[0].result()
+
+            self._count("hedged")
+            tasks.append(asyncio.ensure_future(create(timeout=timeout, **dict(kwargs, model=self.hedge_models[kwargs["model"]]))))
+            pending = set(tasks)
+            error = None
+            while pending:
+                remaining = give_up_at - time.monotonic()
+                if remaining <= 0:
+                    raise error or TimeoutError("Model call deadline exceeded")
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is tasks[1]:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            # Unlike threads, the losing (or abandoned) request can be cancelled mid-flight
+            for task in tasks:
+                task.cancel()
+
+    async def call_async(self, create, kwargs, site=None):
+        """Async counterpart of call for AsyncOpenAI clients"""
+        give_up_at = self._begin()
+        attempt = 0
+        while True:
+            attempt += 1
+            timeout = self._timeout(give_up_at)
+            try:
+                if timeout is None:
+                    raise TimeoutError("Model call deadline exceeded")
+                delay = self._hedge_delay(kwargs, site)
+                if delay is None:
+                    response = await self._attempt_async(create, kwargs, timeout, site)
+                else:
+                    response = await self._attempt_hedged_async(create, kwargs, timeout, delay, give_up_at, site)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                backoff = self._failed(e, attempt, give_up_at)
+                if backoff is None:
+                    raise
+                await asyncio.sleep(backoff)
+                continue
+            self.breaker.record_success()
+            return response
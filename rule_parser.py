@@ -0,0 +1,208 @@
+import re
+
+from query_normalizer import QueryNormalizer, AMBIGUOUS_SUB_STATUSES, vocabulary_phrase
+
+CASE_ID_PATTERN = re.compile(r"\bCASE-\d+\b", re.IGNORECASE)
+AMAZON_ID_PATTERN = re.compile(r"\bAMZ-\d+\b", re.IGNORECASE)
+DATE_PATTERN = r"(\d{4}-\d{2}-\d{2})"
+CSAT_PATTERN = re.compile(r"\bcsat(?:\s+score)?\s*(?:of|is|=|:)?\s*([1-5](?:\.\d+)?)\b", re.IGNORECASE)
+COMPLETION_PATTERN = re.compile(r"\bcomplet\w*(?:\s+date)?(?:\s+on|\s+is|:)?\s*" + DATE_PATTERN, re.IGNORECASE)
+START_PATTERN = re.compile(r"\bstart\w*(?:\s+date)?(?:\s+on|\s+is|:)?\s*" + DATE_PATTERN, re.IGNORECASE)
+PRIORITY_PATTERN = re.compile(r"\b(high|medium|low)\s+priority\b|\bpriority\s*(?:is|:)?\s*(high|medium|low)\b|\b(urgent)\b", re.IGNORECASE)
+COMPLEXITY_PATTERN = re.compile(r"\b(easy|medium|hard)\s+complexity\b|\bcomplexity\s*(?:is|:)?\s*(easy|medium|hard)\b", re.IGNORECASE)
+SELLER_TYPE_PATTERN = re.compile(r"\b(new|existing)\s+seller\b", re.IGNORECASE)
+API_PATTERN = re.compile(r"\b(product|inventory|orders?|payment|general)\s+api\b", re.IGNORECASE)
+SELLER_PATTERN = re.compile(
+    r"\b(?:for|seller(?:\s+name)?\s*:?)\s+([A-Z0-9][\w&'.\-]*(?:\s+[A-Z0-9][\w&'.\-]*)*)",
+)
+ISSUE_WORDS = re.compile(
+    r"\b(issue|issues|problem|error|errors|fail\w*|bug|trouble|not working|unable|cannot|can't|"
+    r"integration|sync|authentication|onboarding|setup|registry)\b",
+    re.IGNORECASE,
+)
+# Negation cues in punctuation-stripped lower-case text ("don't" -> "don t")
+NEGATION_PATTERN = re.compile(r"\b(?:not|no longer|never|yet|\w+n t)\b")
+# Words either side of a sub-status phrase searched for a negation cue
+NEGATION_WINDOW = (3, 2)
+CREATE_PATTERN = re.compile(r"^\s*(?:new|create|open|log|raise)\b.*\bcase\b", re.IGNORECASE)
+UPDATE_PATTERN = re.compile(r"^\s*(?:update|mark|set|move)\b.*\bCASE-\d+", re.IGNORECASE)
+# "find cases mentioning token expiry", "search notes for 'rate limit'", "which updates say refund"
+SEARCH_PATTERN = re.compile(
+    r"^\s*(?:"
+    r"(?:find|search|look\s+for)\b.*?\b(?:cases?|notes?|updates?)\s+(?:that\s+|which\s+)?"
+    r"(?:mention(?:s|ing)?|about|contain(?:s|ing)?|say(?:s|ing)?|for|referencing)"
+    r"|(?:which|any)\b.*?\b(?:cases?|notes?|updates?)\s+(?:that\s+|which\s+)?"
+    r"(?:mention(?:s|ing)?|contain(?:s|ing)?|say(?:s|ing)?|referencing)"
+    r")\s+(.+)$",
+    re.IGNORECASE,
+)
+
+# Words dropped from search queries; negations stay ("not syncing")
+SEARCH_STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "in", "on", "at", "to", "for", "with", "by", "from", "about",
+    "is", "are", "was", "were", "be", "been", "it", "its", "this", "that", "these", "those", "there",
+    "i", "me", "my", "we", "our", "you", "your", "please", "which", "who", "what", "where", "when",
+    "do", "does", "did", "have", "has", "had", "any", "all", "some", "anything", "something",
+}
+# Words of a search request itself, dropped when the whole message is the query
+SEARCH_COMMAND_WORDS = {
+    "find", "search", "look", "show", "list", "get", "case", "cases", "note", "notes", "update", "updates",
+    "mention", "mentions", "mentioning", "mentioned", "contain", "contains", "containing",
+    "say", "says", "saying", "reference", "references", "referencing",
+}
+
+
+def search_phrase(text):
+    """Text to search for in a "find cases mentioning ..." message, or None"""
+    match = SEARCH_PATTERN.search(text)
+    if not match:
+        return None
+    phrase = match.group(1).strip().strip("\"'`?.!").strip()
+    return phrase or None
+
+
+def search_terms(text, command=False):
+    """Words of text worth matching, space-separated, or None when none are left.
+
+    Drops SEARCH_STOPWORDS, and with command=True (text is the whole
+    message) the SEARCH_COMMAND_WORDS too.
+    """
+    skip = SEARCH_STOPWORDS | SEARCH_COMMAND_WORDS if command else SEARCH_STOPWORDS
+    words = [word for word in re.findall(r"\w+(?:'\w+)*", text) if word.lower() not in skip]
+    return " ".join(words) or None
+
+
+class RuleParser:
+    """Deterministic parser for routine messages, tried before the model.
+
+    Each parse_* method returns the same shape as the matching model-backed
+    extractor, or None when a required field cannot be read from the text so
+    the caller falls back to the model.
+    """
+
+    def __init__(self, case_vocabularies, analytics_normalizer):
+        # case_vocabularies: marketplace, case_source, workstream, sub_status value lists
+        self.analytics_normalizer = analytics_normalizer
+        self.case_normalizer = QueryNormalizer({
+            field: case_vocabularies[field]
+            for field in ("workstream", "marketplace", "case_source")
+        })
+
+        self.sub_statuses = {}
+        for value in case_vocabularies["sub_status"]:
+            self.sub_statuses[vocabulary_phrase(value)] = value
+        self.sub_statuses.update({"handed over": "HANDOVER", "on hold": "ON_HOLD", "cancel": "CANCELLED"})
+        ordered = sorted(self.sub_statuses, key=len, reverse=True)
+        self.sub_status_pattern = re.compile(r"\b(" + "|".join(re.escape(p) for p in ordered) + r")\b")
+
+    def parse_intent(self, text):
+        """Return "create", "update" or "search" for unambiguous command phrasing, else None"""
+        if search_phrase(text):
+            return "search"
+        if UPDATE_PATTERN.search(text):
+            return "update"
+        if CREATE_PATTERN.search(text) and not CASE_ID_PATTERN.search(text):
+            return "create"
+        return None
+
+    def parse_update(self, text):
+        """Parse an update command into the extract_update_info shape.
+        
+        Returns None when a negation cue sits next to the sub-status or more
+        than one sub-status is named.
+        """
+        case_match = CASE_ID_PATTERN.search(text)
+        if not case_match:
+            return None
+
+        note = text[case_match.end():].lstrip(" :-–,").strip()
+        cleaned = re.sub(r"[^\w\s]+", " ", note.lower().replace("_", " "))
+        found = set()
+        for match in self.sub_status_pattern.finditer(cleaned):
+            if match.group(1) in AMBIGUOUS_SUB_STATUSES:
+                continue
+            # "not on hold yet", "no longer PMA": leave the meaning to the model
+            before = cleaned[:match.start()].split()[-NEGATION_WINDOW[0]:]
+            after = cleaned[match.end():].split()[:NEGATION_WINDOW[1]]
+            if NEGATION_PATTERN.search(" ".join(before + [match.group(1)] + after)):
+                return None
+            found.add(self.sub_statuses[match.group(1)])
+        # Several statuses ("moved from PMA to INT_WIP") are the model's call too
+        if len(found) > 1:
+            return None
+        sub_status = found.pop() if found else None
+        if not note or not sub_status:
+            return None
+
+        csat = CSAT_PATTERN.search(text)
+        completion = COMPLETION_PATTERN.search(text)
+        feedback = None
+        if csat or re.search(r"\bfeedback\s+(?:was\s+)?received\b", text, re.IGNORECASE):
+            feedback = "Yes"
+        elif re.search(r"\bno\s+feedback\b", text, re.IGNORECASE):
+            feedback = "No"
+
+        return {
+            "case_id": case_match.group(0).upper(),
+            "note": note,
+            "sub_status": sub_status,
+            "listing_completion_date": completion.group(1) if completion else None,
+            "csat_score": float(csat.group(1)) if csat else None,
+            "feedback_received": feedback,
+        }
+
+    def parse_case(self, text):
+        """Parse a new-case request into the extract_case_info shape"""
+        seller_match = SELLER_PATTERN.search(text)
+        if not seller_match:
+            return None
+        seller_name = seller_match.group(1).strip()
+
+        # The issue is the first clause (after the seller) that reads like a problem
+        issue_type = None
+        for clause in re.split(r"[,;.]\s+|\s+-\s+", text[seller_match.end():]):
+            if ISSUE_WORDS.search(clause):
+                issue_type = re.sub(r"^\s*(?:with|having|has|about|regarding|re:?)\s+", "", clause, flags=re.IGNORECASE)
+                issue_type = re.sub(r"^(?:on|in)\s+\w+\s+marketplace\s+", "", issue_type, flags=re.IGNORECASE).strip()
+                break
+        if not issue_type:
+            return None
+
+        entities, _, _ = self.case_normalizer.normalize(text)
+        found = dict(entities)
+
+        priority = PRIORITY_PATTERN.search(text)
+        complexity = COMPLEXITY_PATTERN.search(text)
+        seller_type = SELLER_TYPE_PATTERN.search(text)
+        api = API_PATTERN.search(text)
+        amazon_id = AMAZON_ID_PATTERN.search(text)
+        start = START_PATTERN.search(text)
+
+        if priority:
+            word = next(g for g in priority.groups() if g).lower()
+            priority = "High" if word == "urgent" else word.capitalize()
+        if api:
+            name = api.group(1).capitalize()
+            api = f"{'Orders' if name.startswith('Order') else name} API"
+
+        return {
+            "seller_name": seller_name,
+            "amazon_case_id": amazon_id.group(0).upper() if amazon_id else None,
+            "marketplace": found.get("marketplace"),
+            "case_source": found.get("case_source"),
+            "workstream": found.get("workstream"),
+            "issue_type": issue_type,
+            "complexity": next(g for g in complexity.groups() if g).capitalize() if complexity else None,
+            "priority": priority,
+            "seller_type": seller_type.group(1).upper() if seller_type else None,
+            "api_supported": api,
+            "listing_start_date": start.group(1) if start else None,
+            "notes": text.strip(),
+        }
+
+    def parse_analytics(self, text):
+        """Build analysis params when every meaningful word maps to the vocabularies"""
+        entities, group_by, residual = self.analytics_normalizer.normalize(text)
+        if residual or not (entities or group_by):
+            return None
+        return self.analytics_normalizer.to_params(text)
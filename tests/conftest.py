@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# Modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_support_bot import QuickSupportBot  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "support.db")
+
+
+@pytest.fixture
+def bot(db_path):
+    """Bot on a fresh seeded database, without model client or caches"""
+    bot = QuickSupportBot(db_path=db_path, cache=False, analytics_cache=False)
+    yield bot
+    bot.db.close()
@@ -0,0 +1,174 @@
+import math
+import random
+import sqlite3
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import pytest
+
+from analysis_planner import PlanError, plan_analysis
+from database import CASES_TABLE_SQL
+
+MARKETPLACES = ["EU", "NA", "JP"]
+STATUSES = ["WIP", "COMPLETED", "ON-HOLD"]
+
+
+def make_rows(count=120, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        created = datetime(2025, 1, 1) + timedelta(hours=rng.randrange(24 * 200))
+        start = created.date() + timedelta(days=rng.randrange(10)) if rng.random() < 0.8 else None
+        completion = start + timedelta(days=rng.randrange(1, 60)) if start and rng.random() < 0.7 else None
+        rows.append({
+            "case_id": f"CASE-{i + 1:04d}",
+            "seller_id": 1000 + i,
+            "seller_name": f"Seller {i}",
+            "specialist_id": f"SPEC{rng.randrange(1, 5):03d}",
+            "specialist_name": "Specialist",
+            "marketplace": rng.choice(MARKETPLACES),
+            "case_source": "ASTRO",
+            "case_status": rng.choice(STATUSES),
+            "workstream": rng.choice(["DSR", "PAID"]),
+            "issue_type": "Feed",
+            "complexity": "Medium",
+            "priority": rng.choice(["Low", "Medium", "High"]),
+            "api_supported": "General API",
+            "integration_type": "REST API",
+            "seller_type": "EXISTING",
+            "csat_score": float(rng.randint(1, 5)) if rng.random() < 0.6 else None,
+            "listing_start_date": start.isoformat() if start else None,
+            "listing_completion_date": completion.isoformat() if completion else None,
+            "created_at": created.isoformat(sep=" "),
+        })
+    return rows
+
+
+@pytest.fixture(scope="module")
+def fixture():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(CASES_TABLE_SQL.format(name="cases"))
+    rows = make_rows()
+    columns = list(rows[0])
+    conn.executemany(
+        f"INSERT INTO cases ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+        [[row[column] for column in columns] for row in rows],
+    )
+    yield conn, rows
+    conn.close()
+
+
+def run(conn, params):
+    sql, values, group_keys, labels = plan_analysis(params)
+    return conn.execute(sql, values).fetchall(), group_keys, labels
+
+
+def days(later, earlier):
+    """julianday(later) - julianday(earlier); date-only values are midnight"""
+    if not later or not earlier:
+        return None
+    return (datetime.fromisoformat(later) - datetime.fromisoformat(earlier)).total_seconds() / 86400
+
+
+def measure(row, field):
+    if field == "csat_score":
+        return row["csat_score"]
+    if field == "listing_days":
+        return days(row["listing_completion_date"], row["listing_start_date"])
+    if field == "completion_days":
+        return days(row["listing_completion_date"], row["created_at"])
+    raise AssertionError(field)
+
+
+def nearest_rank(values, fraction):
+    ordered = sorted(values)
+    return ordered[math.ceil(fraction * len(ordered)) - 1] if ordered else None
+
+
+def grouped(rows, keys):
+    groups = defaultdict(list)
+    for row in rows:
+        groups[tuple(row[key] for key in keys)].append(row)
+    return groups
+
+
+def test_multi_key_counts_and_plain_aggregates(fixture):
+    conn, rows = fixture
+    keys = ["marketplace", "case_status"]
+    result, group_keys, labels = run(conn, {
+        "group_by": keys, "aggregates": ["avg:csat_score", "max:listing_days", "sum:csat_score"],
+    })
+    assert group_keys == keys
+    assert labels == ["cases", "avg csat_score", "max listing_days", "sum csat_score"]
+
+    expected = {}
+    for group, members in grouped(rows, keys).items():
+        csat = [row["csat_score"] for row in members if row["csat_score"] is not None]
+        listing = [value for value in (measure(row, "listing_days") for row in members) if value is not None]
+        expected[group] = (
+            len(members), sum(csat) / len(csat) if csat else None, max(listing) if listing else None, sum(csat) if csat else None,
+        )
+    assert {row[:2]: row[2:] for row in result} == pytest.approx(expected)
+    # Largest groups first
+    assert [row[2] for row in result] == sorted((row[2] for row in result), reverse=True)
+
+
+@pytest.mark.parametrize("fn, fraction", [("median", 0.5), ("p90", 0.9), ("p25", 0.25), ("p99", 0.99)])
+@pytest.mark.parametrize("field", ["csat_score", "listing_days", "completion_days"])
+def test_percentiles_are_nearest_rank_per_group(fixture, fn, fraction, field):
+    conn, rows = fixture
+    result, _, _ = run(conn, {"group_by": "specialist_id", "aggregates": [f"{fn}:{field}"]})
+    expected = {
+        group[0]: nearest_rank([v for v in (measure(row, field) for row in members) if v is not None], fraction)
+        for group, members in grouped(rows, ["specialist_id"]).items()
+    }
+    assert {row[0]: row[2] for row in result} == pytest.approx(expected)
+
+
+def test_ungrouped_aggregates_with_filters(fixture):
+    conn, rows = fixture
+    result, group_keys, _ = run(conn, {
+        "filters": {"marketplace": ["EU", "JP"], "priority": "High"},
+        "aggregates": ["count", "avg:completion_days", {"fn": "median", "field": "csat_score"}],
+    })
+    members = [row for row in rows if row["marketplace"] in ("EU", "JP") and row["priority"] == "High"]
+    completion = [v for v in (measure(row, "completion_days") for row in members) if v is not None]
+    csat = [row["csat_score"] for row in members if row["csat_score"] is not None]
+    assert group_keys == []
+    assert result == [pytest.approx((len(members), sum(completion) / len(completion), nearest_rank(csat, 0.5)))]
+
+
+def test_derived_dimensions(fixture):
+    conn, rows = fixture
+    result, _, _ = run(conn, {"group_by": ["created_month", "workstream"]})
+    expected = {}
+    for row in rows:
+        key = (row["created_at"][:7], row["workstream"])
+        expected[key] = expected.get(key, 0) + 1
+    assert {row[:2]: row[2] for row in result} == expected
+
+
+@pytest.mark.parametrize("params", [
+    {"group_by": "seller_name"},
+    {"group_by": "case_status; DROP TABLE cases"},
+    {"group_by": ["marketplace", "marketplace"]},
+    {"group_by": ["marketplace", "case_status", "priority", "workstream"]},
+    {"filters": {"notes": ["x"]}},
+    {"aggregates": ["stddev:csat_score"]},
+    {"aggregates": ["avg:seller_id"]},
+    {"aggregates": ["avg"]},
+    {"aggregates": ["count:csat_score"]},
+    {"aggregates": ["p0:csat_score"]},
+    {"aggregates": ["p100:csat_score"]},
+    {"aggregates": [42]},
+    {"aggregates": [f"p{n}:csat_score" for n in range(10, 80, 10)]},
+])
+def test_params_outside_the_whitelist_are_rejected(params):
+    with pytest.raises(PlanError):
+        plan_analysis(params)
+
+
+def test_filter_values_are_bound(fixture):
+    conn, _ = fixture
+    result, _, _ = run(conn, {"filters": {"marketplace": ["EU' OR '1'='1"]}})
+    assert result == [(0,)]
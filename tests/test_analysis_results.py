@@ -0,0 +1,82 @@
+import pytest
+
+from api_support_bot import ANALYSIS_TOP_N
+from bulk_import import import_cases
+
+
+@pytest.fixture
+def many_groups(bot):
+    # Specialist SPEC1kk handles kk cases, so group sizes are all distinct
+    records = [
+        (line, {"seller_name": f"Seller {line}", "specialist_id": f"SPEC{100 + size}", "marketplace": "EU"})
+        for line, size in enumerate((size for size in range(1, 26) for _ in range(size)), start=1)
+    ]
+    import_cases(bot, records)
+    return bot
+
+
+def group_counts(bot):
+    return bot.db.fetchall(
+        "SELECT specialist_id, COUNT(*) FROM cases GROUP BY specialist_id ORDER BY COUNT(*) DESC, specialist_id"
+    )
+
+
+def test_top_groups_and_other_bucket(many_groups):
+    expected = group_counts(many_groups)
+    assert len(expected) > ANALYSIS_TOP_N
+
+    result = many_groups.run_analysis({"group_by": "specialist_id", "description": "By specialist"})
+    assert result["group_by"] == ["specialist_id"]
+    assert result["columns"] == ["specialist_id", "cases"]
+    assert [tuple(row) for row in result["rows"]] == expected[:ANALYSIS_TOP_N]
+    assert result["groups"] == len(expected)
+    assert result["total"] == sum(count for _, count in expected) == many_groups.db.fetchone("SELECT COUNT(*) FROM cases")[0]
+    assert result["other"] == {
+        "groups": len(expected) - ANALYSIS_TOP_N,
+        "count": sum(count for _, count in expected[ANALYSIS_TOP_N:]),
+    }
+    # Shown rows and the bucket account for every case
+    assert sum(row[1] for row in result["rows"]) + result["other"]["count"] == result["total"]
+
+
+def test_rendered_text(many_groups):
+    result = many_groups.run_analysis({"group_by": "specialist_id", "description": "By specialist"})
+    lines = result["text"].splitlines()
+    assert lines[0] == "📊 **By specialist**"
+    bullets = [line for line in lines if line.startswith("• ")]
+    assert len(bullets) == ANALYSIS_TOP_N + 1
+    assert bullets[0] == f"• **{result['rows'][0][0]}**: {result['rows'][0][1]} cases"
+    assert bullets[-1] == f"• **Other ({result['other']['groups']} more)**: {result['other']['count']} cases"
+    assert lines[-1] == f"**Total**: {result['total']} cases"
+    assert many_groups.execute_analysis({"group_by": "specialist_id", "description": "By specialist"}) == result["text"]
+
+
+def test_no_bucket_within_the_limit(many_groups):
+    expected = group_counts(many_groups)
+    result = many_groups.run_analysis({"group_by": "specialist_id"}, top_n=len(expected))
+    assert result["other"] is None
+    assert "Other" not in result["text"]
+    # top_n=None shows every group
+    assert len(many_groups.run_analysis({"group_by": "specialist_id"}, top_n=None)["rows"]) == len(expected)
+
+
+def test_multi_key_bucket_with_aggregates(many_groups):
+    result = many_groups.run_analysis(
+        {"group_by": ["marketplace", "specialist_id"], "aggregates": ["avg:csat_score"]}, top_n=5
+    )
+    assert result["columns"] == ["marketplace", "specialist_id", "cases", "avg csat_score"]
+    assert len(result["rows"]) == 5
+    assert sum(row[2] for row in result["rows"]) + result["other"]["count"] == result["total"]
+    assert result["text"].splitlines()[2].startswith(f"• **{result['rows'][0][0]} / {result['rows'][0][1]}**:")
+    assert "· avg csat_score n/a" in result["text"]
+
+
+def test_ungrouped_result(many_groups):
+    result = many_groups.run_analysis({"filters": {"marketplace": ["EU"]}, "aggregates": ["max:csat_score"]})
+    count = many_groups.db.fetchone("SELECT COUNT(*) FROM cases WHERE marketplace = 'EU'")[0]
+    assert (result["groups"], result["total"], result["other"]) == (0, count, None)
+    assert result["text"].splitlines()[-2:] == [
+        f"**Total**: {count} cases",
+        "• max csat_score: n/a",  # no EU case has feedback yet
+    ]
+    assert result["rows"][0][1] is None
@@ -0,0 +1,37 @@
+import pytest
+
+from analytics_cache import SemanticAnalyticsCache
+from api_support_bot import ANALYTICS_VOCABULARIES
+from query_normalizer import QueryNormalizer
+
+
+@pytest.fixture
+def cache():
+    return SemanticAnalyticsCache(QueryNormalizer(ANALYTICS_VOCABULARIES))
+
+
+def params(group_by, **filters):
+    return {"filters": filters, "group_by": group_by}
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("how many EU cases by marketplace and priority", "how many EU cases by marketplace"),
+    ("how many EU cases by marketplace", "how many EU cases by marketplace and priority"),
+    ("average csat by specialist and status", "average csat by specialist"),
+    ("average csat by specialist", "average csat by specialist and status"),
+])
+def test_group_keys_must_all_match(cache, stored, asked):
+    cache.store(stored, params(["marketplace"]))
+    assert cache.lookup(asked) == (None, 0.0)
+
+
+def test_paraphrase_with_the_same_keys_hits(cache):
+    cache.store("average csat by specialist and status", params(["specialist_id", "case_status"]))
+    cached, confidence = cache.lookup("average csat per specialist and status")
+    assert cached["group_by"] == ["specialist_id", "case_status"]
+    assert confidence == 1.0
+
+
+def test_loose_dimension_word_blocks_the_hit(cache):
+    cache.store("breakdown of EU cases by marketplace", params("marketplace", marketplace=["EU"]))
+    assert cache.lookup("EU cases priority breakdown by marketplace") == (None, 0.0)
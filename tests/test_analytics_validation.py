@@ -0,0 +1,52 @@
+import pytest
+
+from api_support_bot import QuickSupportBot
+
+
+def analytics(filters, **payload):
+    return {"intent": "analytics", "payload": dict(payload, filters=filters)}
+
+
+def test_filter_values_are_canonicalized(bot):
+    validated = bot._validate_combined(analytics({"marketplace": ["eu", "Na", "EU"], "case_status": "wip"}))
+    assert validated["payload"]["filters"] == {"marketplace": ["EU", "NA"], "case_status": ["WIP"]}
+
+
+def test_invalid_values_are_dropped_when_some_remain(bot):
+    validated = bot._validate_combined(analytics({"priority": ["high", "Sky-high"]}))
+    assert validated["payload"]["filters"] == {"priority": ["High"]}
+
+
+@pytest.mark.parametrize("filters", [
+    {"marketplace": ["Mars"]},
+    {"marketplace": "Mars"},
+    {"case_status": ["WIP"], "last_sub_status": ["NOT_A_STATUS"]},
+])
+def test_emptied_filter_is_an_error(bot, filters):
+    assert "error" in bot._validate_combined(analytics(filters))
+
+
+def test_missing_filters_mean_no_filter(bot):
+    validated = bot._validate_combined(analytics({"marketplace": None, "priority": []}))
+    assert validated["payload"]["filters"] == {}
+
+
+def test_specialist_ids_are_free_form(bot):
+    validated = bot._validate_combined(analytics({"specialist_id": ["SPEC042"]}))
+    assert validated["payload"]["filters"] == {"specialist_id": ["SPEC042"]}
+
+
+def test_emptied_filter_is_not_cached(db_path):
+    bot = QuickSupportBot(db_path=db_path, cache=False)
+    try:
+        query = "How many cases on Mars?"
+        response = bot._analyze_params(query, {"filters": {"marketplace": ["Mars"]}, "group_by": None})
+        assert response.startswith("❌")
+        assert bot.analytics_cache.lookup(query) == (None, 0.0)
+
+        response = bot._analyze_params(query, {"filters": {"marketplace": ["eu"]}, "group_by": None})
+        assert not response.startswith("❌")
+        params, _ = bot.analytics_cache.lookup(query)
+        assert params["filters"] == {"marketplace": ["EU"]}
+    finally:
+        bot.db.close()
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from async_bot import AsyncQuickSupportBot
+
+
+@pytest.fixture
+def async_bot(db_path):
+    bot = AsyncQuickSupportBot(db_path=db_path, cache=False, analytics_cache=False)
+    yield bot
+    bot.db.close()
+
+
+def test_batch_results_follow_input_order(async_bot):
+    # Answered by the shortcuts and rule parser, so no model is needed
+    messages = [
+        "Show case CASE-0001",
+        "Update CASE-0002: seller replied, mark INT_WIP",
+        "How many WIP cases by marketplace?",
+        "Show case CASE-0099",
+    ]
+    results = asyncio.run(async_bot.process_batch(messages))
+    assert [result["intent"] for result in results] == ["query", "update", "analytics", "query"]
+    assert "CASE-0001" in results[0]["response"]
+    assert results[1]["extracted"]["sub_status"] == "INT_WIP"
+    assert results[3]["response"] == "❌ Case CASE-0099 not found"
+
+
+def test_batch_matches_handle_message(async_bot):
+    messages = ["Show case CASE-0003", "How many EU cases by status?"]
+    batch = asyncio.run(async_bot.process_batch(messages))
+    for message, result in zip(messages, batch):
+        expected = async_bot.handle_message("test", message)
+        assert (result["intent"], result["extracted"], result["response"]) == (
+            expected["intent"], expected["extracted"], expected["response"]
+        )
+
+
+def test_batch_limits_concurrency_and_keeps_order(async_bot):
+    in_flight = []
+    peak = [0]
+
+    async def handle(user_id, message, speculative=None):
+        in_flight.append(message)
+        peak[0] = max(peak[0], len(in_flight))
+        # Later messages finish first
+        await asyncio.sleep(0.01 * (10 - int(message)))
+        in_flight.remove(message)
+        return {"response": message}
+
+    async_bot.handle_message_async = handle
+    results = asyncio.run(async_bot.process_batch([str(i) for i in range(10)], max_concurrency=3))
+    assert [result["response"] for result in results] == [str(i) for i in range(10)]
+    assert peak[0] == 3
+
+
+def test_failing_message_does_not_fail_the_batch(async_bot):
+    handle = async_bot.handle_message_async
+
+    async def flaky(user_id, message, speculative=None):
+        if message == "boom":
+            raise RuntimeError("database is locked")
+        return await handle(user_id, message)
+
+    async_bot.handle_message_async = flaky
+    results = asyncio.run(async_bot.process_batch(["Show case CASE-0001", "boom", "Show case CASE-0002"]))
+    assert results[1]["intent"] == "error"
+    assert results[1]["response"] == "❌ Error: database is locked"
+    assert "CASE-0001" in results[0]["response"] and "CASE-0002" in results[2]["response"]
@@ -0,0 +1,139 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from api_support_bot import QuickSupportBot
+from benchmarks.synthetic_data import populate
+from bulk_import import import_cases
+from database import bulk_insert_counters, deferred_indexes, dropped_indexes
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def case_indexes(bot):
+    return {row[0] for row in bot.db.fetchall(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'cases' AND sql IS NOT NULL"
+    )}
+
+
+def records(count, **fields):
+    return [(line, dict({"seller_name": f"Imported {line}"}, **fields)) for line in range(1, count + 1)]
+
+
+def test_import_validates_and_canonicalizes(bot):
+    summary = import_cases(bot, [
+        (1, {"seller_name": "Acme", "marketplace": "eu", "priority": "HIGH"}),
+        (2, {"seller_name": "", "marketplace": "EU"}),
+        (3, {"seller_name": "Globex", "marketplace": "Mars"}),
+        (4, {"seller_name": "Initech", "csat_score": "7"}),
+    ])
+    assert summary["imported"] == 1
+    assert [line for line, _ in summary["errors"]] == [2, 3, 4]
+    assert bot.db.fetchone("SELECT marketplace, priority FROM cases WHERE seller_name = 'Acme'") == ("EU", "High")
+
+
+def test_import_keeps_indexes_by_default(bot, monkeypatch):
+    before = case_indexes(bot)
+    seen = []
+    monkeypatch.setattr("bulk_import.bulk_insert_counters", _recording(seen))
+    import_cases(bot, records(5))
+    assert seen and all(indexes == before for indexes in seen)
+    assert case_indexes(bot) == before
+
+
+def test_dropped_indexes_are_recorded_and_rebuilt(bot):
+    before = case_indexes(bot)
+    with deferred_indexes(bot.db, "cases") as dropped:
+        assert set(dropped) == before
+        assert not case_indexes(bot)
+        with bot.db.connection() as conn:
+            assert {name for name, _ in dropped_indexes(conn)} == before
+    assert case_indexes(bot) == before
+    with bot.db.connection() as conn:
+        assert dropped_indexes(conn) == []
+
+
+def test_indexes_dropped_by_a_crashed_load_come_back_on_startup(db_path):
+    bot = QuickSupportBot(db_path=db_path, cache=False)
+    before = case_indexes(bot)
+    bot.db.close()
+    # The process dies inside the block, so its cleanup never runs
+    subprocess.run([sys.executable, "-c", (
+        "import os; from database import ConnectionPool, deferred_indexes\n"
+        f"with deferred_indexes(ConnectionPool({db_path!r}), 'cases'):\n"
+        "    os._exit(1)"
+    )], cwd=REPO_ROOT, check=False)
+    conn = sqlite3.connect(db_path)
+    try:
+        assert len(dropped_indexes(conn)) == len(before)
+    finally:
+        conn.close()
+
+    bot = QuickSupportBot(db_path=db_path, cache=False)
+    try:
+        assert case_indexes(bot) == before
+        with bot.db.connection() as conn:
+            assert dropped_indexes(conn) == []
+    finally:
+        bot.db.close()
+
+
+def test_import_with_dropped_indexes_restores_them_on_error(bot):
+    before = case_indexes(bot)
+
+    def failing():
+        yield from records(3)
+        raise RuntimeError("disk on fire")
+
+    with pytest.raises(RuntimeError):
+        import_cases(bot, failing(), chunk_size=2, defer_indexes=True)
+    assert case_indexes(bot) == before
+
+
+def test_populate_writes_cases_and_updates_like_an_import(bot):
+    before = bot.db.fetchone("SELECT COUNT(*) FROM cases")[0]
+    summary = populate(bot, 40, chunk_size=15)
+    assert bot.db.fetchone("SELECT COUNT(*) FROM cases")[0] == before + summary["cases"] == before + 40
+    new_updates = bot.db.fetchone(
+        "SELECT COUNT(*) FROM updates WHERE case_id IN (SELECT case_id FROM cases ORDER BY id DESC LIMIT 40)"
+    )[0]
+    assert new_updates == summary["updates"]
+    # Every generated case starts with its Case_Created update
+    assert bot.db.fetchone(
+        "SELECT COUNT(*) FROM updates WHERE sub_status = 'Case_Created' AND updated_by = 'System'"
+    )[0] >= 40
+    case_id = bot.db.fetchone("SELECT case_id FROM cases ORDER BY id DESC LIMIT 1")[0]
+    assert case_id in [hit["case_id"] for hit in bot.search_cases(
+        bot.db.fetchone("SELECT notes FROM cases WHERE case_id = ?", (case_id,))[0]
+    )]
+
+
+def test_cli_imports_into_a_fresh_database_without_demo_data(tmp_path):
+    source = tmp_path / "legacy.csv"
+    source.write_text("seller_name,marketplace\nAcme,eu\nGlobex,NA\n")
+    subprocess.run(
+        [sys.executable, os.path.join(REPO_ROOT, "bulk_import.py"), str(source), "--db", "target.db"],
+        cwd=tmp_path, check=True, capture_output=True,
+    )
+    conn = sqlite3.connect(str(tmp_path / "target.db"))
+    try:
+        assert conn.execute("SELECT case_id, seller_name FROM cases ORDER BY case_id").fetchall() == [
+            ("CASE-0001", "Acme"), ("CASE-0002", "Globex"),
+        ]
+    finally:
+        conn.close()
+    # No model response cache next to it either
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["legacy.csv", "target.db"]
+
+
+def _recording(seen):
+    """bulk_insert_counters wrapper noting the case indexes present during each chunk"""
+    def wrapper(conn):
+        seen.append({row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'cases' AND sql IS NOT NULL"
+        )})
+        return bulk_insert_counters(conn)
+    return wrapper
@@ -0,0 +1,83 @@
+import sqlite3
+import threading
+
+import pytest
+
+from api_support_bot import QuickSupportBot
+from database import allocate_ids, format_case_id
+
+
+def case_number(case_id):
+    return int(case_id.split("-")[1])
+
+
+def test_blocks_are_contiguous(bot):
+    highest = max(case_number(row[0]) for row in bot.db.fetchall("SELECT case_id FROM cases"))
+    with bot.db.transaction("IMMEDIATE") as conn:
+        first = allocate_ids(conn, "case_id", 5)
+        single = allocate_ids(conn, "case_id")
+        block = allocate_ids(conn, "case_id", 3)
+    assert first == highest + 1
+    assert (single, block) == (first + 5, first + 6)
+
+    case_id, _ = bot.create_case_from_data({"seller_name": "Acme"})
+    assert case_id == format_case_id(first + 9)
+
+
+def test_ids_are_never_reused(bot):
+    case_id, _ = bot.create_case_from_data({"seller_name": "Acme"})
+    with bot.db.transaction() as conn:
+        conn.execute("DELETE FROM updates WHERE case_id = ?", (case_id,))
+        conn.execute("DELETE FROM cases WHERE case_id = ?", (case_id,))
+    assert case_number(bot.create_case_from_data({"seller_name": "Globex"})[0]) == case_number(case_id) + 1
+
+
+def test_concurrent_blocks_do_not_overlap(bot):
+    blocks = []
+
+    def allocate():
+        for size in (1, 4, 10):
+            with bot.db.transaction("IMMEDIATE") as conn:
+                first = allocate_ids(conn, "case_id", size)
+            blocks.append(range(first, first + size))
+
+    threads = [threading.Thread(target=allocate) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    numbers = sorted(number for block in blocks for number in block)
+    assert len(blocks) == 12
+    assert numbers == list(range(numbers[0], numbers[0] + 4 * 15))
+
+
+def test_unknown_sequence(bot):
+    with bot.db.transaction() as conn:
+        with pytest.raises(RuntimeError):
+            allocate_ids(conn, "ticket_id")
+
+
+def test_sequence_seeded_from_legacy_case_ids(db_path):
+    # Pre-sequence database with gaps and an ID that is not CASE-n
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE cases (
+            case_id TEXT PRIMARY KEY, seller_name TEXT NOT NULL, marketplace TEXT NOT NULL,
+            case_status TEXT NOT NULL, workstream TEXT NOT NULL, issue_type TEXT NOT NULL,
+            notes TEXT, created_at TEXT, updated_at TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO cases VALUES (?, ?, 'NA', 'WIP', 'Onboarding', 'Feed error', '', '2024-01-02 10:00:00', '2024-01-02 10:00:00')",
+        [("CASE-0007", "Acme"), ("CASE-0042", "Globex"), ("LEGACY-9000", "Initech")],
+    )
+    conn.commit()
+    conn.close()
+
+    bot = QuickSupportBot(db_path=db_path, cache=False, analytics_cache=False)
+    try:
+        assert bot.db.fetchone("SELECT value FROM sequences WHERE name = 'case_id'")[0] == 42
+        assert bot.create_case_from_data({"seller_name": "Umbrella"})[0] == "CASE-0043"
+    finally:
+        bot.db.close()
@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+from api_support_bot import QuickSupportBot
+from benchmarks.fake_openai_server import FakeOpenAIServer, default_reply
+
+# Misses the keyword shortcuts and the rule parser, so intent needs the model
+MESSAGE = "Acme Corp can't get the inventory feed working"
+
+BAD_COMBINED = {
+    "unknown intent": {"intent": "escalate", "payload": {"case_id": "CASE-0001"}},
+    "payload not an object": {"intent": "create", "payload": "Acme Corp"},
+    "update without case_id": {"intent": "update", "payload": {"note": "Seller replied", "case_id": None}},
+    "query with a bad case_id": {"intent": "query", "payload": {"case_id": "0001"}},
+}
+
+
+def test_unknown_intent_is_rejected(bot):
+    assert "error" in bot._validate_combined(BAD_COMBINED["unknown intent"])
+    assert "error" in bot._validate_combined(BAD_COMBINED["payload not an object"])
+    assert "error" in bot._validate_combined({"intent": None, "payload": {}})
+
+
+def test_update_needs_a_case_id(bot):
+    assert "error" in bot._validate_combined(BAD_COMBINED["update without case_id"])
+    assert "error" in bot._validate_combined(BAD_COMBINED["query with a bad case_id"])
+    validated = bot._validate_combined({"intent": "Update ", "payload": {"case_id": "case-0002", "note": "Done"}})
+    assert validated["intent"] == "update"
+    assert validated["payload"]["case_id"] == "CASE-0002"
+
+
+def test_invalid_enum_values_are_dropped(bot):
+    validated = bot._validate_combined({"intent": "create", "payload": {
+        "seller_name": "Acme", "marketplace": "Mars", "priority": "Sky-high", "workstream": "DSR", "extra": "ignored",
+    }})
+    payload = validated["payload"]
+    assert (payload["marketplace"], payload["priority"], payload["workstream"]) == (None, None, "DSR")
+    assert set(payload) == {
+        "seller_name", "amazon_case_id", "marketplace", "case_source", "workstream", "issue_type",
+        "complexity", "priority", "seller_type", "api_supported", "listing_start_date", "notes",
+    }
+    update = bot._validate_combined({"intent": "update", "payload": {"case_id": "CASE-0001", "sub_status": "NOPE"}})
+    assert update["payload"]["sub_status"] is None
+
+
+def test_search_needs_a_query(bot):
+    assert "error" in bot._validate_combined({"intent": "search", "payload": {"query": "  "}})
+    assert bot._validate_combined({"intent": "search", "payload": {"query": " refund "}})["payload"] == {"query": "refund"}
+
+
+def combined_server(combined_reply):
+    prompts = []
+
+    def reply(body):
+        prompt = body["messages"][-1]["content"]
+        prompts.append(prompt)
+        if "Classify this support message" in prompt:
+            return json.dumps(combined_reply)
+        return default_reply(body)
+
+    return FakeOpenAIServer(reply=reply), prompts
+
+
+@pytest.mark.parametrize("case", list(BAD_COMBINED))
+def test_invalid_combined_response_falls_back_to_two_calls(db_path, case):
+    server, prompts = combined_server(BAD_COMBINED[case])
+    with server:
+        bot = QuickSupportBot(
+            api_key="test", base_url=server.base_url, db_path=db_path, cache=False, analytics_cache=False,
+            resilience=False, combined=True,
+        )
+        try:
+            assert "error" in bot.classify_and_extract(MESSAGE)
+            del prompts[:]
+            result = bot.handle_message("test", MESSAGE)
+        finally:
+            bot.db.close()
+
+    assert result["intent"] == "create"
+    assert result["response"].startswith("✅")
+    assert result["extracted"]["seller_name"] == "Fake Seller"
+    # The rejected combined call (retried up the tiers), then intent and extraction separately
+    kinds = ["combined" if "Classify this support message" in prompt
+             else "intent" if "determine the intent" in prompt
+             else "extract" if "Extract case information" in prompt else "other" for prompt in prompts]
+    assert set(kinds[:-2]) == {"combined"}
+    assert kinds[-2:] == ["intent", "extract"]
+
+
+def test_valid_combined_response_skips_the_second_call(db_path):
+    server, prompts = combined_server({"intent": "create", "payload": {"seller_name": "Acme Corp", "marketplace": "Mars"}})
+    with server:
+        bot = QuickSupportBot(
+            api_key="test", base_url=server.base_url, db_path=db_path, cache=False, analytics_cache=False,
+            resilience=False, combined=True,
+        )
+        try:
+            result = bot.handle_message("test", MESSAGE)
+        finally:
+            bot.db.close()
+
+    assert len(prompts) == 1
+    assert result["intent"] == "create"
+    assert result["extracted"]["seller_name"] == "Acme Corp"
+    assert result["extracted"]["marketplace"] is None
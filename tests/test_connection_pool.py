@@ -0,0 +1,140 @@
+import threading
+
+import pytest
+
+from database import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_connections=2, timeout=0.2)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE items (name TEXT)")
+    yield pool
+    pool.close()
+
+
+def count(pool):
+    return pool.fetchone("SELECT COUNT(*) FROM items")[0]
+
+
+def test_nested_calls_reuse_the_connection(pool):
+    with pool.connection() as outer:
+        with pool.connection() as inner:
+            assert inner is outer
+        with pool.transaction() as conn:
+            assert conn is outer
+            with pool.transaction() as nested:
+                assert nested is outer
+        # Leaving a nested block does not return the connection to the pool
+        assert pool._local.conn is outer
+    assert pool._local.conn is None
+
+    # The released connection is handed out again rather than a new one opened
+    with pool.connection() as again:
+        assert again is outer
+    assert len(pool._all) == 1
+
+
+def test_pragmas_applied(pool):
+    with pool.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+
+def test_transaction_commits(pool):
+    with pool.transaction() as conn:
+        conn.execute("INSERT INTO items VALUES ('a')")
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(count(pool)))
+    thread.start()
+    thread.join()
+    assert seen == [1]
+
+
+def test_transaction_rolls_back_on_error(pool):
+    with pytest.raises(ValueError):
+        with pool.transaction("IMMEDIATE") as conn:
+            conn.execute("INSERT INTO items VALUES ('a')")
+            raise ValueError("boom")
+    assert count(pool) == 0
+    with pool.connection() as conn:
+        assert not conn.in_transaction
+
+
+def test_nested_transaction_joins_the_outer_one(pool):
+    with pytest.raises(ValueError):
+        with pool.transaction() as conn:
+            conn.execute("INSERT INTO items VALUES ('outer')")
+            with pool.transaction() as nested:
+                nested.execute("INSERT INTO items VALUES ('inner')")
+            # The inner block did not commit on its own
+            assert conn.in_transaction
+            raise ValueError("boom")
+    assert count(pool) == 0
+
+
+def test_open_transaction_is_discarded_on_release(pool):
+    with pool.connection() as conn:
+        conn.execute("BEGIN")
+        conn.execute("INSERT INTO items VALUES ('a')")
+    assert count(pool) == 0
+
+
+def test_size_limit(pool):
+    holding = threading.Barrier(3)
+    release = threading.Event()
+    held = []
+
+    def hold():
+        with pool.connection() as conn:
+            held.append(conn)
+            holding.wait()
+            release.wait()
+
+    threads = [threading.Thread(target=hold) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    holding.wait()
+    try:
+        assert held[0] is not held[1]
+        # Both connections are checked out, so a third caller times out
+        with pytest.raises(RuntimeError, match="Timed out"):
+            with pool.connection():
+                pass
+    finally:
+        release.set()
+        for thread in threads:
+            thread.join()
+
+    assert len(pool._all) == 2
+    with pool.connection() as conn:
+        assert conn in held
+
+
+def test_waiter_gets_a_released_connection(pool):
+    release = threading.Event()
+    checked_out = threading.Barrier(3)
+
+    def hold():
+        with pool.connection():
+            checked_out.wait()
+            release.wait()
+
+    threads = [threading.Thread(target=hold) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    checked_out.wait()
+    threading.Timer(0.05, release.set).start()
+    # Blocks until a holder finishes instead of timing out
+    assert count(pool) == 0
+    for thread in threads:
+        thread.join()
+    assert len(pool._all) == 2
+
+
+def test_closed_pool(pool):
+    pool.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        with pool.connection():
+            pass
@@ -0,0 +1,115 @@
+from bulk_import import import_cases
+from database import ROLLUP_DIMENSIONS
+
+
+def assert_case_counts_match(bot):
+    counters = dict(bot.db.fetchall("SELECT case_status, count FROM case_counts WHERE count != 0"))
+    assert counters == dict(bot.db.fetchall("SELECT case_status, COUNT(*) FROM cases GROUP BY case_status"))
+
+
+def assert_rollups_match(bot):
+    for dimension in ROLLUP_DIMENSIONS:
+        rollup = bot.db.fetchall(
+            "SELECT day, value, count FROM daily_rollup WHERE dimension = ? AND count != 0 ORDER BY day, value",
+            (dimension,),
+        )
+        assert rollup == bot.db.fetchall(f"""
+            SELECT DATE(created_at), COALESCE({dimension}, ''), COUNT(*) FROM cases
+            GROUP BY 1, 2 ORDER BY 1, 2
+        """), dimension
+    assert bot.db.fetchall(
+        "SELECT day, specialist_id, case_status, count FROM daily_specialist_status WHERE count != 0 ORDER BY 1, 2, 3"
+    ) == bot.db.fetchall("""
+        SELECT DATE(created_at), COALESCE(specialist_id, ''), COALESCE(case_status, ''), COUNT(*) FROM cases
+        GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+    """)
+
+
+def assert_counters_match(bot):
+    assert_case_counts_match(bot)
+    assert_rollups_match(bot)
+
+
+def import_records(count, **fields):
+    return [(line, dict({"seller_name": f"Imported {line}"}, **fields)) for line in range(1, count + 1)]
+
+
+def test_seeded_counts(bot):
+    assert_counters_match(bot)
+    counts = bot.get_case_counts()
+    assert counts["total"] == bot.db.fetchone("SELECT COUNT(*) FROM cases")[0]
+
+
+def test_counts_follow_creates_and_status_changes(bot):
+    case_id, _ = bot.create_case_from_data({"seller_name": "Acme", "marketplace": "EU", "notes": "Feed failing"})
+    assert_counters_match(bot)
+    # HANDOVER moves the case to COMPLETED
+    assert bot.update_case_status(case_id, "Handed over", "HANDOVER")[0]
+    assert_counters_match(bot)
+    assert bot.get_case_counts()["by_status"]["COMPLETED"] >= 1
+
+
+def test_counts_follow_bulk_updates(bot):
+    case_ids = [row[0] for row in bot.db.fetchall("SELECT case_id FROM cases")]
+    bot.bulk_update_cases([(case_id, "Cancelled in bulk", "CANCELLED", None) for case_id in case_ids])
+    assert_counters_match(bot)
+
+
+def test_counts_follow_bulk_import(bot):
+    summary = import_cases(bot, import_records(25, case_status="wip") + import_records(10), chunk_size=7)
+    assert summary["imported"] == 35
+    assert_counters_match(bot)
+    assert bot.get_case_counts()["by_status"]["WIP"] >= 25
+
+
+def test_counts_follow_deletes(bot):
+    with bot.db.transaction() as conn:
+        conn.execute("DELETE FROM cases WHERE case_id = 'CASE-0001'")
+    assert_counters_match(bot)
+
+
+def test_rollups_follow_backdated_edits(bot):
+    # Moving created_at shifts the case to another day's buckets
+    with bot.db.transaction() as conn:
+        conn.execute("UPDATE cases SET created_at = '2024-03-01 09:00:00', last_sub_status = NULL WHERE case_id = 'CASE-0002'")
+    assert_counters_match(bot)
+
+
+def test_rollup_counts_match_the_table(bot):
+    import_cases(bot, import_records(12, marketplace="na", created_at="2025-02-03T10:00:00"))
+    expected = dict(bot.db.fetchall("""
+        SELECT marketplace, COUNT(*) FROM cases
+        WHERE DATE(created_at) BETWEEN '2025-02-01' AND '2025-02-28' AND marketplace != '' GROUP BY marketplace
+    """))
+    assert bot.get_rollup_counts("marketplace", "2025-02-01", "2025-02-28") == expected == {"NA": 12}
+
+
+def test_sliced_counts_match_the_dashboard_table(bot):
+    for line, (marketplace, workstream, specialist, listing) in enumerate([
+        ("EU", "DSR", "SPEC001", "2025-01-10"), ("EU", "PAID", "SPEC002", "2025-03-01"),
+        ("NA", "DSR", "SPEC002", "2025-01-15"), ("NA", "PAID", "SPEC003", ""),
+    ] * 3, start=1):
+        import_cases(bot, [(line, {
+            "seller_name": f"Imported {line}", "marketplace": marketplace, "workstream": workstream,
+            "specialist_id": specialist, "listing_start_date": listing, "created_at": "2025-02-03T10:00:00",
+        })])
+    created = ("2025-01-01", "2025-12-31")
+    slices = [
+        {"filters": {"marketplace": ["EU"]}},
+        {"filters": {"workstream": ["DSR"], "specialist_id": ["SPEC002"]}},
+        {"listing_start_date": "2025-01-01", "listing_end_date": "2025-01-31"},
+        {"listing_start_date": "2025-01-01", "listing_end_date": "2025-01-31", "filters": {"marketplace": ["NA"]}},
+    ]
+    for case_slice in slices:
+        table = bot.get_hierarchical_data(
+            case_slice.get("listing_start_date"), case_slice.get("listing_end_date"), *created,
+            filters=case_slice.get("filters"),
+        )
+        for dimension in ("marketplace", "workstream", "specialist_id"):
+            assert bot.get_rollup_counts(dimension, *created, **case_slice) == table[dimension].value_counts().to_dict()
+        specialists = bot.get_specialist_status_counts(*created, **case_slice)
+        expected = table.groupby(["specialist_id", "case_status"]).size()
+        assert specialists.set_index(["specialist_id", "case_status"])["count"].to_dict() == expected.to_dict()
+
+    # Without a listing range or filters the rollups answer, over the created range only
+    assert bot.get_rollup_counts("marketplace", *created) == {"EU": 6, "NA": 6}
@@ -0,0 +1,30 @@
+import pytest
+
+from benchmarks.end_to_end import failed, measure
+
+
+@pytest.mark.parametrize("result, expected", [
+    ("❌ Case CASE-9999 not found", True),
+    ({"error": "Invalid group_by"}, True),
+    ((None, "Case not found"), True),
+    ((False, "Case CASE-9999 not found"), True),
+    ("Case CASE-0001: WIP", False),
+    (("CASE-0005", {"seller_name": "Acme"}), False),
+    ({"text": "3 cases"}, False),
+])
+def test_error_results(result, expected):
+    assert failed(result) is expected
+
+
+def test_measure_counts_error_results_and_exceptions():
+    outcomes = iter([(None, "Case not found"), "ok", "❌ Model unavailable", RuntimeError("boom")])
+
+    def call(bot, rng):
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    latencies, _, errors = measure([None], call, 4, seed=1)
+    assert len(latencies) == 4
+    assert errors == 3
@@ -0,0 +1,72 @@
+import csv
+import gzip
+import io
+import sqlite3
+
+import pytest
+
+from bulk_import import import_cases
+from case_export import export_query
+
+
+@pytest.fixture
+def exported_bot(bot):
+    import_cases(bot, [(line, {"seller_name": f"Seller, {line}", "notes": "Line one\nline two"}) for line in range(1, 23)])
+    return bot
+
+
+def read_csv(data):
+    return list(csv.reader(io.StringIO(data.decode("utf-8"), newline="")))
+
+
+@pytest.mark.parametrize("fmt", ["csv", "csv.gz"])
+def test_csv_export_matches_dashboard_rows(exported_bot, fmt):
+    buffer = io.BytesIO()
+    result = exported_bot.export_cases(buffer, fmt, chunk_size=4)
+    expected = exported_bot.get_hierarchical_data()
+    assert result == {"success": True, "rows": len(expected), "format": fmt}
+
+    data = buffer.getvalue()
+    rows = read_csv(gzip.decompress(data) if fmt == "csv.gz" else data)
+    assert rows[0] == list(expected.columns)
+    assert [row[0] for row in rows[1:]] == [str(value) for value in expected.iloc[:, 0]]
+
+
+def test_parquet_export(exported_bot):
+    pq = pytest.importorskip("pyarrow.parquet")
+    buffer = io.BytesIO()
+    result = exported_bot.export_cases(buffer, "parquet", chunk_size=5)
+    table = pq.read_table(io.BytesIO(buffer.getvalue()))
+    assert table.num_rows == result["rows"] == len(exported_bot.get_hierarchical_data())
+    # One row group per chunk
+    assert pq.ParquetFile(io.BytesIO(buffer.getvalue())).num_row_groups == -(-result["rows"] // 5)
+
+
+def test_export_fetches_in_chunks():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (n INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(n,) for n in range(10)])
+    fetched = []
+
+    class Recording:
+        def __init__(self, cursor):
+            self.cursor = cursor
+            self.description = cursor.description
+
+        def fetchmany(self, size):
+            rows = self.cursor.fetchmany(size)
+            fetched.append(len(rows))
+            return rows
+
+    class Connection:
+        def execute(self, sql, params):
+            return Recording(conn.execute(sql, params))
+
+    buffer = io.BytesIO()
+    assert export_query(Connection(), "SELECT n FROM t", [], buffer, chunk_size=3) == 10
+    assert fetched == [3, 3, 3, 1, 0]
+    assert len(read_csv(buffer.getvalue())) == 11
+
+
+def test_unknown_format_is_an_error(bot):
+    assert "error" in bot.export_cases(io.BytesIO(), "xlsx")
@@ -0,0 +1,102 @@
+import os
+
+import pytest
+
+import llm_cache
+from api_support_bot import QuickSupportBot
+from benchmarks.fake_openai_server import FakeOpenAIServer
+from llm_cache import LLMCache
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.db"), ttl=60, max_entries=10)
+    yield cache
+    cache.close()
+
+
+def test_hits_and_misses_are_counted(cache):
+    key = LLMCache.make_key("model", MESSAGES, 0.1, 50)
+    assert cache.get(key) is None
+    cache.set(key, "model", "hi")
+    assert cache.get(key) == "hi"
+    assert cache.get(LLMCache.make_key("model", MESSAGES, 0.2, 50)) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.set("key", "model", "hi")
+    clock[0] += 60
+    assert cache.get("key") == "hi"
+    clock[0] += 1
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(cache, clock):
+    for i in range(10):
+        clock[0] += 1
+        cache.set(f"key{i}", "model", str(i))
+    clock[0] += 1
+    assert cache.get("key0") == "0"
+    clock[0] += 1
+    # Over the limit: evicts down to 90% of max_entries, oldest access first
+    cache.set("key10", "model", "10")
+    assert cache.stats()["evictions"] == 2
+    assert cache.get("key1") is None and cache.get("key2") is None
+    assert cache.get("key0") == "0" and cache.get("key3") == "3" and cache.get("key10") == "10"
+    assert cache.stats()["entries"] == 9
+
+
+def test_entries_persist_across_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = LLMCache(path)
+    first.set("key", "model", "hi")
+    first.close()
+    second = LLMCache(path)
+    try:
+        assert second.get("key") == "hi"
+    finally:
+        second.close()
+
+
+@pytest.fixture(scope="module")
+def server():
+    with FakeOpenAIServer() as server:
+        yield server
+
+
+def test_bot_cache_path_and_call_site_opt_out(server, tmp_path):
+    cache_path = str(tmp_path / "responses.db")
+    bot = QuickSupportBot(
+        api_key="test", base_url=server.base_url, db_path=str(tmp_path / "support.db"), analytics_cache=False,
+        cache_path=cache_path,
+    )
+    message = "Acme Corp can't get the inventory feed working"
+    try:
+        assert os.path.exists(cache_path)
+        before = server.requests
+        assert bot.determine_intent(message) == bot.determine_intent(message)
+        assert server.requests - before == 1
+        assert bot.cache.stats()["hits"] == 1
+
+        bot.cache_opt_out.add("intent")
+        before = server.requests
+        bot.determine_intent(message)
+        bot.determine_intent(message)
+        assert server.requests - before == 2
+        assert bot.cache.stats()["hits"] == 1
+    finally:
+        bot.cache.close()
+        bot.db.close()
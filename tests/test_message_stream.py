@@ -0,0 +1,67 @@
+import pytest
+
+import model_router
+from api_support_bot import QuickSupportBot
+from benchmarks.fake_openai_server import FakeOpenAIServer
+
+# Misses the keyword shortcuts and the rule parser, so intent needs the model
+MESSAGE = "Acme Corp can't get the inventory feed working"
+
+
+@pytest.fixture(scope="module")
+def server():
+    with FakeOpenAIServer() as server:
+        yield server
+
+
+def model_bot(server, db_path, **kwargs):
+    return QuickSupportBot(
+        api_key="test", base_url=server.base_url, db_path=db_path, cache=False, analytics_cache=False, **kwargs
+    )
+
+
+def test_stream_uses_combined_mode(server, db_path):
+    bot = model_bot(server, db_path, combined=True)
+    before = server.requests
+    events = list(bot.handle_message_stream("test", MESSAGE))
+    bot.db.close()
+    assert events[-1]["intent"] == "create"
+    assert events[-1]["response"].startswith("✅")
+    # One classify-and-extract call, no separate streamed extraction
+    assert server.requests - before == 1
+
+
+def test_stream_uses_speculation(server, db_path):
+    bot = model_bot(server, db_path, speculative=True)
+    events = list(bot.handle_message_stream("test", MESSAGE))
+    bot.db.close()
+    assert events[-1]["speculation"]["used"] == ["create"]
+    assert events[-1]["response"].startswith("✅")
+
+
+def test_stream_runs_in_a_request_budget(server, db_path):
+    bot = model_bot(server, db_path)
+    budgets = []
+    determine_intent = bot.determine_intent
+
+    def recording(message):
+        budgets.append(model_router._budget.get())
+        return determine_intent(message)
+
+    bot.determine_intent = recording
+    events = bot.handle_message_stream("test", MESSAGE)
+    assert "progress" in next(events)
+    # The budget stays inside the stream, not in the caller's context
+    assert model_router._budget.get() is None
+    result = list(events)[-1]
+    bot.db.close()
+    assert budgets and budgets[0] is not None
+    assert result["response"].startswith("✅")
+
+
+def test_stream_matches_handle_message_without_model(bot):
+    message = "Update CASE-0001: seller replied, mark INT_WIP"
+    events = list(bot.handle_message_stream("test", message))
+    assert [event for event in events if "progress" in event]
+    assert events[-1]["extracted"]["sub_status"] == "INT_WIP"
+    assert bot.query_case("CASE-0001")[0]["last_sub_status"] == "INT_WIP"
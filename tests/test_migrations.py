@@ -0,0 +1,95 @@
+import sqlite3
+
+from api_support_bot import QuickSupportBot
+from database import MIGRATIONS, get_schema_version, table_columns
+
+
+# An early cases/updates layout: no last_sub_status, amazon_case_id,
+# feedback_received or csat_score, and updates without sub_status/updated_by
+LEGACY_SCHEMA = [
+    """
+    CREATE TABLE cases (
+        case_id TEXT PRIMARY KEY,
+        seller_name TEXT NOT NULL,
+        marketplace TEXT NOT NULL,
+        case_status TEXT NOT NULL,
+        workstream TEXT NOT NULL,
+        issue_type TEXT NOT NULL,
+        notes TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE updates (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        case_id TEXT NOT NULL,
+        note TEXT NOT NULL,
+        timestamp TEXT NOT NULL
+    )
+    """,
+]
+
+LEGACY_CASES = [
+    ("CASE-0001", "Acme", "NA", "WIP", "Onboarding", "Feed error", "Inventory feed rejected", "2024-01-02 10:00:00", "2024-01-03 10:00:00"),
+    ("CASE-0002", "Globex", "EU", "COMPLETED", "Integration", "Auth", "Token refresh failing", "2024-01-05 10:00:00", "2024-01-06 10:00:00"),
+    ("CASE-0003", "Initech", "EU", "WIP", "Onboarding", "Orders", "Orders missing", "2024-02-01 10:00:00", "2024-02-02 10:00:00"),
+]
+
+
+def make_legacy_db(path):
+    conn = sqlite3.connect(path)
+    for sql in LEGACY_SCHEMA:
+        conn.execute(sql)
+    conn.executemany("INSERT INTO cases VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", LEGACY_CASES)
+    conn.execute(
+        "INSERT INTO updates (case_id, note, timestamp) VALUES ('CASE-0001', 'Asked seller for the feed file', '2024-01-03 10:00:00')"
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_legacy_database_migrates(db_path):
+    make_legacy_db(db_path)
+    bot = QuickSupportBot(db_path=db_path, cache=False, analytics_cache=False)
+    try:
+        with bot.db.connection() as conn:
+            assert get_schema_version(conn) == max(version for version, _, _ in MIGRATIONS)
+            assert {"last_sub_status", "amazon_case_id", "csat_score", "specialist_id"} <= set(table_columns(conn, "cases"))
+            assert {"sub_status", "updated_by"} <= set(table_columns(conn, "updates"))
+            indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert "idx_cases_sub_status" in indexes
+
+        # Existing rows survive, with fill values for the new NOT NULL columns
+        assert bot.db.fetchone("SELECT COUNT(*) FROM cases")[0] == len(LEGACY_CASES)
+        case, updates = bot.query_case("CASE-0001")
+        assert case["seller_name"] == "Acme"
+        assert case["priority"] == "Medium"
+        assert updates == [("Asked seller for the feed file", "System", "2024-01-03 10:00:00", "Note")]
+
+        counts = dict(bot.db.fetchall("SELECT case_status, count FROM case_counts WHERE count > 0"))
+        assert counts == dict(bot.db.fetchall("SELECT case_status, COUNT(*) FROM cases GROUP BY case_status"))
+        assert [hit["case_id"] for hit in bot.search_cases("feed")] == ["CASE-0001"]
+    finally:
+        bot.db.close()
+
+
+def test_migrations_are_idempotent(db_path):
+    make_legacy_db(db_path)
+    QuickSupportBot(db_path=db_path, cache=False).db.close()
+    bot = QuickSupportBot(db_path=db_path, cache=False)
+    try:
+        assert bot.db.fetchone("SELECT COUNT(*) FROM cases")[0] == len(LEGACY_CASES)
+    finally:
+        bot.db.close()
+
+
+def test_case_notes_search_is_keyed_on_id(bot):
+    with bot.db.connection() as conn:
+        assert any(row[1] == "id" and row[5] for row in conn.execute("PRAGMA table_info(cases)"))
+        sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'case_notes_fts'").fetchone()[0]
+        triggers = [row[0] for row in conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_case_notes_fts_%'"
+        )]
+    assert "content_rowid='id'" in sql
+    assert len(triggers) == 3 and all("NEW.rowid" not in sql and "OLD.rowid" not in sql for sql in triggers)
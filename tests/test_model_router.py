@@ -0,0 +1,30 @@
+from model_router import ModelRouter
+
+TIERS = ["fast", "balanced", "smart"]
+PRICES = {"fast": (0.1, 0.4), "balanced": (1.0, 4.0), "smart": (3.0, 15.0)}
+
+
+def test_no_saved_latency_until_both_tiers_are_observed():
+    router = ModelRouter(TIERS, PRICES)
+    router.record("intent", "fast", "balanced", 0.2)
+    assert router.stats()["saved_latency"] is None
+
+    router.record("extract_case", "balanced", "balanced", 1.0)
+    router.record("extract_case", "balanced", "balanced", 1.4)
+    # Two intent calls on fast at an average of 0.3 s against 1.2 s on balanced
+    router.record("intent", "fast", "balanced", 0.4)
+    assert router.stats()["saved_latency"] == round(2 * (1.2 - 0.3), 3)
+
+
+def test_cached_calls_save_nothing():
+    router = ModelRouter(TIERS, PRICES)
+    router.record("extract_case", "balanced", "balanced", 1.0)
+    router.record("intent", "fast", "balanced", 0.0, cached=True)
+    assert router.stats()["saved_latency"] is None
+
+
+def test_budget_steps_down_the_start_tier():
+    router = ModelRouter(TIERS, PRICES)
+    with router.request(latency_budget=1.5):
+        assert next(router.route("extract_case", "smart", [], 100)) == "balanced"
+    assert router.stats()["budget_limited"] == 1
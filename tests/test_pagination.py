@@ -0,0 +1,52 @@
+import pytest
+
+from bulk_import import import_cases
+
+
+@pytest.fixture
+def many_cases(bot):
+    # Shared timestamps, so pages must break ties on case_id
+    records = [
+        (line, {"seller_name": f"Seller {line}", "marketplace": "NA" if line % 3 else "EU",
+                "created_at": f"2025-01-{1 + line % 5:02d}T09:00:00", "updated_at": f"2025-02-{1 + line % 4:02d}T09:00:00"})
+        for line in range(1, 38)
+    ]
+    import_cases(bot, records)
+    return bot
+
+
+def all_pages(bot, **kwargs):
+    rows, cursor, pages = [], None, 0
+    while True:
+        page = bot.list_cases(cursor=cursor, limit=5, **kwargs)
+        rows.extend(page["rows"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if not cursor:
+            return rows, pages
+
+
+@pytest.mark.parametrize("sort", ["-updated_at", "updated_at", "-created_at", "created_at"])
+def test_pages_cover_every_case_once_in_order(many_cases, sort):
+    rows, pages = all_pages(many_cases, sort=sort)
+    column = sort.lstrip("-")
+    direction = "DESC" if sort.startswith("-") else "ASC"
+    expected = [row[0] for row in many_cases.db.fetchall(
+        f"SELECT case_id FROM cases ORDER BY {column} {direction}, case_id {direction}"
+    )]
+    assert [row["case_id"] for row in rows] == expected
+    assert pages == -(-len(expected) // 5)
+
+
+def test_filtered_pages(many_cases):
+    rows, _ = all_pages(many_cases, filters={"marketplace": ["EU"], "case_status": "All"})
+    expected = many_cases.db.fetchone("SELECT COUNT(*) FROM cases WHERE marketplace = 'EU'")[0]
+    assert len(rows) == len({row["case_id"] for row in rows}) == expected
+    assert {row["marketplace"] for row in rows} == {"EU"}
+
+
+def test_rejects_unknown_sort_and_filter(bot):
+    with pytest.raises(ValueError):
+        bot.list_cases(sort="seller_name")
+    with pytest.raises(ValueError):
+        bot.list_cases(filters={"notes": "x"})
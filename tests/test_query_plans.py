@@ -0,0 +1,55 @@
+import pytest
+
+from api_support_bot import QuickSupportBot
+from benchmarks.synthetic_data import populate
+from database import FULL_INDEX_WALKS, check_query_plans, explain_query_plan
+
+
+@pytest.fixture(scope="module")
+def synthetic_bot(tmp_path_factory):
+    """Bot on an ANALYZEd synthetic database, so plans are the ones the planner picks at scale"""
+    bot = QuickSupportBot(
+        db_path=str(tmp_path_factory.mktemp("plans") / "synthetic.db"), cache=False, analytics_cache=False
+    )
+    populate(bot, 2000)
+    with bot.db.connection() as conn:
+        conn.execute("ANALYZE")
+    yield bot
+    bot.db.close()
+
+
+def test_hot_queries_use_indexes(synthetic_bot):
+    queries = synthetic_bot.hot_queries()
+    with synthetic_bot.db.connection() as conn:
+        failures = check_query_plans(conn, queries)
+    assert failures == {}
+
+
+def test_allowlist_names_hot_queries(synthetic_bot):
+    assert FULL_INDEX_WALKS <= set(synthetic_bot.hot_queries())
+
+
+def test_hot_queries_match_what_the_bot_runs(bot):
+    # The checked SQL must be the SQL list_cases actually executes
+    sql, params = bot.hot_queries()["list_cases_by_status"]
+    with bot.db.connection() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    assert [row[0] for row in rows] == [row["case_id"] for row in bot.list_cases({"case_status": ["WIP"]}, limit=50)["rows"]]
+
+
+def test_check_flags_full_scans(bot):
+    queries = {"by_notes": ("SELECT case_id FROM cases WHERE notes = ?", ("x",))}
+    with bot.db.connection() as conn:
+        assert "SCAN cases" in explain_query_plan(conn, *queries["by_notes"])
+        assert list(check_query_plans(conn, queries)) == ["by_notes"]
+        # Allowing a full index walk does not excuse a table scan
+        assert list(check_query_plans(conn, queries, allowed_walks={"by_notes"})) == ["by_notes"]
+
+
+def test_check_flags_full_index_walks(synthetic_bot):
+    queries = {"every_status": ("SELECT case_status, COUNT(*) FROM cases GROUP BY case_status", ())}
+    with synthetic_bot.db.connection() as conn:
+        plan = explain_query_plan(conn, *queries["every_status"])
+        assert any(step.startswith("SCAN cases USING ") for step in plan)
+        assert list(check_query_plans(conn, queries)) == ["every_status"]
+        assert check_query_plans(conn, queries, allowed_walks={"every_status"}) == {}
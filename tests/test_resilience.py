@@ -0,0 +1,179 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from openai import APIConnectionError
+
+from api_support_bot import QuickSupportBot
+from resilience import CircuitBreaker, ResilientCaller, RetryPolicy
+
+
+class FakeCompletions:
+    """create(model=...) that sleeps per model and then answers or raises"""
+
+    def __init__(self, delays, failing=()):
+        self.delays = delays
+        self.failing = set(failing)
+        self.calls = []
+
+    def create(self, timeout=None, model=None, **kwargs):
+        self.calls.append(model)
+        time.sleep(self.delays[model])
+        if model in self.failing:
+            raise RuntimeError(f"{model} failed")
+        return model
+
+
+@pytest.fixture
+def executor():
+    executor = ThreadPoolExecutor(max_workers=2)
+    yield executor
+    executor.shutdown(wait=False)
+
+
+def hedging_caller(executor, **kwargs):
+    caller = ResilientCaller(
+        retry=RetryPolicy(max_attempts=1), hedge_models={"slow": "backup"}, min_hedge_samples=1,
+        executor=executor, **kwargs
+    )
+    caller.tracker("slow").record(0.02)
+    return caller
+
+
+def test_primary_reply_is_used(executor):
+    caller = hedging_caller(executor)
+    completions = FakeCompletions({"slow": 0.1, "backup": 0.01})
+    assert caller.call(completions.create, {"model": "slow"}) == "slow"
+    assert caller.stats["hedged"] == 1
+    assert caller.stats["hedge_wins"] == 0
+
+
+def test_backup_answers_when_primary_fails(executor):
+    caller = hedging_caller(executor)
+    completions = FakeCompletions({"slow": 0.1, "backup": 0.01}, failing={"slow"})
+    assert caller.call(completions.create, {"model": "slow"}) == "backup"
+    assert caller.stats["hedge_wins"] == 1
+
+
+def test_fast_primary_sends_no_backup(executor):
+    caller = hedging_caller(executor)
+    completions = FakeCompletions({"slow": 0.0, "backup": 0.0})
+    assert caller.call(completions.create, {"model": "slow"}) == "slow"
+    time.sleep(0.05)
+    assert completions.calls == ["slow"]
+    assert caller.stats["hedged"] == 0
+
+
+def test_busy_executor_does_not_block_the_call():
+    executor = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    executor.submit(release.wait)
+    try:
+        caller = hedging_caller(executor, deadline=0.5)
+        completions = FakeCompletions({"slow": 0.05, "backup": 0.0}, failing={"slow"})
+        started = time.monotonic()
+        with pytest.raises(RuntimeError):
+            caller.call(completions.create, {"model": "slow"})
+        # Gives up at the deadline instead of waiting for a worker
+        assert time.monotonic() - started < 1.0
+    finally:
+        release.set()
+        executor.shutdown(wait=False)
+
+
+def test_hedge_delay_is_per_model_and_site(executor):
+    caller = ResilientCaller(hedge_models={"slow": "backup", "other": "backup"}, executor=executor)
+    for _ in range(20):
+        caller.tracker("slow", "intent").record(0.01)
+        caller.tracker("slow", "extract_case").record(1.0)
+    assert caller._hedge_delay({"model": "slow"}, "intent") == 0.01
+    assert caller._hedge_delay({"model": "slow"}, "extract_case") == 1.0
+    # No samples yet for this model, so no hedging however fast the others are
+    assert caller._hedge_delay({"model": "other"}, "intent") is None
+
+
+def test_attempts_are_recorded_per_site(executor):
+    caller = hedging_caller(executor)
+    completions = FakeCompletions({"slow": 0.0, "fast": 0.0})
+    caller.call(completions.create, {"model": "fast"}, "intent")
+    caller.call(completions.create, {"model": "fast"}, "analytics")
+    caller.call(completions.create, {"model": "fast"}, "analytics")
+    assert {key: len(tracker.samples) for key, tracker in caller.latency.items()} == {
+        ("slow", None): 1, ("fast", "intent"): 1, ("fast", "analytics"): 2,
+    }
+
+
+class ConnectionDropped(APIConnectionError):
+    """Retryable error that needs no HTTP request object"""
+
+    def __init__(self):
+        Exception.__init__(self, "Connection dropped")
+
+
+def test_stats_add_up_under_concurrency():
+    caller = ResilientCaller(retry=RetryPolicy(max_attempts=2, base_delay=0.0),
+                             breaker=CircuitBreaker(failure_threshold=10 ** 6))
+    attempts = []
+    succeeded = []
+
+    def create(timeout=None, model=None):
+        attempts.append(model)
+        # About every other attempt fails with a retryable error
+        if len(attempts) % 2:
+            raise ConnectionDropped()
+        return model
+
+    def run():
+        for _ in range(200):
+            try:
+                succeeded.append(caller.call(create, {"model": "m"}))
+            except APIConnectionError:
+                pass
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = caller.stats
+    assert stats["calls"] == 1600
+    # Every attempt is the first of a call or a retry; every call succeeds or fails
+    assert stats["calls"] + stats["retries"] == len(attempts)
+    assert stats["failures"] == 1600 - len(succeeded)
+
+
+def test_breaker_opens_and_rejects():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+@pytest.fixture
+def offline_bot(db_path):
+    """Bot whose model circuit is open, so every model call is refused"""
+    bot = QuickSupportBot(api_key="test", base_url="http://127.0.0.1:9", db_path=db_path, cache=False, analytics_cache=False)
+    bot.resilience.breaker.record_failure()
+    bot.resilience.breaker.opened_at = time.monotonic()
+    yield bot
+    bot.db.close()
+
+
+def test_circuit_open_does_not_write_guesses(offline_bot):
+    before = offline_bot.db.fetchone("SELECT COUNT(*) FROM cases")[0]
+    # Neither message is complete enough for the rules
+    create = offline_bot.process_message("test", "New case for Acme on EU")
+    update = offline_bot.process_message("test", "Update CASE-0001: seller replied")
+    assert "unavailable" in create and "unavailable" in update
+    assert offline_bot.db.fetchone("SELECT COUNT(*) FROM cases")[0] == before
+    assert offline_bot.query_case("CASE-0001")[0]["last_sub_status"] != "Note"
+
+
+def test_circuit_open_still_takes_strict_parses(offline_bot):
+    response = offline_bot.process_message("test", "Update CASE-0001: seller replied, mark INT_WIP")
+    assert response.startswith("✅")
+    assert offline_bot.query_case("CASE-0001")[0]["last_sub_status"] == "INT_WIP"
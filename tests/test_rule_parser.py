@@ -0,0 +1,72 @@
+import pytest
+
+from api_support_bot import CASE_VOCABULARIES, ANALYTICS_VOCABULARIES
+from query_normalizer import QueryNormalizer
+from rule_parser import RuleParser
+
+
+@pytest.fixture
+def parser():
+    return RuleParser(CASE_VOCABULARIES, QueryNormalizer(ANALYTICS_VOCABULARIES))
+
+
+def test_update_reads_sub_status(parser):
+    parsed = parser.parse_update("Update CASE-0012: seller replied, mark INT_WIP")
+    assert parsed["case_id"] == "CASE-0012"
+    assert parsed["sub_status"] == "INT_WIP"
+    assert parsed["note"] == "seller replied, mark INT_WIP"
+
+
+def test_update_reads_phrases(parser):
+    assert parser.parse_update("update case-7 handed over to the seller")["sub_status"] == "HANDOVER"
+    assert parser.parse_update("Mark CASE-7 on hold until Monday")["sub_status"] == "ON_HOLD"
+
+
+@pytest.mark.parametrize("text", [
+    "Update CASE-0012: not on hold anymore",
+    "Update CASE-0012: no longer PMA, seller is back",
+    "Update CASE-0012: don't mark PMA",
+    "Update CASE-0012: seller has not been handed over yet",
+    "Update CASE-0012: handover hasn't happened",
+    "Update CASE-0012: PMA not sent yet",
+])
+def test_update_with_negation_falls_back(parser, text):
+    assert parser.parse_update(text) is None
+
+
+@pytest.mark.parametrize("text", [
+    "Update CASE-0012: moved from PMA to INT_WIP",
+    "Update CASE-0012: on hold, then cancelled",
+])
+def test_update_with_several_sub_statuses_falls_back(parser, text):
+    assert parser.parse_update(text) is None
+
+
+def test_same_sub_status_twice_is_not_a_conflict(parser):
+    assert parser.parse_update("Update CASE-0012: handed over, HANDOVER call done")["sub_status"] == "HANDOVER"
+
+
+def test_update_without_sub_status_falls_back(parser):
+    assert parser.parse_update("Update CASE-0012: seller replied") is None
+    assert parser.parse_update("seller replied, mark INT_WIP") is None
+
+
+@pytest.mark.parametrize("text, group_by", [
+    ("cases by marketplace and priority", ["marketplace", "priority"]),
+    ("WIP cases by marketplace and status", ["marketplace", "case_status"]),
+    ("cases by marketplace, priority", ["marketplace", "priority"]),
+    ("EU cases by sub-status", "last_sub_status"),
+])
+def test_analytics_keeps_every_group_key(parser, text, group_by):
+    assert parser.parse_analytics(text)["group_by"] == group_by
+
+
+def test_analytics_labels_are_not_group_keys(parser):
+    params = parser.parse_analytics("Count of cases in WIP status")
+    assert params["filters"] == {"case_status": ["WIP"]}
+    assert params["group_by"] is None
+
+
+def test_analytics_with_a_loose_dimension_word_falls_back(parser):
+    # "priority" names no filtered or grouped field, so it may be a key the "by" phrase missed
+    assert parser.parse_analytics("EU cases priority by marketplace") is None
@@ -0,0 +1,72 @@
+import pytest
+
+from bulk_import import import_cases
+from database import CASES_TABLE_SQL, rebuild_table
+from rule_parser import search_terms
+
+
+def noted(count):
+    return [(line, {"seller_name": f"Seller {line}", "notes": f"Ticket word{line} raised"}) for line in range(1, count + 1)]
+
+
+def hits(bot, query):
+    return [hit["case_id"] for hit in bot.search_cases(query)]
+
+
+def case_for(bot, seller_name):
+    return bot.db.fetchone("SELECT case_id FROM cases WHERE seller_name = ?", (seller_name,))[0]
+
+
+def assert_index_intact(bot):
+    with bot.db.transaction() as conn:
+        for index in ("case_notes_fts", "update_notes_fts"):
+            conn.execute(f"INSERT INTO {index}({index}, rank) VALUES('integrity-check', 1)")
+
+
+def test_imported_notes_are_searchable(bot):
+    import_cases(bot, noted(6), chunk_size=4)
+    assert hits(bot, "word5") == [case_for(bot, "Seller 5")]
+    assert_index_intact(bot)
+
+
+def test_search_survives_table_rebuild(bot):
+    # Deleting leaves gaps that a rebuild would close if the index keyed on rowid
+    import_cases(bot, noted(12))
+    expected = case_for(bot, "Seller 10")
+    with bot.db.transaction() as conn:
+        conn.execute("DELETE FROM cases WHERE seller_name IN ('Seller 2', 'Seller 3')")
+        rebuild_table(conn, "cases", CASES_TABLE_SQL)
+    assert hits(bot, "word10") == [expected]
+    assert hits(bot, "word2") == []
+    assert_index_intact(bot)
+
+
+def test_edited_notes_are_reindexed(bot):
+    import_cases(bot, noted(2))
+    case_id = case_for(bot, "Seller 1")
+    with bot.db.transaction() as conn:
+        conn.execute("UPDATE cases SET notes = 'Payout held' WHERE case_id = ?", (case_id,))
+    assert hits(bot, "word1") == []
+    assert hits(bot, "payout") == [case_id]
+
+
+def test_update_notes_are_searchable(bot):
+    import_cases(bot, noted(2))
+    case_id = case_for(bot, "Seller 2")
+    assert bot.update_case_status(case_id, "Refund mismatch escalated", "HANDOVER")[0]
+    assert case_id in hits(bot, "refunds mismatch")
+    assert_index_intact(bot)
+
+
+@pytest.mark.parametrize("text, command, expected", [
+    ("the token expiry", False, "token expiry"),
+    ("Find cases mentioning token expiry", True, "token expiry"),
+    ("Show me any notes that say feed is not syncing", True, "feed not syncing"),
+    ("find cases", True, None),
+])
+def test_search_terms(text, command, expected):
+    assert search_terms(text, command=command) == expected
+
+
+def test_bare_search_request_asks_for_terms(bot):
+    assert bot._respond_search("Find cases").startswith("🔍")
@@ -0,0 +1,62 @@
+import threading
+import time
+
+import pytest
+
+from api_support_bot import QuickSupportBot, MODELS
+from benchmarks.fake_openai_server import FakeOpenAIServer, default_reply
+
+# Misses the keyword shortcuts and the rule parser, so intent needs the model
+MESSAGE = "Acme Corp can't get the inventory feed working"
+
+
+def unusable_analytics(body):
+    # Analytics params the router keeps escalating on, so a loser left running would call every tier
+    if "Convert this natural language query" in body["messages"][-1]["content"]:
+        return "not json"
+    return default_reply(body)
+
+
+@pytest.fixture
+def server():
+    # Intent runs on the fast tier and answers well before the extractions
+    latency = {model: 0.3 for model in MODELS.values()}
+    latency[MODELS["fast"]] = 0.05
+    with FakeOpenAIServer(model_latency=latency, reply=unusable_analytics) as server:
+        yield server
+
+
+@pytest.fixture
+def speculative_bot(server, db_path):
+    bot = QuickSupportBot(
+        api_key="test", base_url=server.base_url, db_path=db_path, cache=False, analytics_cache=False,
+        resilience=False, speculative=True,
+    )
+    yield bot
+    bot.db.close()
+
+
+def test_losing_extraction_is_cancelled(server, speculative_bot):
+    before = server.requests
+    result = speculative_bot.handle_message("test", MESSAGE)
+    assert result["intent"] == "create"
+    assert result["speculation"]["launched"] == ["create", "analytics"]
+    assert result["speculation"]["used"] == ["create"]
+    assert result["speculation"]["cancelled"] == ["analytics"]
+    assert result["response"].startswith("✅")
+
+    # Long enough for a loser left running to escalate through the other tiers
+    time.sleep(1.2)
+    # Intent, the create extraction and the one analytics call already in flight
+    assert server.requests - before == 3
+    # The abandoned call is neither a latency sample nor charged to the budget
+    assert "analytics" not in speculative_bot.router.stats()["calls_by_site"]
+
+
+def test_cancelled_call_makes_no_model_request(server, speculative_bot):
+    cancel = threading.Event()
+    cancel.set()
+    before = server.requests
+    result = speculative_bot._cancellable_call(cancel, [{"role": "user", "content": "hi"}], 0.1, 10, "intent", None)
+    assert result["cancelled"]
+    assert server.requests == before